@@ -264,7 +264,7 @@ class FanSerializer(serializers.ModelSerializer):
         participations = Participation.objects.filter(fan=obj)\
             .values_list('campaign', flat=True)\
             .distinct()
-        campaigns = Campaign.objects.filter(id__in=participations)
+        campaigns = Campaign.objects.filter(id__in=participations).with_specific()
         return BaseCampaignSerializer(campaigns, many=True, context=self.context).data
 
     def get_campaigns_won(self, obj):
@@ -273,7 +273,7 @@ class FanSerializer(serializers.ModelSerializer):
         """
         won_campaigns = CampaignWinner.objects.filter(fan=obj)\
             .values_list('campaign', flat=True)
-        campaigns = Campaign.objects.filter(id__in=won_campaigns)
+        campaigns = Campaign.objects.filter(id__in=won_campaigns).with_specific()
         return BaseCampaignSerializer(campaigns, many=True, context=self.context).data
 
     def get_total_campaigns_joined(self, obj):
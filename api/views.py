@@ -40,7 +40,7 @@ from django.utils.encoding import force_bytes
 import requests
 from base.models import Email
 from profileapp.models import Follower
-from campaign.models import Campaign, Participation, CampaignWinner
+from campaign.models import Campaign, Participation, CampaignWinner, prefetch_specific
 from campaign.serializers import BaseCampaignSerializer
 from django.db.models import Count
 from django.core.validators import validate_email
@@ -853,6 +853,7 @@ class UserDashboardAnalyticsView(APIView):
         # If the user is a fan: fetch campaigns joined and won, most recent first.
         if user.user_type == 'fan':
             distinct_participations = Participation.objects.filter(fan=user)\
+                .select_related('campaign')\
                 .order_by('campaign', '-created_at')\
                 .distinct('campaign')
             joined_campaigns = sorted(
@@ -860,12 +861,17 @@ class UserDashboardAnalyticsView(APIView):
                 key=lambda p: p.created_at,
                 reverse=True
             )
+            # one query per campaign type instead of one specific_campaign() per row
+            prefetch_specific(p.campaign for p in joined_campaigns)
             joined_campaigns_data = [
                 BaseCampaignSerializer(participation.campaign, context={'request': request}).data
                 for participation in joined_campaigns
             ]
             
-            won_campaigns_qs = CampaignWinner.objects.filter(fan=user).order_by('-selected_at')
+            won_campaigns_qs = list(
+                CampaignWinner.objects.filter(fan=user).select_related('campaign').order_by('-selected_at')
+            )
+            prefetch_specific(cw.campaign for cw in won_campaigns_qs)
             won_campaigns = [
                 BaseCampaignSerializer(cw.campaign, context={'request': request}).data
                 for cw in won_campaigns_qs
@@ -876,7 +882,7 @@ class UserDashboardAnalyticsView(APIView):
 
         # If the user is an influencer: fetch campaigns created by the user, most recent first.
         elif user.user_type == 'influencer':
-            created_campaigns_qs = Campaign.objects.filter(user=user).order_by('-created_at')
+            created_campaigns_qs = Campaign.objects.filter(user=user).order_by('-created_at').with_specific()
             created_campaigns = [
                 BaseCampaignSerializer(campaign, context={'request': request}).data
                 for campaign in created_campaigns_qs
@@ -8,10 +8,15 @@ from .models import (
     OnChainAction,
     ConversionRate,
     WertSyncCursor,
+    ContractEventCursor,
     WertOrder,
     GuestOrder,
     TransactionIssueReport,
     IssueAttachment,
+    OwnerNonce,
+    PendingTransaction,
+    WithdrawalDailyUsage,
+    EscrowReconcileCursor,
 )
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -39,11 +44,12 @@ class TransactionAdmin(admin.ModelAdmin):
         "credits_delta",
         "status",
         "tx_hash",
+        "log_index",
         "block_number",
         "gas_used",
         "timestamp",
     )
-    list_filter = ("tx_type", "status", "campaign")
+    list_filter = ("tx_type", "status", "fn_name", "campaign")
     search_fields = ("user__username", "user__email", "tx_hash")
     readonly_fields = (
         "timestamp",
@@ -55,6 +61,8 @@ class TransactionAdmin(admin.ModelAdmin):
         "to_address",
         "value",
         "input_data",
+        "fn_name",
+        "fn_args",
         "tt_amount_wei",
         "credits_delta_wei",
     )
@@ -86,11 +94,12 @@ class InfluencerTransactionAdmin(admin.ModelAdmin):
         "credits_delta",
         "status",
         "tx_hash",
+        "log_index",
         "block_number",
         "gas_used",
         "timestamp",
     )
-    list_filter = ("tx_type", "status", "campaign")
+    list_filter = ("tx_type", "status", "fn_name", "campaign")
     search_fields = ("user__username", "influencer__username", "tx_hash")
     readonly_fields = (
         "timestamp",
@@ -102,6 +111,8 @@ class InfluencerTransactionAdmin(admin.ModelAdmin):
         "to_address",
         "value",
         "input_data",
+        "fn_name",
+        "fn_args",
         "tt_amount_wei",
         "credits_delta_wei",
     )
@@ -113,7 +124,7 @@ class InfluencerTransactionAdmin(admin.ModelAdmin):
 @admin.register(OnChainAction)
 class OnChainActionAdmin(admin.ModelAdmin):
     list_display = ("id", "tx_type", "user", "campaign", "status", "tx_hash", "block_number", "timestamp")
-    list_filter = ("tx_type", "status", "campaign")
+    list_filter = ("tx_type", "status", "fn_name", "campaign")
     search_fields = ("user__username", "tx_hash")
     readonly_fields = (
         "timestamp",
@@ -125,6 +136,8 @@ class OnChainActionAdmin(admin.ModelAdmin):
         "to_address",
         "value",
         "input_data",
+        "fn_name",
+        "fn_args",
         "args",
     )
     raw_id_fields = ("user", "campaign")
@@ -187,6 +200,60 @@ class WertSyncCursorAdmin(admin.ModelAdmin):
     search_fields = ("name",)
     ordering = ("name",)
 
+
+@admin.register(ContractEventCursor)
+class ContractEventCursorAdmin(admin.ModelAdmin):
+    list_display = ("name", "last_block", "last_block_hash", "updated_at")
+    readonly_fields = ("updated_at",)
+    search_fields = ("name",)
+    ordering = ("name",)
+
+
+@admin.register(EscrowReconcileCursor)
+class EscrowReconcileCursorAdmin(admin.ModelAdmin):
+    list_display = ("name", "last_pk", "pass_started_at", "last_finished_at", "updated_at")
+    readonly_fields = ("pass_stats", "last_pass", "updated_at")
+    search_fields = ("name",)
+    ordering = ("name",)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Daily withdrawal counters
+# ─────────────────────────────────────────────────────────────────────────────
+
+@admin.register(WithdrawalDailyUsage)
+class WithdrawalDailyUsageAdmin(admin.ModelAdmin):
+    list_display = ("user", "day", "pending_credits", "completed_credits", "updated_at")
+    search_fields = ("user__username", "user__email")
+    raw_id_fields = ("user",)
+    readonly_fields = ("updated_at",)
+    date_hierarchy = "day"
+    ordering = ("-day",)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Signer nonce ledger
+# ─────────────────────────────────────────────────────────────────────────────
+
+@admin.register(OwnerNonce)
+class OwnerNonceAdmin(admin.ModelAdmin):
+    list_display = ("address", "next_nonce", "gaps", "updated_at")
+    readonly_fields = ("updated_at",)
+    search_fields = ("address",)
+
+@admin.register(PendingTransaction)
+class PendingTransactionAdmin(admin.ModelAdmin):
+    list_display = ("tx_hash", "kind", "status", "nonce", "bumps", "on_success", "block_number", "checks", "inclusion", "created_at", "resolved_at")
+    list_filter = ("status", "kind")
+    search_fields = ("tx_hash", "replaced_hashes")
+    readonly_fields = ("created_at", "first_seen_at", "resolved_at", "replaced_by", "replaced_hashes", "payload")
+    raw_id_fields = ("replaced_by",)
+    ordering = ("-created_at",)
+    list_per_page = 50
+
+    @admin.display(description="inclusion (s)")
+    def inclusion(self, obj):
+        secs = obj.inclusion_seconds
+        return round(secs, 1) if secs is not None else "-"
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Guest orders (pre-Wert flow / guest checkout)
 # ─────────────────────────────────────────────────────────────────────────────
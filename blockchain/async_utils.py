@@ -0,0 +1,102 @@
+# blockchain/async_utils.py
+"""
+AsyncWeb3 twins of the read helpers in blockchain/utils.py, for async views under
+Daphne: an RPC await yields the event loop instead of parking a sync worker thread.
+
+One AsyncWeb3 client + aiohttp ClientSession (connection-limited, keep-alive) per event
+loop — Daphne runs one loop per process. A loop that is shut down the asyncio.run() way
+(async_to_sync's per-request loop under WSGI, test runners) cancels the client's keeper
+task, which closes the session and forgets the client before the loop goes away.
+"""
+
+import asyncio
+import logging
+
+import aiohttp
+from django.conf import settings
+from web3 import AsyncWeb3, AsyncHTTPProvider
+from web3.exceptions import ContractCustomError
+from web3.middleware import ExtraDataToPOAMiddleware
+
+from blockchain.utils import get_abi
+
+logger = logging.getLogger(__name__)
+
+OWNER = settings.OWNER_ADDRESS
+
+POOL_MAXSIZE    = int(getattr(settings, "WEB3_POOL_MAXSIZE", 32))
+REQUEST_TIMEOUT = float(getattr(settings, "WEB3_REQUEST_TIMEOUT", 15))
+ZERO_ADDRESS    = "0x" + "00" * 20
+
+# event loop → client / bound contract / keeper task (removed by _close_with_loop)
+_clients   = {}
+_contracts = {}
+_keepers   = {}
+
+
+async def _close_with_loop(loop, session) -> None:
+    # built-in: asyncio.run() / async_to_sync cancel leftover tasks before closing the loop
+    try:
+        await asyncio.Event().wait()
+    finally:
+        _clients.pop(loop, None)
+        _contracts.pop(loop, None)
+        _keepers.pop(loop, None)
+        await session.close()
+
+
+async def get_async_w3() -> AsyncWeb3:
+    """The AsyncWeb3 client for the running event loop (built on first use)."""
+    loop   = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is not None:
+        return client
+
+    provider = AsyncHTTPProvider(
+        settings.WEB3_PROVIDER_URL,
+        request_kwargs={"timeout": aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)},
+    )
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=POOL_MAXSIZE, keepalive_timeout=60),
+    )
+    await provider.cache_async_session(session)
+    if loop in _clients:
+        # another coroutine on this loop built it while we awaited
+        await session.close()
+        return _clients[loop]
+
+    client = AsyncWeb3(provider)
+    client.middleware_onion.inject(ExtraDataToPOAMiddleware(), layer=0)
+    _clients[loop]   = client
+    _contracts[loop] = client.eth.contract(address=settings.CONTRACT_ADDRESS, abi=get_abi())
+    _keepers[loop]   = loop.create_task(_close_with_loop(loop, session))
+    return client
+
+
+async def get_async_contract():
+    await get_async_w3()
+    return _contracts[asyncio.get_running_loop()]
+
+
+async def aget_user_balances(user_id: int, block="latest") -> tuple:
+    """(tt_balance_wei, credit_balance_wei); (0, 0) for unregistered users."""
+    contract = await get_async_contract()
+    try:
+        return tuple(await contract.functions.getUserBalances(int(user_id)).call({"from": OWNER}, block_identifier=block))
+    except ContractCustomError:
+        return 0, 0
+
+
+async def aget_user_wallet(user_id: int) -> str:
+    """Wallet saved on-chain for the user ("" if none)."""
+    contract = await get_async_contract()
+    wallet   = await contract.functions.getUserWallet(int(user_id)).call({"from": OWNER})
+    return "" if not wallet or wallet.lower() == ZERO_ADDRESS else wallet
+
+
+async def aget_transaction(tx_hash: str):
+    return await (await get_async_w3()).eth.get_transaction(tx_hash)
+
+
+async def ablock_number() -> int:
+    return await (await get_async_w3()).eth.block_number
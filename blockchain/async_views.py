@@ -0,0 +1,133 @@
+# blockchain/async_views.py
+"""
+Async (ASGI) versions of the read-mostly chain endpoints:
+
+  balances/me/              → my_balances              (MyBalancesView)
+  get-wallet/               → get_user_wallet          (GetUserWalletView)
+  conversion-rate/          → conversion_rate          (ConversionRateView)
+  wallet/confirm-deposit/   → wallet_confirm_deposit   (WalletConfirmDepositView)
+
+Under Daphne an awaited RPC yields the event loop, so one process serves many concurrent
+lookups instead of parking a sync thread per request. DRF's APIView can't run async
+handlers, so authentication / parsing reuse DRF's configured classes via sync_to_async
+and responses are plain JsonResponse with the same payloads.
+Routing picks these when settings.ASYNC_CHAIN_READS is on (blockchain/urls.py); asgi.py
+turns it on by default, WSGI deployments keep the sync views.
+"""
+
+import logging
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from blockchain import balance_cache, rate_cache
+from blockchain.async_utils import aget_user_wallet, aget_transaction
+
+logger = logging.getLogger(__name__)
+
+
+def async_api_view(methods):
+    """
+    Minimal async counterpart of @api_view + IsAuthenticated: method check, DRF
+    authentication (JWT) and parsers; the view receives the DRF Request.
+    """
+    def decorator(fn):
+        @csrf_exempt
+        @wraps(fn)
+        async def view(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse(
+                    {"detail": f'Method "{request.method}" not allowed.'},
+                    status=status.HTTP_405_METHOD_NOT_ALLOWED,
+                )
+
+            drf_request = Request(
+                request,
+                parsers=[p() for p in api_settings.DEFAULT_PARSER_CLASSES],
+                authenticators=[a() for a in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+            )
+            try:
+                # .user runs the authenticators (DB lookup) → off the event loop
+                user = await sync_to_async(lambda: drf_request.user)()
+            except exceptions.APIException as e:
+                body = e.detail if isinstance(e.detail, dict) else {"detail": e.detail}
+                return JsonResponse(body, status=e.status_code)
+
+            if not (user and user.is_authenticated):
+                return JsonResponse(
+                    {"detail": "Authentication credentials were not provided."},
+                    status=status.HTTP_401_UNAUTHORIZED,
+                )
+            return await fn(drf_request, *args, **kwargs)
+        return view
+    return decorator
+
+
+@async_api_view(["GET"])
+async def my_balances(request):
+    tt_bal, credit_bal = await balance_cache.aget_balances(request.user)
+    return JsonResponse({
+        "tt_balance":     str(tt_bal),
+        "credit_balance": str(credit_bal),
+    })
+
+
+@async_api_view(["GET"])
+async def conversion_rate(request):
+    return JsonResponse({"conversion_rate": await rate_cache.aget_rate_wei()})
+
+
+@async_api_view(["GET"])
+async def get_user_wallet(request):
+    """Same contract as GetUserWalletView: DB wallet first, on-chain fallback, sync back."""
+    user = request.user
+    if getattr(user, "wallet_address", None):
+        return JsonResponse({"wallet": user.wallet_address})
+
+    try:
+        user_id = int(user.user_id)
+    except Exception:
+        return JsonResponse({"wallet": ""})
+
+    try:
+        wallet = await aget_user_wallet(user_id)
+    except Exception:
+        logger.exception("get-wallet on-chain call failed")
+        return JsonResponse({"wallet": ""})
+
+    if wallet:
+        try:
+            user.wallet_address = wallet
+            await sync_to_async(user.save)(update_fields=["wallet_address"])
+        except Exception:
+            logger.exception("Failed to sync on-chain wallet to DB")
+
+    return JsonResponse({"wallet": wallet})
+
+
+@async_api_view(["POST"])
+async def wallet_confirm_deposit(request):
+    from blockchain.views import confirm_wallet_deposit
+
+    data       = await sync_to_async(lambda: request.data)()
+    tx_hash    = data.get("tx_hash")
+    raw_amount = data.get("amount")
+
+    if not tx_hash:
+        return JsonResponse({"error": "tx_hash is required"}, status=status.HTTP_400_BAD_REQUEST)
+    if not tx_hash.startswith("0x"):
+        tx_hash = "0x" + tx_hash
+
+    try:
+        tx = await aget_transaction(tx_hash)
+    except Exception as e:
+        logger.exception("wallet-confirm: get_transaction failed")
+        return JsonResponse({"error": f"Could not fetch transaction: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    payload, code = await sync_to_async(confirm_wallet_deposit)(request.user, tx_hash, tx, raw_amount)
+    return JsonResponse(payload, status=code)
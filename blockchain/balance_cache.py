@@ -0,0 +1,129 @@
+# blockchain/balance_cache.py
+"""
+Block-aware on-chain balance cache for MyBalancesView / MyLatestSnapshotView.
+
+  - get_balances(user)     getUserBalances at most once per (user, block): entries carry
+                           the block they were read at and are reused until a newer block
+                           appears (fee_oracle.block_number(), itself cached per block time)
+  - aget_balances(user)    the same for async views (AsyncWeb3)
+  - invalidate(user_pk)    drop a user's entry; called by the save_* tasks once one of our
+                           txs (hold / withdraw / deposit / claim / release / refund) is mined
+  - latest_snapshot(user)  last stored BalanceSnapshot, from the cache when we have it
+
+BalanceSnapshot rows are only written when the balance changed, or when the last one is
+older than BALANCE_SNAPSHOT_MIN_INTERVAL_SECONDS — polling frontends no longer add a row
+per refresh.
+"""
+
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from web3.exceptions import ContractCustomError
+
+from blockchain import fee_oracle
+from blockchain.models import BalanceSnapshot
+
+logger = logging.getLogger(__name__)
+
+OWNER = settings.OWNER_ADDRESS
+
+BALANCE_CACHE_TTL     = int(getattr(settings, "BALANCE_CACHE_TTL_SECONDS", 300))
+SNAPSHOT_MIN_INTERVAL = int(getattr(settings, "BALANCE_SNAPSHOT_MIN_INTERVAL_SECONDS", 300))
+SNAPSHOT_CACHE_TTL    = 24 * 3600
+
+
+def _key(user_pk) -> str:
+    return f"bal:{user_pk}"
+
+
+def _snap_key(user_pk) -> str:
+    return f"balsnap:{user_pk}"
+
+
+def invalidate(*user_pks) -> None:
+    """Forget cached balances for these DB users (next read goes to the chain)."""
+    keys = [_key(pk) for pk in user_pks if pk is not None]
+    if keys:
+        cache.delete_many(keys)
+
+
+def get_balances(user) -> tuple:
+    """
+    (tt_balance_wei, credit_balance_wei) for `user` at the latest block.
+    Unregistered users read as (0, 0), like MyBalancesView always did.
+    """
+    from blockchain.utils import contract
+
+    block = fee_oracle.block_number()
+    hit   = cache.get(_key(user.pk))
+    if hit is not None and hit["block"] >= block:
+        return hit["tt"], hit["cr"]
+
+    try:
+        tt_bal, credit_bal = contract.functions.getUserBalances(int(user.user_id)).call(
+            {"from": OWNER}, block_identifier=block
+        )
+    except ContractCustomError:
+        tt_bal, credit_bal = 0, 0
+
+    cache.set(_key(user.pk), {"block": block, "tt": tt_bal, "cr": credit_bal}, BALANCE_CACHE_TTL)
+    _maybe_snapshot(user, tt_bal, credit_bal)
+    return tt_bal, credit_bal
+
+
+async def aget_balances(user) -> tuple:
+    """get_balances() for async views: AsyncWeb3 read, async cache I/O."""
+    from asgiref.sync import sync_to_async
+    from blockchain.async_utils import aget_user_balances
+
+    block = await fee_oracle.ablock_number()
+    hit   = await cache.aget(_key(user.pk))
+    if hit is not None and hit["block"] >= block:
+        return hit["tt"], hit["cr"]
+
+    tt_bal, credit_bal = await aget_user_balances(int(user.user_id), block=block)
+
+    await cache.aset(_key(user.pk), {"block": block, "tt": tt_bal, "cr": credit_bal}, BALANCE_CACHE_TTL)
+    await sync_to_async(_maybe_snapshot)(user, tt_bal, credit_bal)
+    return tt_bal, credit_bal
+
+
+def latest_snapshot(user):
+    """{"tt_balance", "credit_balance", "taken_at"} of the newest snapshot, or None."""
+    hit = cache.get(_snap_key(user.pk))
+    if hit is not None:
+        return hit
+
+    snap = (
+        BalanceSnapshot.objects
+        .filter(user=user)
+        .order_by("-taken_at")
+        .values("tt_balance", "credit_balance", "taken_at")
+        .first()
+    )
+    if snap is not None:
+        cache.set(_snap_key(user.pk), snap, SNAPSHOT_CACHE_TTL)
+    return snap
+
+
+def _maybe_snapshot(user, tt_bal: int, credit_bal: int) -> None:
+    last = latest_snapshot(user)
+    now  = timezone.now()
+    if (
+        last is not None
+        and int(last["tt_balance"]) == int(tt_bal)
+        and int(last["credit_balance"]) == int(credit_bal)
+        and (now - last["taken_at"]).total_seconds() < SNAPSHOT_MIN_INTERVAL
+    ):
+        return
+
+    snap = BalanceSnapshot.objects.create(user=user, tt_balance=tt_bal, credit_balance=credit_bal)
+    cache.set(
+        _snap_key(user.pk),
+        # Decimal, like the DecimalField values a DB read returns
+        {"tt_balance": Decimal(tt_bal), "credit_balance": Decimal(credit_bal), "taken_at": snap.taken_at},
+        SNAPSHOT_CACHE_TTL,
+    )
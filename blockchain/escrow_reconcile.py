@@ -0,0 +1,249 @@
+# blockchain/escrow_reconcile.py
+"""
+Escrow reconciliation: do `held` EscrowRecords still match the contract's holds?
+
+reconcile_once() checks the next chunk of held rows after the cursor (EscrowReconcileCursor):
+  1. one keyset query for up to ESCROW_RECONCILE_CHUNK held rows (pk > cursor.last_pk)
+  2. one grouped query for the expected credits per (campaign, buyer): a fan who bought
+     twice has two rows but a single on-chain hold
+  3. one batch_call of getHold for every pair, pinned to one block (JSON-RPC batches from
+     OWNER, or Multicall3 when configured and getHold is in MULTICALL3_FUNCTIONS)
+  4. empty holds are explained from the ledger (InfluencerTransaction release / refund rows)
+
+Findings, per (campaign, buyer):
+  missing     on-chain hold is empty and no release / refund is recorded
+  drift       on-chain credits differ from the sum of the held rows
+  released    the ledger has the release but the escrow rows still say held
+  refunded    same, for a refund
+  unreadable  getHold didn't answer, or the buyer has no on-chain user id
+
+With fix=True released / refunded rows get their status corrected; missing / drift are
+only reported. Pairs with a row younger than ESCROW_RECONCILE_GRACE_SECONDS may still
+be in flight and are left for the next pass.
+"""
+
+import logging
+import operator
+import time
+from datetime import timedelta
+from decimal import Decimal
+from functools import reduce
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from blockchain.models import EscrowReconcileCursor, InfluencerTransaction
+
+logger = logging.getLogger(__name__)
+
+CHUNK = int(getattr(settings, "ESCROW_RECONCILE_CHUNK", 1000))
+GRACE = int(getattr(settings, "ESCROW_RECONCILE_GRACE_SECONDS", 1800))
+WEI   = 10 ** 18
+
+MISSING, DRIFT, RELEASED, REFUNDED, UNREADABLE = "missing", "drift", "released", "refunded", "unreadable"
+KINDS    = (MISSING, DRIFT, RELEASED, REFUNDED, UNREADABLE)
+COUNTERS = ("rows", "pairs", "ok", "in_flight", *KINDS, "repaired")
+
+
+def _held():
+    from campaign.models import EscrowRecord
+    # credit_amount 0 rows are registerCampaign bookkeeping, not buyer holds
+    return EscrowRecord.objects.filter(status="held", credit_amount__gt=0)
+
+
+def _finding(kind, pair, group, buyer_id=None, hold=None, block=None) -> dict:
+    return {
+        "kind":             kind,
+        "campaign_id":      pair[0],
+        "user_id":          pair[1],
+        "buyer_id":         buyer_id,
+        "records":          group["records"],
+        "expected_credits": str(group["credits"]),
+        "onchain_credits":  str(Decimal(hold[1]) / WEI) if hold else None,
+        "onchain_tt_wei":   str(hold[0]) if hold else None,
+        "block":            block,
+    }
+
+
+def check_chunk(rows, block="latest") -> tuple:
+    """
+    (findings, counters) for one chunk of held rows (dicts with pk / user_id /
+    user__user_id / onchain_campaign_id). Each pair is judged once, by the chunk
+    that holds its lowest pk.
+    """
+    from blockchain.utils import batch_call
+
+    counts = dict.fromkeys(COUNTERS, 0)
+    counts["rows"] = len(rows)
+    if not rows:
+        return [], counts
+
+    first    = rows[0]["pk"]
+    cutoff   = timezone.now() - timedelta(seconds=GRACE)
+    pairs    = {(r["onchain_campaign_id"], r["user_id"]) for r in rows}
+    buyer_of = {r["user_id"]: r["user__user_id"] for r in rows}
+
+    # expected totals over *all* held rows of these pairs, not just the ones in this chunk
+    groups = {
+        (g["onchain_campaign_id"], g["user_id"]): g
+        for g in (
+            _held()
+            .filter(onchain_campaign_id__in={c for c, _ in pairs}, user_id__in={u for _, u in pairs})
+            .values("onchain_campaign_id", "user_id")
+            .annotate(credits=Sum("credit_amount"), records=Count("pk"), first_pk=Min("pk"), latest=Max("created_at"))
+        )
+    }
+
+    findings, reads = [], []
+    for pair in sorted(pairs, key=str):
+        group = groups.get(pair)
+        if group is None or group["first_pk"] < first:
+            continue    # judged by an earlier chunk (or no longer held)
+        counts["pairs"] += 1
+        if group["latest"] > cutoff:
+            counts["in_flight"] += 1
+            continue
+        try:
+            reads.append((pair, int(pair[0]), int(buyer_of[pair[1]])))
+        except (TypeError, ValueError):
+            findings.append(_finding(UNREADABLE, pair, group))
+
+    holds = batch_call([("getHold", [cid, buyer]) for _, cid, buyer in reads], block=block) if reads else []
+
+    empty = {}
+    for (pair, cid, buyer), hold in zip(reads, holds):
+        group = groups[pair]
+        if hold is None:
+            findings.append(_finding(UNREADABLE, pair, group, buyer, block=block))
+        elif not hold[0] and not hold[1]:
+            empty[pair] = (buyer, hold)
+        elif hold[1] != group["credits"] * WEI:
+            findings.append(_finding(DRIFT, pair, group, buyer, hold, block))
+        else:
+            counts["ok"] += 1
+
+    if empty:
+        # one query: which empty holds the ledger explains (release wins over refund)
+        settled = {}
+        for campaign_id, user_pk, tx_type in (
+            InfluencerTransaction.objects
+            .filter(
+                campaign_id__in={int(c) for c, _ in empty},
+                user_id__in={u for _, u in empty},
+                tx_type__in=[InfluencerTransaction.RELEASE, InfluencerTransaction.REFUND],
+            )
+            .values_list("campaign_id", "user_id", "tx_type")
+        ):
+            key = (str(campaign_id), user_pk)
+            if settled.get(key) != RELEASED:
+                settled[key] = RELEASED if tx_type == InfluencerTransaction.RELEASE else REFUNDED
+        for pair, (buyer, hold) in empty.items():
+            findings.append(_finding(settled.get(pair, MISSING), pair, groups[pair], buyer, hold, block))
+
+    for f in findings:
+        counts[f["kind"]] += 1
+    return findings, counts
+
+
+def repair(findings) -> int:
+    """Flip held rows the ledger shows as released / refunded. Returns rows updated."""
+    updated = 0
+    for kind, status in ((RELEASED, "released"), (REFUNDED, "refunded")):
+        pairs = [(f["campaign_id"], f["user_id"]) for f in findings if f["kind"] == kind]
+        if pairs:
+            match    = reduce(operator.or_, (Q(onchain_campaign_id=c, user_id=u) for c, u in pairs))
+            updated += _held().filter(match).update(status=status)
+    return updated
+
+
+def _add(into: dict, counts: dict) -> dict:
+    for key in (*COUNTERS, "seconds"):
+        into[key] = round(into.get(key, 0) + counts.get(key, 0), 3)
+    return into
+
+
+def reconcile_once(name: str = "default", chunk: int = CHUNK, fix: bool = False) -> dict:
+    """
+    Check the next chunk after cursor `name`; {"locked": True} if another sweep holds it.
+    Returns the chunk's counters, its findings, and done=True once the pass wrapped
+    (the cursor is back at 0 and the pass totals are in cursor.last_pass).
+    """
+    from blockchain.utils import w3
+
+    with transaction.atomic():
+        EscrowReconcileCursor.objects.get_or_create(name=name)
+        cursor = (
+            EscrowReconcileCursor.objects
+            .select_for_update(skip_locked=True)
+            .filter(name=name)
+            .first()
+        )
+        if cursor is None:
+            return {"locked": True}
+
+        started = time.perf_counter()
+        if cursor.pass_started_at is None:
+            cursor.pass_started_at, cursor.pass_stats = timezone.now(), {}
+
+        rows = list(
+            _held()
+            .filter(pk__gt=cursor.last_pk)
+            .order_by("pk")
+            .values("pk", "user_id", "user__user_id", "onchain_campaign_id")[:chunk]
+        )
+        block = w3.eth.block_number if rows else None
+        findings, counts = check_chunk(rows, block)
+        if fix and findings:
+            counts["repaired"] = repair(findings)
+        counts["seconds"] = round(time.perf_counter() - started, 3)
+
+        _add(cursor.pass_stats, counts)
+        done = len(rows) < chunk
+        if done:
+            cursor.last_pass = {
+                **cursor.pass_stats,
+                "started_at":  cursor.pass_started_at.isoformat(),
+                "finished_at": timezone.now().isoformat(),
+            }
+            cursor.last_pk, cursor.pass_started_at, cursor.pass_stats = 0, None, {}
+            cursor.last_finished_at = timezone.now()
+        else:
+            cursor.last_pk = rows[-1]["pk"]
+        cursor.save()
+
+    for f in findings:
+        logger.warning("escrow %s: campaign %s user %s (expected %s credits, on-chain %s)",
+                       f["kind"], f["campaign_id"], f["user_id"], f["expected_credits"], f["onchain_credits"])
+    return {
+        **counts,
+        "from_pk":  rows[0]["pk"] if rows else None,
+        "to_pk":    rows[-1]["pk"] if rows else None,
+        "block":    block,
+        "findings": findings,
+        "done":     done,
+    }
+
+
+def sweep(name: str = "default", chunk: int = CHUNK, fix: bool = False, max_chunks: int = None, on_chunk=None) -> dict:
+    """
+    reconcile_once() until the pass wraps (or max_chunks); the cursor makes it resumable.
+    Returns totals plus rows_per_sec; on_chunk(stats) is called after every chunk.
+    """
+    totals = dict.fromkeys(COUNTERS, 0)
+    totals.update(chunks=0, seconds=0.0, done=False)
+    while max_chunks is None or totals["chunks"] < max_chunks:
+        stats = reconcile_once(name, chunk, fix)
+        if stats.get("locked"):
+            totals["locked"] = True
+            break
+        _add(totals, stats)
+        totals["chunks"] += 1
+        if on_chunk:
+            on_chunk(stats)
+        if stats["done"]:
+            totals["done"] = True
+            break
+    totals["rows_per_sec"] = round(totals["rows"] / totals["seconds"], 1) if totals["seconds"] else 0.0
+    return totals
@@ -0,0 +1,167 @@
+# blockchain/fee_oracle.py
+"""
+Per-process fee / chain-parameter cache for OWNER transactions.
+
+Replaces the hard-coded GAS_PRICE_GWEI and the per-tx chain_id / get_block / estimate_gas
+round-trips:
+  - chain_id()          fetched once per process (it never changes)
+  - fees()              EIP-1559 maxFeePerGas / maxPriorityFeePerGas from the latest block,
+                        keyed on the block number (one eth_blockNumber per call, the fee
+                        RPCs only when a new block arrived); legacy gasPrice on chains
+                        without baseFeePerGas
+  - block_number()      latest block, refreshed at most once per FEE_BLOCK_TIME_SECONDS
+  - estimate_gas(fn)    value-moving calls (holds, deposits, withdrawals, claims): estimated
+                        per call — gas depends on the arguments (cold vs warm storage) and the
+                        estimate is the pre-flight that surfaces a revert before we pay for it.
+                        Others: the max estimate seen per function signature.
+  - tx_params(...)      the dict every build_transaction() call takes
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from web3 import Web3
+
+from blockchain.utils import w3
+
+logger = logging.getLogger(__name__)
+
+OWNER = settings.OWNER_ADDRESS
+
+DEFAULT_GAS_LIMIT    = int(getattr(settings, "DEFAULT_GAS_LIMIT", 200_000))
+BLOCK_TIME_SECONDS   = float(getattr(settings, "FEE_BLOCK_TIME_SECONDS", 3))
+# maxFeePerGas = baseFee * multiplier + tip → survives a few full blocks of base-fee growth;
+# we still only pay baseFee + tip, so the headroom isn't overpayment
+BASE_FEE_MULTIPLIER  = int(getattr(settings, "FEE_BASE_MULTIPLIER", 2))
+DEFAULT_TIP_WEI      = Web3.to_wei(getattr(settings, "FEE_DEFAULT_PRIORITY_GWEI", 2), "gwei")
+MAX_TIP_WEI          = Web3.to_wei(getattr(settings, "FEE_MAX_PRIORITY_GWEI", 10), "gwei")
+# never bid above what we used to pay with the fixed 50 gwei price
+MAX_FEE_WEI          = Web3.to_wei(getattr(settings, "FEE_MAX_FEE_GWEI", 50), "gwei")
+GAS_ESTIMATE_TTL     = float(getattr(settings, "GAS_ESTIMATE_TTL_SECONDS", 600))
+GAS_ESTIMATE_HEADROOM = 1.2
+# functions whose gas depends on the arguments and that must revert before broadcast, not on-chain
+PER_CALL_ESTIMATE = {"holdForCampaign", "withdraw", "deposit", "depositPending", "claimPending"}
+
+_lock      = threading.Lock()
+_chain_id  = None
+_fee_state = {"block": None, "fees": None, "fetched_at": 0.0}
+_block_state = {"block": None, "fetched_at": 0.0}
+_estimates = {}   # signature → (max gas seen, first fetched_at)
+
+
+def chain_id() -> int:
+    global _chain_id
+    if _chain_id is None:
+        _chain_id = w3.eth.chain_id
+    return _chain_id
+
+
+def _fetch_fees(block: int) -> dict:
+    """Fee fields for `block` from the node: 2 RPCs, done once per block."""
+    latest = w3.eth.get_block(block)
+    base   = latest.get("baseFeePerGas")
+
+    if base is None:
+        # pre-London / legacy chain → single gasPrice
+        return {"gasPrice": min(w3.eth.gas_price, MAX_FEE_WEI)}
+
+    try:
+        tip = w3.eth.max_priority_fee
+    except Exception:
+        tip = DEFAULT_TIP_WEI
+    # built-in: min/max clamp the node's suggestion
+    tip     = max(0, min(int(tip), MAX_TIP_WEI))
+    max_fee = min(int(base) * BASE_FEE_MULTIPLIER + tip, MAX_FEE_WEI)
+    return {
+        "maxFeePerGas":         max(max_fee, tip),
+        "maxPriorityFeePerGas": tip,
+    }
+
+
+def fees() -> dict:
+    """Fee fields for the current block (copy — callers may mutate it)."""
+    block = w3.eth.block_number
+    now   = time.time()
+    with _lock:
+        _block_state.update({"block": block, "fetched_at": now})
+        if _fee_state["fees"] is not None and _fee_state["block"] == block:
+            return dict(_fee_state["fees"])
+
+    fee_fields = _fetch_fees(block)
+    with _lock:
+        _fee_state.update({"block": block, "fees": fee_fields, "fetched_at": now})
+    return dict(fee_fields)
+
+
+def block_number() -> int:
+    """Latest block number, at most one eth_blockNumber per block time (reuses fees()' block)."""
+    now = time.time()
+    with _lock:
+        for state in (_block_state, _fee_state):
+            if state["block"] is not None and now - state["fetched_at"] < BLOCK_TIME_SECONDS:
+                return state["block"]
+
+    block = w3.eth.block_number
+    with _lock:
+        _block_state.update({"block": block, "fetched_at": now})
+    return block
+
+
+async def ablock_number() -> int:
+    """block_number() for async views: same per-process cache, AsyncWeb3 on a miss."""
+    from blockchain.async_utils import ablock_number as _fetch
+
+    now = time.time()
+    with _lock:
+        for state in (_block_state, _fee_state):
+            if state["block"] is not None and now - state["fetched_at"] < BLOCK_TIME_SECONDS:
+                return state["block"]
+
+    block = await _fetch()
+    with _lock:
+        _block_state.update({"block": block, "fetched_at": now})
+    return block
+
+
+def estimate_gas(fn) -> int:
+    """
+    Gas limit for a contract call. Raises like estimate_gas() does (e.g. ContractLogicError).
+      - PER_CALL_ESTIMATE functions: a fresh eth_estimateGas for these arguments every time
+      - everything else: the largest estimate seen for the function signature, re-estimated
+        (and folded into the max) once GAS_ESTIMATE_TTL seconds have passed
+    """
+    if fn.fn_name in PER_CALL_ESTIMATE:
+        return int(fn.estimate_gas({"from": OWNER}) * GAS_ESTIMATE_HEADROOM)
+
+    sig = fn.abi_element_identifier
+    now = time.time()
+    with _lock:
+        hit = _estimates.get(sig)
+        if hit and now - hit[1] < GAS_ESTIMATE_TTL:
+            return hit[0]
+
+    gas = int(fn.estimate_gas({"from": OWNER}) * GAS_ESTIMATE_HEADROOM)
+    with _lock:
+        _estimates[sig] = (max(gas, hit[0]) if hit else gas, now)
+        return _estimates[sig][0]
+
+
+def tx_params(fn=None, gas: int = None, nonce: int = None) -> dict:
+    """
+    Params for fn.build_transaction():
+      - gas: explicit value, else the cached estimate for `fn`, else DEFAULT_GAS_LIMIT
+      - nonce: omitted → allocated by tx_utils.build_and_send
+    """
+    if gas is None:
+        gas = estimate_gas(fn) if fn is not None else DEFAULT_GAS_LIMIT
+    params = {
+        "chainId": chain_id(),
+        "from":    OWNER,
+        "gas":     gas,
+        **fees(),
+    }
+    if nonce is not None:
+        params["nonce"] = nonce
+    return params
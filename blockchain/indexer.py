@@ -0,0 +1,387 @@
+# blockchain/indexer.py
+"""
+Checkpointed contract event indexer.
+
+Instead of decoding each receipt in a continuation and fanning out one save_* task per
+event (each re-fetching the tx), index_once() tails the contract's logs by block range:
+
+  1. one eth_getLogs per INDEXER_BLOCK_SPAN blocks, only up to head - INDEXER_CONFIRMATIONS
+  2. receipts of the txs involved in one batched RPC (gas / from / to metadata)
+  3. decoded events → Transaction / InfluencerTransaction / OnChainAction rows,
+     bulk-upserted on (tx_hash, log_index); rows the tasks already wrote for the same
+     (tx_hash, user, tx_type) are adopted instead of duplicated
+  4. the cursor (ContractEventCursor) advances in the same DB transaction
+
+Withdrawn carries the TT amount only; its credits are TT x the conversionRate in effect at
+that log. The rate is read once per range as of the block before it, then moved forward by
+the range's own ConversionRateUpdated events, so a backfill or catch-up uses historical rates.
+
+Reorgs: we never read past the confirmation depth; if the block at the cursor has still
+changed hash, we rewind INDEXER_REORG_REWIND blocks, drop the indexed rows above it and
+re-index.
+"""
+
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from blockchain.models import ContractEventCursor, Transaction, InfluencerTransaction, OnChainAction
+
+logger = logging.getLogger(__name__)
+
+CONFIRMATIONS = int(getattr(settings, "INDEXER_CONFIRMATIONS", 12))
+BLOCK_SPAN    = int(getattr(settings, "INDEXER_BLOCK_SPAN", 2000))
+REORG_REWIND  = int(getattr(settings, "INDEXER_REORG_REWIND", 64))
+
+EVENT_NAMES = (
+    "HoldCreated",
+    "HoldReleased",
+    "HoldRefunded",
+    "BulkHoldsReleased",
+    "BulkHoldsRefunded",
+    "Deposited",
+    "Withdrawn",
+    "PendingClaimed",
+    "ConversionRateUpdated",
+    "UserRegistered",
+)
+
+# columns refreshed when an event is indexed again (replay / rewind)
+_META_FIELDS = [
+    "status", "block_number", "transaction_index", "gas_used", "effective_gas_price",
+    "from_address", "to_address", "value", "input_data", "fn_name", "fn_args",
+]
+_UPDATE_FIELDS = {
+    Transaction:           _META_FIELDS + ["tt_amount", "credits_delta", "tt_amount_wei", "credits_delta_wei"],
+    InfluencerTransaction: _META_FIELDS + ["tt_amount", "credits_delta", "tt_amount_wei", "credits_delta_wei"],
+    OnChainAction:         _META_FIELDS + ["args"],
+}
+
+
+def _events():
+    """{topic0: event class} for every event we index."""
+    from blockchain.utils import contract
+    return {getattr(contract.events, name).topic: getattr(contract.events, name) for name in EVENT_NAMES}
+
+
+def _hex(value) -> str:
+    from blockchain.tasks import _ensure_prefixed
+    return _ensure_prefixed(value.hex() if isinstance(value, (bytes, bytearray)) else str(value))
+
+
+def _fetch_receipt_meta(tx_hashes) -> dict:
+    """
+    {tx_hash: OnChainBase metadata} from one batched round of eth_getTransactionReceipt +
+    eth_getTransactionByHash; the calldata is decoded here, once, into fn_name / fn_args.
+    """
+    from blockchain.utils import batch_rpc, decode_calldata
+
+    tx_hashes = list(tx_hashes)
+    calls     = []
+    for h in tx_hashes:
+        calls += [("eth_getTransactionReceipt", [h]), ("eth_getTransactionByHash", [h])]
+    results = batch_rpc(calls)
+
+    meta = {}
+    for i, h in enumerate(tx_hashes):
+        rcpt, txn = results[2 * i], results[2 * i + 1] or {}
+        if not rcpt:
+            meta[h] = {}
+            continue
+        fn_name, fn_args = decode_calldata(txn.get("input"))
+        meta[h] = {
+            "transaction_index":   int(rcpt["transactionIndex"], 16),
+            "gas_used":            int(rcpt.get("gasUsed") or "0x0", 16),
+            "effective_gas_price": int(rcpt.get("effectiveGasPrice") or "0x0", 16),
+            "from_address":        rcpt.get("from"),
+            "to_address":          rcpt.get("to"),
+            "value":               int(txn.get("value") or "0x0", 16),
+            "input_data":          txn.get("input"),
+            "fn_name":             fn_name,
+            "fn_args":             fn_args,
+        }
+    return meta
+
+
+class _Resolver:
+    """On-chain ids → DB pks, one query per id kind for the whole range."""
+
+    def __init__(self, decoded):
+        from campaign.models import Campaign
+
+        user_ids, campaign_ids = set(), set()
+        for ev in decoded:
+            a = ev.args
+            for key in ("buyerId", "sellerId", "userId"):
+                if key in a:
+                    user_ids.add(str(a[key]))
+            if "campaignId" in a:
+                campaign_ids.add(int(a["campaignId"]))
+
+        User = get_user_model()
+        self.users = dict(User.objects.filter(user_id__in=user_ids).values_list("user_id", "id"))
+        self.campaign_owner = dict(Campaign.objects.filter(id__in=campaign_ids).values_list("id", "user_id"))
+
+    def user(self, onchain_id):
+        return self.users.get(str(onchain_id))
+
+    def campaign(self, campaign_id):
+        return int(campaign_id) if int(campaign_id) in self.campaign_owner else None
+
+
+def _rows_for(ev, r: _Resolver, meta: dict, rate_wei: int) -> list:
+    """[(model, unsaved instance)] for one decoded event; [] if it doesn't map to a ledger row."""
+    from blockchain.tasks import _from_wei, _hold_event_amounts
+
+    a    = ev.args
+    name = ev.event
+    base = {
+        "status":       Transaction.COMPLETED,
+        "tx_hash":      _hex(ev.transactionHash),
+        "log_index":    ev.logIndex,
+        "block_number": ev.blockNumber,
+        **meta,
+    }
+
+    if name == "HoldCreated":
+        user = r.user(a["buyerId"])
+        if user is None:
+            return []
+        tt, cr = int(a["ttAmountWei"]), int(a["creditAmountWei"])
+        return [(Transaction, Transaction(
+            user_id=user, campaign_id=r.campaign(a["campaignId"]), tx_type=Transaction.SPEND,
+            tt_amount=_from_wei(tt), credits_delta=_from_wei(cr),
+            tt_amount_wei=Decimal(tt), credits_delta_wei=Decimal(cr), **base,
+        ))]
+
+    if name in ("HoldReleased", "HoldRefunded"):
+        campaign_id = r.campaign(a["campaignId"])
+        user        = r.user(a["buyerId"])
+        influencer  = r.user(a["sellerId"]) if "sellerId" in a else r.campaign_owner.get(campaign_id)
+        if user is None or influencer is None:
+            return []
+        tt, cr = _hold_event_amounts(ev)
+        return [(InfluencerTransaction, InfluencerTransaction(
+            user_id=user, influencer_id=influencer, campaign_id=campaign_id,
+            tx_type=InfluencerTransaction.RELEASE if name == "HoldReleased" else InfluencerTransaction.REFUND,
+            tt_amount=_from_wei(tt), credits_delta=_from_wei(cr),
+            tt_amount_wei=Decimal(tt), credits_delta_wei=Decimal(cr), **base,
+        ))]
+
+    if name in ("BulkHoldsReleased", "BulkHoldsRefunded"):
+        seller = r.user(a["sellerId"])
+        if seller is None:
+            return []
+        return [(OnChainAction, OnChainAction(
+            user_id=seller, campaign_id=r.campaign(a["campaignId"]), tx_type=OnChainAction.OTHER_OPERATION,
+            args={"event": name, **{k: str(v) for k, v in a.items()}}, **base,
+        ))]
+
+    if name == "Deposited":
+        user = r.user(a["userId"])
+        if user is None:
+            return []
+        tt, cr = int(a["amountWei"]), int(a["creditsWei"])
+        return [(Transaction, Transaction(
+            user_id=user, tx_type=Transaction.DEPOSIT,
+            tt_amount=_from_wei(tt), credits_delta=_from_wei(cr),
+            tt_amount_wei=Decimal(tt), credits_delta_wei=Decimal(cr), **base,
+        ))]
+
+    if name == "Withdrawn":
+        user = r.user(a["userId"])
+        if user is None:
+            return []
+        tt = int(a["amountWei"])
+        cr = -tt * int(rate_wei)          # burn is negative; event carries TT only
+        return [(Transaction, Transaction(
+            user_id=user, tx_type=Transaction.WITHDRAW, wallet_address=a["to"],
+            tt_amount=_from_wei(tt), credits_delta=-_from_wei(-cr),
+            tt_amount_wei=Decimal(tt), credits_delta_wei=Decimal(cr), **base,
+        ))]
+
+    if name == "PendingClaimed":
+        user = r.user(a["userId"])
+        if user is None:
+            return []
+        tt, cr = int(a["ttWei"]), int(a["creditsWei"])
+        ref    = _hex(a["ref"])
+        return [
+            (Transaction, Transaction(
+                user_id=user, tx_type=Transaction.DEPOSIT,
+                tt_amount=_from_wei(tt), credits_delta=_from_wei(cr),
+                tt_amount_wei=Decimal(tt), credits_delta_wei=Decimal(cr), **base,
+            )),
+            (OnChainAction, OnChainAction(
+                user_id=user, tx_type=OnChainAction.GUEST_CLAIMED, args={"ref": ref}, **base,
+            )),
+        ]
+
+    if name == "UserRegistered":
+        user = r.user(a["userId"])
+        if user is None:
+            return []
+        return [(OnChainAction, OnChainAction(
+            user_id=user, tx_type=OnChainAction.USER_REGISTERED, args={"userId": str(a["userId"])}, **base,
+        ))]
+
+    return []
+
+
+def upsert_ledger_rows(model, rows: list) -> int:
+    """
+    Idempotent write on (tx_hash, log_index). Rows the save_* tasks already created for the
+    same (tx_hash, user, tx_type) get the log position + metadata instead of a twin row.
+    """
+    if not rows:
+        return 0
+
+    existing = {}
+    for pk, tx_hash, user_id, tx_type in (
+        model.objects
+        .filter(tx_hash__in={row.tx_hash for row in rows}, log_index__isnull=True)
+        .values_list("id", "tx_hash", "user_id", "tx_type")
+    ):
+        existing.setdefault((tx_hash, user_id, tx_type), []).append(pk)
+
+    adopted, fresh = [], []
+    for row in rows:
+        ids = existing.get((row.tx_hash, row.user_id, row.tx_type))
+        if ids:
+            row.pk = ids.pop()
+            adopted.append(row)
+        else:
+            fresh.append(row)
+
+    if adopted:
+        model.objects.bulk_update(adopted, ["log_index"] + _META_FIELDS)
+    if fresh:
+        model.objects.bulk_create(
+            fresh,
+            update_conflicts=True,
+            unique_fields=["tx_hash", "log_index"],
+            update_fields=_UPDATE_FIELDS[model],
+        )
+    return len(rows)
+
+
+def _rewind(cursor: ContractEventCursor) -> None:
+    to_block = max(0, cursor.last_block - REORG_REWIND)
+    logger.warning("indexer: block %s changed hash (reorg); rewinding to %s", cursor.last_block, to_block)
+    for model in (Transaction, InfluencerTransaction, OnChainAction):
+        model.objects.filter(log_index__isnull=False, block_number__gt=to_block).delete()
+    cursor.last_block      = to_block
+    cursor.last_block_hash = ""
+
+
+def _withdraw_rates(decoded, start: int, contract, rate_cache) -> dict:
+    """
+    {(tx_hash, log_index): conversionRate in effect} for every Withdrawn in the range.
+    Starting rate = conversionRate() as of block start - 1 (falls back to the first update's
+    oldRate, then to the current rate, if the node can't serve that block).
+    """
+    ordered = sorted(decoded, key=lambda ev: (ev.blockNumber, ev.logIndex))
+    if not any(ev.event == "Withdrawn" for ev in ordered):
+        return {}
+
+    try:
+        rate = int(contract.functions.conversionRate().call(block_identifier=max(0, start - 1)))
+    except Exception:
+        first = next((ev for ev in ordered if ev.event == "ConversionRateUpdated"), None)
+        if first is not None:
+            rate = int(first.args["oldRate"])
+        else:
+            logger.warning("indexer: conversionRate at block %s unavailable; using the current rate", start - 1)
+            rate = rate_cache.get_rate_wei()
+
+    rates = {}
+    for ev in ordered:
+        if ev.event == "ConversionRateUpdated":
+            rate = int(ev.args["newRate"])
+        elif ev.event == "Withdrawn":
+            rates[(_hex(ev.transactionHash), ev.logIndex)] = rate
+    return rates
+
+
+def index_once(name: str = "default", max_blocks: int = BLOCK_SPAN) -> dict:
+    """
+    Index the next confirmed block range for cursor `name`. Returns counters;
+    {"locked": True} if another indexer holds the cursor.
+    """
+    from blockchain.utils import w3, contract
+    from blockchain import rate_cache
+
+    stats = {"from": None, "to": None, "logs": 0, "rows": 0, "skipped": 0}
+    safe  = w3.eth.block_number - CONFIRMATIONS
+
+    with transaction.atomic():
+        ContractEventCursor.objects.get_or_create(
+            name=name, defaults={"last_block": int(getattr(settings, "INDEXER_START_BLOCK", safe))}
+        )
+        cursor = (
+            ContractEventCursor.objects
+            .select_for_update(skip_locked=True)
+            .filter(name=name)
+            .first()
+        )
+        if cursor is None:
+            return {"locked": True}
+
+        if cursor.last_block_hash and cursor.last_block > 0:
+            onchain = _hex(w3.eth.get_block(cursor.last_block)["hash"])
+            if onchain != cursor.last_block_hash:
+                _rewind(cursor)
+
+        start = cursor.last_block + 1
+        end   = min(safe, start + max_blocks - 1)
+        if end < start:
+            cursor.save(update_fields=["last_block", "last_block_hash", "updated_at"])
+            return stats
+        stats["from"], stats["to"] = start, end
+
+        events = _events()
+        logs   = w3.eth.get_logs({
+            "address":   contract.address,
+            "fromBlock": start,
+            "toBlock":   end,
+            "topics":    [list(events.keys())],
+        })
+        stats["logs"] = len(logs)
+
+        decoded = []
+        for log in logs:
+            event_cls = events.get(_hex(log["topics"][0]))
+            if event_cls is not None:
+                decoded.append(event_cls.process_log(log))
+
+        # rate updates feed the shared rate cache instead of a ledger row
+        for ev in decoded:
+            if ev.event == "ConversionRateUpdated":
+                rate_cache.publish(ev.args["newRate"], ev.blockNumber)
+
+        ledger   = [ev for ev in decoded if ev.event != "ConversionRateUpdated"]
+        meta     = _fetch_receipt_meta({_hex(ev.transactionHash) for ev in ledger}) if ledger else {}
+        resolver = _Resolver(ledger)
+        rates    = _withdraw_rates(decoded, start, contract, rate_cache)
+
+        by_model = {Transaction: [], InfluencerTransaction: [], OnChainAction: []}
+        for ev in ledger:
+            rate_wei = rates.get((_hex(ev.transactionHash), ev.logIndex), 0)
+            rows     = _rows_for(ev, resolver, meta.get(_hex(ev.transactionHash), {}), rate_wei)
+            if not rows:
+                stats["skipped"] += 1
+                logger.info("indexer: %s in %s has no known user; skipped", ev.event, _hex(ev.transactionHash))
+            for model, row in rows:
+                by_model[model].append(row)
+
+        for model, rows in by_model.items():
+            stats["rows"] += upsert_ledger_rows(model, rows)
+
+        cursor.last_block      = end
+        cursor.last_block_hash = _hex(w3.eth.get_block(end)["hash"])
+        cursor.save(update_fields=["last_block", "last_block_hash", "updated_at"])
+
+    return stats
@@ -0,0 +1,64 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blockchain.models import InfluencerTransaction, OnChainAction, Transaction
+from blockchain.utils import decode_calldata
+
+MODELS = {
+    "transaction":            Transaction,
+    "influencertransaction":  InfluencerTransaction,
+    "onchainaction":          OnChainAction,
+}
+
+
+def _decode_chunk(items):
+    # runs in a worker process: pure ABI decoding, no DB access
+    return [(pk, *decode_calldata(raw)) for pk, raw in items]
+
+
+class Command(BaseCommand):
+    help = "Decode input_data into fn_name / fn_args for existing ledger rows, in parallel chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", choices=sorted(MODELS), action="append", help="Only these tables (repeatable)")
+        parser.add_argument("--chunk", type=int, default=2000, help="Rows per worker job")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Decoder processes")
+        parser.add_argument("--force", action="store_true", help="Re-decode rows that already have fn_name")
+
+    def handle(self, *args, **opts):
+        if opts["chunk"] <= 0 or opts["workers"] <= 0:
+            raise CommandError("--chunk and --workers must be positive")
+
+        # forked workers must not share the parent's DB socket
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=opts["workers"]) as pool:
+            for name in opts["model"] or sorted(MODELS):
+                done = self._backfill(MODELS[name], pool, opts["chunk"], opts["workers"], opts["force"])
+                self.stdout.write(f"{name}: {done} rows decoded")
+
+    def _backfill(self, model, pool, chunk: int, workers: int, force: bool) -> int:
+        qs = model.objects.exclude(input_data__isnull=True).exclude(input_data="")
+        if not force:
+            qs = qs.filter(fn_name__isnull=True)
+
+        done, last_pk = 0, 0
+        while True:
+            # keyset over pk: one window = `workers` chunks decoded side by side
+            window = list(
+                qs.filter(pk__gt=last_pk).order_by("pk").values_list("pk", "input_data")[:chunk * workers]
+            )
+            if not window:
+                return done
+            last_pk = window[-1][0]
+
+            jobs    = [window[i:i + chunk] for i in range(0, len(window), chunk)]
+            updates = []
+            for decoded in pool.map(_decode_chunk, jobs):
+                updates += [model(pk=pk, fn_name=name, fn_args=args) for pk, name, args in decoded if name]
+            model.objects.bulk_update(updates, ["fn_name", "fn_args"], batch_size=chunk)
+
+            done += len(updates)
+            self.stdout.write(f"  {model.__name__}: up to pk {last_pk}, {done} decoded")
@@ -0,0 +1,229 @@
+import time
+import uuid
+from datetime import timedelta
+
+from celery import current_app
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from eth_utils import keccak
+
+from blockchain import nonce_manager, simulator
+from blockchain.models import GuestOrder, PendingTransaction, WertOrder
+from blockchain.providers import get_w3
+from blockchain.reconciler import reconcile_once
+from blockchain.tasks import (
+    claim_guest_after_registration,
+    hold_for_campaign_on_chain,
+    refund_all_holds_for_campaign_task,
+    register_user_on_chain,
+    release_all_holds_for_campaign_task,
+)
+
+User = get_user_model()
+
+OPS = ("register", "hold", "release", "refund", "claim")
+WEI = 10 ** 18
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the on-chain task paths (register / hold / release / refund / guest claim) against the "
+        "in-process chain simulator and report tasks per second and RPC calls per business operation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buyers", type=int, default=50, help="Fans per operation")
+        parser.add_argument("--ops", default=",".join(OPS), help=f"Comma-separated subset of {','.join(OPS)}")
+        parser.add_argument("--latency-ms", type=float, default=None, help="Override SIMULATOR_LATENCY_MS")
+        parser.add_argument("--jitter-ms", type=float, default=None, help="Override SIMULATOR_JITTER_MS")
+        parser.add_argument("--block-time", type=float, default=None, help="Override SIMULATOR_BLOCK_TIME")
+        parser.add_argument("--timeout", type=float, default=300, help="Max seconds to wait for receipts per op")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark users / campaigns / orders")
+
+    def handle(self, *args, **opts):
+        provider = get_w3().provider
+        if not isinstance(provider, simulator.SimulatedProvider):
+            raise CommandError(
+                "benchmark_chain only runs against the simulator: set WEB3_PROVIDER=blockchain.simulator.provider"
+            )
+        ops = [o.strip() for o in opts["ops"].split(",") if o.strip()]
+        unknown = set(ops) - set(OPS)
+        if unknown:
+            raise CommandError(f"unknown ops: {', '.join(sorted(unknown))}")
+
+        if opts["latency_ms"] is not None:
+            provider.latency_ms = opts["latency_ms"]
+        if opts["jitter_ms"] is not None:
+            provider.jitter_ms = opts["jitter_ms"]
+        chain = simulator.reset_chain(
+            block_time=simulator.BLOCK_TIME if opts["block_time"] is None else opts["block_time"]
+        )
+
+        # continuations run in-process (the reconciler honours eager mode too)
+        current_app.conf.task_always_eager    = True
+        current_app.conf.task_eager_propagates = False
+        nonce_manager.resync(forget_sent=True)   # fresh chain: nothing we sent before is in its mempool
+
+        self.chain   = chain
+        self.timeout = opts["timeout"]
+        self.started = timezone.now()
+        self.fixture = self._create_fixture(opts["buyers"])
+
+        self.stdout.write(
+            f"simulator: latency={provider.latency_ms}ms jitter={provider.jitter_ms}ms "
+            f"block_time={chain.block_time}s buyers={opts['buyers']}"
+        )
+        self.stdout.write(
+            f"{'op':<9}{'tasks':>7}{'items':>7}{'secs':>9}{'tasks/s':>10}{'items/s':>10}"
+            f"{'rpc/item':>10}{'trips/item':>12}  top methods"
+        )
+        try:
+            for op in ops:
+                tasks, items, elapsed, stats = self._run(op)
+                calls = stats["calls"]
+                top   = sorted(stats["by_method"].items(), key=lambda kv: -kv[1])[:4]
+                self.stdout.write(
+                    f"{op:<9}{tasks:>7}{items:>7}{elapsed:>9.2f}"
+                    f"{tasks / elapsed if elapsed else 0:>10.1f}{items / elapsed if elapsed else 0:>10.1f}"
+                    f"{calls / max(items, 1):>10.1f}{stats['round_trips'] / max(items, 1):>12.1f}  "
+                    + ", ".join(f"{m}={n}" for m, n in top)
+                )
+        finally:
+            if not opts["keep"]:
+                self._cleanup()
+
+    # ── fixture ──────────────────────────────────────────────────────────────
+    def _create_fixture(self, buyers: int) -> dict:
+        from campaign.models import TicketCampaign
+
+        tag = uuid.uuid4().hex[:8]
+        # bulk_create: no post_save → no auto registerUser; the chain is seeded directly below
+        users = User.objects.bulk_create([
+            User(username=f"bench-{tag}-{i}", email=f"bench-{tag}-{i}@example.invalid")
+            for i in range(buyers + 1)
+        ])
+        seller, fans = users[0], users[1:]
+
+        def _campaign(title):
+            return TicketCampaign.objects.create(
+                user=seller, title=title, banner_image="", campaign_type="ticket",
+                deadline=timezone.now() + timedelta(days=1), details="benchmark",
+                ticket_cost=1, total_tickets=buyers,
+            )
+
+        hold_campaign, refund_campaign = _campaign(f"bench-{tag}-hold"), _campaign(f"bench-{tag}-refund")
+
+        self.chain.seed_user(int(seller.user_id))
+        for fan in fans:
+            self.chain.seed_user(int(fan.user_id), 1_000 * WEI, 10_000 * WEI)
+        for c in (hold_campaign, refund_campaign):
+            self.chain.seed_campaign(c.id, int(seller.user_id))
+
+        return {
+            "tag":      tag,
+            "seller":   seller,
+            "fans":     fans,
+            "campaign": hold_campaign,
+            "refund":   refund_campaign,
+        }
+
+    def _cleanup(self):
+        from campaign.models import Campaign
+
+        fx = self.fixture
+        GuestOrder.objects.filter(user__in=[fx["seller"], *fx["fans"]]).delete()
+        WertOrder.objects.filter(order_id__startswith=f"bench-{fx['tag']}").delete()
+        Campaign.objects.filter(pk__in=[fx["campaign"].pk, fx["refund"].pk]).delete()
+        User.all_objects.filter(pk__in=[u.pk for u in (fx["seller"], *fx["fans"])]).delete()
+        PendingTransaction.objects.filter(created_at__gte=self.started).delete()
+
+    # ── ops ──────────────────────────────────────────────────────────────────
+    def _run(self, op: str) -> tuple:
+        prepare = getattr(self, f"_prepare_{op}", None)
+        calls   = prepare() if prepare else None
+
+        self.chain.reset_stats()
+        t0 = time.perf_counter()
+        tasks, items = getattr(self, f"_op_{op}")(calls)
+        self._drain()
+        elapsed = time.perf_counter() - t0
+        return tasks, items, elapsed, self.chain.stats()
+
+    def _drain(self):
+        """Reconcile until every tracked tx is mined and its continuation has run."""
+        deadline = time.monotonic() + self.timeout
+        while PendingTransaction.objects.filter(status=PendingTransaction.PENDING, created_at__gte=self.started).exists():
+            if time.monotonic() > deadline:
+                self.stderr.write("timed out waiting for receipts")
+                return
+            stats = reconcile_once()
+            if not (stats["confirmed"] or stats["reverted"] or stats["expired"]):
+                time.sleep(min(self.chain.block_time or 0.05, 0.5))
+
+    def _op_register(self, _):
+        base = int(time.time() * 1000) * 1000
+        ids  = [base + i for i in range(len(self.fixture["fans"]))]
+        for uid in ids:
+            register_user_on_chain.apply(args=[uid])
+        return len(ids), len(ids)
+
+    def _prepare_hold(self):
+        from campaign.models import EscrowRecord
+
+        campaign = self.fixture["campaign"]
+        return EscrowRecord.objects.bulk_create([
+            EscrowRecord(
+                user=fan, campaign=campaign, onchain_campaign_id=str(campaign.id),
+                tt_amount=1, credit_amount=10, status="held",
+            )
+            for fan in self.fixture["fans"]
+        ])
+
+    def _op_hold(self, records):
+        campaign = self.fixture["campaign"]
+        for rec, fan in zip(records, self.fixture["fans"]):
+            hold_for_campaign_on_chain.apply(args=[rec.id, campaign.id, int(fan.user_id), 1, 10])
+        return len(records), len(records)
+
+    def _seed_holds(self, campaign):
+        if self.chain.contract.holders_in(campaign.id) == 0:
+            for fan in self.fixture["fans"]:
+                self.chain.seed_hold(campaign.id, int(fan.user_id), WEI, 10 * WEI)
+        return self.chain.contract.holders_in(campaign.id)
+
+    def _prepare_release(self):
+        return self._seed_holds(self.fixture["campaign"])
+
+    def _op_release(self, holders):
+        seller = int(self.fixture["seller"].user_id)
+        release_all_holds_for_campaign_task.apply(args=[self.fixture["campaign"].id, seller])
+        return 1, holders
+
+    def _prepare_refund(self):
+        return self._seed_holds(self.fixture["refund"])
+
+    def _op_refund(self, holders):
+        seller = int(self.fixture["seller"].user_id)
+        refund_all_holds_for_campaign_task.apply(args=[self.fixture["refund"].id, seller])
+        return 1, holders
+
+    def _prepare_claim(self):
+        tag, orders, werts = self.fixture["tag"], [], []
+        for i, fan in enumerate(self.fixture["fans"]):
+            click_id = uuid.uuid4()
+            ref      = keccak(text=str(click_id))
+            self.chain.seed_pending(ref, WEI)
+            orders.append(GuestOrder(
+                click_id=click_id, ref="0x" + ref.hex(), status=GuestOrder.Status.CONFIRMED,
+                amount=WEI, user=fan,
+            ))
+            werts.append(WertOrder(order_id=f"bench-{tag}-{i}", click_id=str(click_id), status="confirmed"))
+        GuestOrder.objects.bulk_create(orders)
+        WertOrder.objects.bulk_create(werts)
+        return orders
+
+    def _op_claim(self, orders):
+        for go in orders:
+            claim_guest_after_registration.apply(args=[str(go.click_id), int(go.user.user_id)])
+        return len(orders), len(orders)
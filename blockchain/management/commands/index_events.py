@@ -0,0 +1,41 @@
+import time
+from django.core.management.base import BaseCommand
+from blockchain.indexer import index_once, BLOCK_SPAN
+from blockchain.models import ContractEventCursor
+
+
+class Command(BaseCommand):
+    help = "Tail contract events by block range and bulk-upsert the ledger (Transaction / InfluencerTransaction / OnChainAction)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from-block", type=int, default=None, help="Reset the cursor so indexing resumes after this block")
+        parser.add_argument("--span", type=int, default=BLOCK_SPAN, help="Blocks per eth_getLogs range")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between ticks once caught up")
+        parser.add_argument("--once", action="store_true", help="Index one range and exit")
+
+    def handle(self, *args, **opts):
+        if opts["from_block"] is not None:
+            ContractEventCursor.objects.update_or_create(
+                name="default", defaults={"last_block": opts["from_block"], "last_block_hash": ""}
+            )
+            self.stdout.write(f"cursor reset to block {opts['from_block']}")
+
+        while True:
+            try:
+                stats = index_once(max_blocks=opts["span"])
+            except Exception as e:
+                self.stderr.write(f"[indexer] tick failed: {e}")
+                stats = {}
+
+            if stats.get("locked"):
+                self.stderr.write("[indexer] cursor locked by another indexer")
+            elif stats.get("to") is not None:
+                self.stdout.write(
+                    f"blocks {stats['from']}-{stats['to']}: logs={stats['logs']} rows={stats['rows']} skipped={stats['skipped']}"
+                )
+
+            if opts["once"]:
+                return
+            # caught up (nothing indexed) → wait for new confirmed blocks
+            if stats.get("to") is None:
+                time.sleep(opts["interval"])
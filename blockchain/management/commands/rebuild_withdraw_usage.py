@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from blockchain import withdraw_limits
+
+
+class Command(BaseCommand):
+    help = "Recompute WithdrawalDailyUsage counters from completed WITHDRAW transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="First day to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--until", help="Last day to rebuild (YYYY-MM-DD, default today)")
+        parser.add_argument("--days", type=int, default=7, help="Without --since: rebuild the last N days")
+        parser.add_argument("--reset-pending", action="store_true",
+                            help="Also zero pending reservations (only when no withdrawal is in flight)")
+
+    def handle(self, *args, **opts):
+        until = parse_date(opts["until"]) if opts["until"] else timezone.localdate()
+        if opts["since"]:
+            since = parse_date(opts["since"])
+        else:
+            if opts["days"] <= 0:
+                raise CommandError("--days must be positive")
+            since = until - timedelta(days=opts["days"] - 1)
+        if since is None or until is None or since > until:
+            raise CommandError("invalid --since / --until range")
+
+        written = withdraw_limits.rebuild(since, until, reset_pending=opts["reset_pending"])
+        self.stdout.write(f"{since}..{until}: {written} usage rows rebuilt")
@@ -0,0 +1,68 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blockchain.escrow_reconcile import CHUNK, KINDS, sweep
+from blockchain.models import EscrowReconcileCursor
+
+
+class Command(BaseCommand):
+    help = (
+        "Check held EscrowRecords against on-chain getHold in batched chunks; report missing / drifted / "
+        "already-settled holds and optionally repair statuses. Resumes from the cursor."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=CHUNK, help="Held rows per chunk (one batched read each)")
+        parser.add_argument("--max-chunks", type=int, default=None, help="Stop after this many chunks (resume later)")
+        parser.add_argument("--repair", action="store_true", help="Mark rows the ledger shows as released / refunded")
+        parser.add_argument("--restart", action="store_true", help="Start a fresh pass from the first held row")
+        parser.add_argument("--findings", help="Append findings as JSON lines to this file")
+        parser.add_argument("--name", default="default", help="Cursor name")
+
+    def handle(self, *args, **opts):
+        if opts["chunk"] <= 0:
+            raise CommandError("--chunk must be positive")
+        if opts["restart"]:
+            EscrowReconcileCursor.objects.update_or_create(
+                name=opts["name"], defaults={"last_pk": 0, "pass_started_at": None, "pass_stats": {}}
+            )
+            self.stdout.write("cursor reset")
+
+        out = open(opts["findings"], "a") if opts["findings"] else None
+        try:
+            totals = sweep(
+                name=opts["name"],
+                chunk=opts["chunk"],
+                fix=opts["repair"],
+                max_chunks=opts["max_chunks"],
+                on_chunk=lambda stats: self._chunk(stats, out),
+            )
+        finally:
+            if out:
+                out.close()
+
+        if totals.get("locked"):
+            self.stderr.write("cursor locked by another reconciliation run")
+        self.stdout.write(
+            f"{'pass complete' if totals['done'] else 'stopped, resumable'}: "
+            f"rows={totals['rows']} pairs={totals['pairs']} ok={totals['ok']} in_flight={totals['in_flight']} "
+            + " ".join(f"{k}={totals[k]}" for k in KINDS)
+            + f" repaired={totals['repaired']} secs={totals['seconds']:.2f} rows/s={totals['rows_per_sec']}"
+        )
+
+    def _chunk(self, stats, out):
+        if stats["rows"]:
+            self.stdout.write(
+                f"pk {stats['from_pk']}-{stats['to_pk']} @ block {stats['block']}: rows={stats['rows']} "
+                f"pairs={stats['pairs']} ok={stats['ok']} "
+                + " ".join(f"{k}={stats[k]}" for k in KINDS if stats[k])
+                + f" ({stats['seconds']:.2f}s)"
+            )
+        for f in stats["findings"]:
+            self.stdout.write(
+                f"  {f['kind']:<10} campaign={f['campaign_id']} user={f['user_id']} buyer={f['buyer_id']} "
+                f"expected={f['expected_credits']} onchain={f['onchain_credits']}"
+            )
+            if out:
+                out.write(json.dumps(f) + "\n")
@@ -0,0 +1,49 @@
+import time
+from django.core.management.base import BaseCommand
+from blockchain.reconciler import reconcile_once, RECONCILE_BATCH
+from blockchain.watchdog import bump_stuck_transactions
+
+
+class Command(BaseCommand):
+    help = "Resolve broadcast txs in batches, fee-bump stuck ones and fire their continuation tasks (run as one long-lived process)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=3.0, help="Seconds between ticks when idle")
+        parser.add_argument("--limit", type=int, default=RECONCILE_BATCH, help="Rows claimed per tick")
+        parser.add_argument("--once", action="store_true", help="Run a single tick and exit")
+        parser.add_argument("--no-bump", action="store_true", help="Don't fee-bump stuck transactions")
+
+    def handle(self, *args, **opts):
+        while True:
+            try:
+                stats = reconcile_once(limit=opts["limit"])
+            except Exception as e:
+                self.stderr.write(f"[reconcile] tick failed: {e}")
+                stats = {"checked": 0}
+
+            if stats.get("checked"):
+                waits = stats.get("inclusion_seconds") or []
+                avg   = f"{sum(waits) / len(waits):.1f}s" if waits else "-"
+                self.stdout.write(
+                    f"checked={stats['checked']} confirmed={stats.get('confirmed', 0)} "
+                    f"reverted={stats.get('reverted', 0)} expired={stats.get('expired', 0)} "
+                    f"avg_inclusion={avg}"
+                )
+
+            if not opts["no_bump"]:
+                try:
+                    bumps = bump_stuck_transactions()
+                except Exception as e:
+                    self.stderr.write(f"[watchdog] bump pass failed: {e}")
+                    bumps = {}
+                if bumps.get("bumped") or bumps.get("failed"):
+                    self.stdout.write(
+                        f"bumped={bumps['bumped']} skipped={bumps.get('skipped', 0)} failed={bumps['failed']}"
+                    )
+
+            if opts["once"]:
+                return
+            # a full page that resolved something means there's a backlog → go again straight away;
+            # a full page of still-pending txs just waits for the next blocks
+            if stats.get("checked", 0) < opts["limit"] or not stats.get("resolved"):
+                time.sleep(opts["interval"])
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from blockchain import nonce_manager
+
+
+class Command(BaseCommand):
+    help = "Realign the shared OWNER nonce ledger with the node's pending transaction count."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--forget-sent", action="store_true",
+            help="Also drop broadcast nonces the node doesn't count (mempool wiped / chain reset)",
+        )
+
+    def handle(self, *args, **opts):
+        state = nonce_manager.resync(forget_sent=opts["forget_sent"])
+        self.stdout.write(
+            f"pending={state['pending']} next={state['next']} "
+            f"gaps={state['gaps']} live_leases={state['leases']} unmined_sent={state['sent']}"
+        )
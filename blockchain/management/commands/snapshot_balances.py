@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from blockchain.models import BalanceSnapshot
+from blockchain.utils import batch_user_balances
+
+
+class Command(BaseCommand):
+    help = "Snapshot on-chain TT/credit balances for every user using batched reads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=2000, help="Users read (and written) per pass")
+        parser.add_argument("--dry-run", action="store_true", help="Read balances but don't store snapshots")
+
+    def handle(self, *args, **opts):
+        User = get_user_model()
+        # built-in: iterator() streams rows instead of loading every user at once
+        users = User.objects.exclude(user_id__isnull=True).values_list("pk", "user_id").iterator(chunk_size=opts["chunk"])
+
+        chunk, stored, unregistered = [], 0, 0
+        for row in users:
+            chunk.append(row)
+            if len(chunk) >= opts["chunk"]:
+                s, u = self._flush(chunk, opts["dry_run"])
+                stored, unregistered, chunk = stored + s, unregistered + u, []
+        if chunk:
+            s, u = self._flush(chunk, opts["dry_run"])
+            stored, unregistered = stored + s, unregistered + u
+
+        self.stdout.write(f"snapshots={stored} unregistered={unregistered}")
+
+    def _flush(self, chunk, dry_run):
+        by_onchain_id = {int(uid): pk for pk, uid in chunk if str(uid).isdigit()}
+        balances      = batch_user_balances(by_onchain_id.keys())
+
+        snaps = [
+            BalanceSnapshot(user_id=by_onchain_id[uid], tt_balance=bal[0], credit_balance=bal[1])
+            for uid, bal in balances.items()
+            if bal is not None
+        ]
+        if not dry_run:
+            BalanceSnapshot.objects.bulk_create(snaps)
+        return len(snaps), len(balances) - len(snaps)
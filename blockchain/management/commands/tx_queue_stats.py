@@ -0,0 +1,16 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from blockchain.reconciler import inclusion_stats
+
+
+class Command(BaseCommand):
+    help = "Print OWNER tx time-to-inclusion percentiles, pending count and fee bumps."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=float, default=24.0, help="Look-back window")
+
+    def handle(self, *args, **opts):
+        stats = inclusion_stats(since=timezone.now() - timedelta(hours=opts["hours"]))
+        for key in ("count", "avg", "p50", "p90", "p99", "max", "pending", "bumped"):
+            self.stdout.write(f"{key:>8}: {stats[key] if stats[key] is not None else '-'}")
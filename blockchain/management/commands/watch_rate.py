@@ -1,24 +1,20 @@
 import time
 from django.core.management.base import BaseCommand
-from blockchain.models import ConversionRate
-from blockchain.utils import contract_http, get_ws_contract  # reuse centralized setup
+from blockchain.rate_cache import publish
+from blockchain.utils import w3, contract_http, get_ws_contract  # reuse centralized setup
 
 class Command(BaseCommand):
-    help = "Watch for ConversionRateUpdated events and keep DB in sync."
+    help = "Watch for ConversionRateUpdated events and keep the DB + shared rate cache in sync."
 
     def handle(self, *args, **opts):
         # ── Initial seed from on-chain via shared HTTP contract ─────────
         try:
-            onchain_rate = contract_http.functions.conversionRate().call()
-            obj, _ = ConversionRate.objects.get_or_create(
-                pk=1, defaults={"rate_wei": onchain_rate}
-            )
-            if obj.rate_wei != onchain_rate:
-                obj.rate_wei = onchain_rate
-                obj.save(update_fields=["rate_wei"])
-                self.stdout.write(f"Initial sync: rate updated to {onchain_rate}")
+            block        = w3.eth.block_number
+            onchain_rate = contract_http.functions.conversionRate().call(block_identifier=block)
+            if publish(onchain_rate, block):
+                self.stdout.write(f"Initial sync: rate updated to {onchain_rate} @ block {block}")
             else:
-                self.stdout.write(f"Initial sync: rate already {obj.rate_wei}")
+                self.stdout.write(f"Initial sync: rate already {onchain_rate}")
         except Exception as e:
             self.stderr.write(f"[startup] failed to fetch initial rate: {e}")
 
@@ -52,13 +48,9 @@ class Command(BaseCommand):
                             self.stderr.write(f"Unexpected event shape, skipping: {ev.args}")
                             continue
 
-                        obj, _ = ConversionRate.objects.get_or_create(
-                            pk=1, defaults={"rate_wei": new_rate}
-                        )
-                        if obj.rate_wei != new_rate:
-                            obj.rate_wei = new_rate
-                            obj.save(update_fields=["rate_wei"])
-                            self.stdout.write(f"Updated rate: {old_rate} → {new_rate}")
+                        # versioned by the event's block: a replayed older event can't win
+                        if publish(new_rate, ev.blockNumber):
+                            self.stdout.write(f"Updated rate: {old_rate} → {new_rate} @ block {ev.blockNumber}")
                 except Exception as e:
                     self.stderr.write(f"[watch loop] error: {e}")
                     try:
@@ -72,15 +64,10 @@ class Command(BaseCommand):
             self.stdout.write("Polling on-chain conversionRate every 10s as fallback…")
             while True:
                 try:
-                    polled_rate = contract_http.functions.conversionRate().call()
-                    obj, _ = ConversionRate.objects.get_or_create(
-                        pk=1, defaults={"rate_wei": polled_rate}
-                    )
-                    if obj.rate_wei != polled_rate:
-                        old = obj.rate_wei
-                        obj.rate_wei = polled_rate
-                        obj.save(update_fields=["rate_wei"])
-                        self.stdout.write(f"Polled rate updated: {old} → {polled_rate}")
+                    block       = w3.eth.block_number
+                    polled_rate = contract_http.functions.conversionRate().call(block_identifier=block)
+                    if publish(polled_rate, block):
+                        self.stdout.write(f"Polled rate updated: {polled_rate} @ block {block}")
                 except Exception as poll_e:
                     self.stderr.write(f"[poll loop] error: {poll_e}")
                 time.sleep(10)
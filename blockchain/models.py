@@ -45,6 +45,14 @@ class OnChainBase(models.Model):
         max_length=66, blank=True, null=True,
         help_text="On‑chain tx hash"
     )
+    replaces_tx_hash = models.CharField(
+        max_length=66, blank=True, null=True, db_index=True,
+        help_text="Original hash if this tx was fee-bumped / replaced (tx_hash is the one that got mined)"
+    )
+    log_index        = models.IntegerField(
+        null=True, blank=True,
+        help_text="Position of the source event log in its block (set by the event indexer)"
+    )
 
     # ─── Enhanced metadata ─────────────────────────────────────────────────────
     block_number        = models.BigIntegerField(
@@ -79,6 +87,14 @@ class OnChainBase(models.Model):
         null=True, blank=True,
         help_text="Raw input data (hex)"
     )
+    fn_name             = models.CharField(
+        max_length=64, null=True, blank=True, db_index=True,
+        help_text="Contract function called (decoded from input_data when the row is written)"
+    )
+    fn_args             = models.JSONField(
+        null=True, blank=True,
+        help_text="Decoded call arguments; uint256 / bytes stored as strings"
+    )
 
     timestamp = models.DateTimeField(
         auto_now_add=True,
@@ -88,6 +104,10 @@ class OnChainBase(models.Model):
 
     class Meta:
         abstract = True
+        constraints = [
+            # the event indexer upserts on this; NULL log_index (task-written rows) never collides
+            models.UniqueConstraint(fields=["tx_hash", "log_index"], name="%(app_label)s_%(class)s_tx_log_uniq"),
+        ]
 
 class BalanceSnapshot(models.Model):
     user           = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -210,8 +230,10 @@ class OnChainAction(OnChainBase):
 
 class ConversionRate(models.Model):
     # We store the raw Wei integer; if you want decimals, change field type
-    rate_wei   = models.BigIntegerField()
-    updated_at = models.DateTimeField(auto_now=True)
+    rate_wei     = models.BigIntegerField()
+    # block of the ConversionRateUpdated event (or read) this rate is from → cache version
+    block_number = models.BigIntegerField(null=True, blank=True)
+    updated_at   = models.DateTimeField(auto_now=True)
 
     class Meta:
         # ensure only one row
@@ -312,3 +334,145 @@ class WertSyncCursor(models.Model):
 
     def __str__(self):
         return f"WertSyncCursor({self.name}) @ {self.last_synced_at}"
+
+
+class ContractEventCursor(models.Model):
+    """Resume point of the contract event indexer (blockchain/indexer.py)."""
+    name            = models.CharField(max_length=32, unique=True, default="default")
+    last_block      = models.BigIntegerField(default=0)
+    # hash of last_block when we indexed it → detects a reorg deeper than the confirmation depth
+    last_block_hash = models.CharField(max_length=66, blank=True, default="")
+    updated_at      = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"ContractEventCursor({self.name}) @ {self.last_block}"
+
+
+class EscrowReconcileCursor(models.Model):
+    """
+    Resume point of the escrow reconciliation sweep (blockchain/escrow_reconcile.py).
+      - last_pk:    highest EscrowRecord pk checked in the current pass (0 → pass starts over)
+      - pass_stats: counters of the current pass; last_pass holds the previous finished one
+    """
+    name              = models.CharField(max_length=32, unique=True, default="default")
+    last_pk           = models.BigIntegerField(default=0)
+    pass_started_at   = models.DateTimeField(null=True, blank=True)
+    pass_stats        = models.JSONField(default=dict, blank=True)
+    last_pass         = models.JSONField(default=dict, blank=True)
+    last_finished_at  = models.DateTimeField(null=True, blank=True)
+    updated_at        = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"EscrowReconcileCursor({self.name}) @ pk {self.last_pk}"
+
+
+class WithdrawalDailyUsage(models.Model):
+    """
+    Per-user, per-day withdrawal counter behind the daily limit (see blockchain/withdraw_limits.py).
+      - pending_credits:   reserved by WithdrawView, tx not yet recorded
+      - completed_credits: withdrawals whose Transaction row was saved
+    Rebuilt from Transaction rows by `manage.py rebuild_withdraw_usage`.
+    """
+    user              = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="withdraw_usage")
+    day               = models.DateField()
+    pending_credits   = models.DecimalField(max_digits=30, decimal_places=2, default=0)
+    completed_credits = models.DecimalField(max_digits=30, decimal_places=2, default=0)
+    updated_at        = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "day"], name="uniq_withdraw_usage_user_day")]
+
+    @property
+    def used_credits(self):
+        return self.pending_credits + self.completed_credits
+
+    def __str__(self):
+        return f"WithdrawalDailyUsage({self.user_id} @ {self.day}) used={self.used_credits}"
+
+
+class OwnerNonce(models.Model):
+    """
+    Shared nonce ledger for a signing address (see blockchain/nonce_manager.py).
+      - next_nonce: next never-used nonce to hand out
+      - gaps:       nonces handed out but released unsent (re-used lowest first)
+      - leases:     {nonce: unix_ts} handed out and not yet confirmed as broadcast
+      - sent:       {nonce: unix_ts} broadcast but not yet counted by the node at the last resync
+    """
+    address    = models.CharField(max_length=42, unique=True)
+    next_nonce = models.BigIntegerField(default=0)
+    gaps       = models.JSONField(default=list, blank=True)
+    leases     = models.JSONField(default=dict, blank=True)
+    sent       = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"OwnerNonce({self.address}) next={self.next_nonce} gaps={len(self.gaps or [])}"
+
+
+class PendingTransaction(models.Model):
+    """
+    A broadcast tx we still need to hear back about (see blockchain/reconciler.py).
+    The reconciler resolves receipts in batches and fires the continuation task:
+      on_success / on_failure are celery task names, called as task(tx_hash, *args, **kwargs)
+    """
+    PENDING   = 'pending'
+    CONFIRMED = 'confirmed'
+    REVERTED  = 'reverted'
+    EXPIRED   = 'expired'
+    REPLACED  = 'replaced'
+    STATUS_CHOICES = [
+        (PENDING,   'Pending'),
+        (CONFIRMED, 'Confirmed'),
+        (REVERTED,  'Reverted'),
+        (EXPIRED,   'Expired'),
+        (REPLACED,  'Replaced'),   # superseded by a fee-bumped tx with the same nonce
+    ]
+
+    tx_hash      = models.CharField(max_length=66, unique=True)
+    kind         = models.CharField(max_length=40, blank=True, help_text="e.g. hold, register_campaign, release_batch")
+    status       = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+
+    on_success   = models.CharField(max_length=120, blank=True)
+    on_failure   = models.CharField(max_length=120, blank=True)
+    args         = models.JSONField(default=list, blank=True)
+    kwargs       = models.JSONField(default=dict, blank=True)
+
+    block_number = models.BigIntegerField(null=True, blank=True)
+    gas_used     = models.BigIntegerField(null=True, blank=True)
+    checks       = models.IntegerField(default=0, help_text="How many reconciler ticks looked at it")
+    checked_at   = models.DateTimeField(null=True, blank=True, help_text="Last reconciler tick that looked at it")
+
+    # ─── Watchdog (fee-bump replacement, see blockchain/watchdog.py) ─────────
+    nonce                = models.BigIntegerField(null=True, blank=True)
+    payload              = models.JSONField(null=True, blank=True, help_text="Unsigned tx dict, re-signed on fee bump")
+    max_fee_per_gas      = models.DecimalField(max_digits=78, decimal_places=0, null=True, blank=True)
+    priority_fee_per_gas = models.DecimalField(max_digits=78, decimal_places=0, null=True, blank=True)
+    bumps                = models.IntegerField(default=0)
+    replaced_by          = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='replaces'
+    )
+    replaced_hashes      = models.JSONField(default=list, blank=True, help_text="Earlier hashes with this nonce")
+    cancelled_at         = models.DateTimeField(
+        null=True, blank=True, help_text="Timed out: a 0-value self-send was sent with this nonce"
+    )
+
+    created_at    = models.DateTimeField(auto_now_add=True)      # this hash was broadcast
+    first_seen_at = models.DateTimeField(null=True, blank=True)  # first broadcast of this nonce
+    resolved_at   = models.DateTimeField(null=True, blank=True)  # receipt seen (≈ inclusion)
+
+    @property
+    def inclusion_seconds(self):
+        """Time-to-inclusion: first broadcast of this nonce → receipt observed."""
+        if not (self.resolved_at and self.first_seen_at) or self.status not in (self.CONFIRMED, self.REVERTED):
+            return None
+        return (self.resolved_at - self.first_seen_at).total_seconds()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["status", "checked_at"]),   # reconciler claims least recently checked first
+        ]
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.kind or 'tx'} {self.tx_hash} [{self.status}]"
@@ -0,0 +1,244 @@
+# blockchain/nonce_manager.py
+"""
+Process-safe nonce allocation for the OWNER signer.
+
+Every code path that signs with settings.PRIVATE_KEY must take its nonce from here
+instead of calling w3.eth.get_transaction_count(OWNER) on its own — two workers
+reading the same pending count would otherwise sign two txs with one nonce.
+
+State per address: { "next": int, "gaps": [int, ...], "leases": {nonce: ts}, "sent": {nonce: ts} }
+  - allocate()  → lowest gap first, else next (and next += 1)
+  - reserve(n)  → n contiguous nonces from next (for pipelined batches)
+  - renew()     → keep reserved-but-unsent leases alive while a pipeline works through them
+  - confirm()   → nonce reached the node; lease → sent (kept until the node counts it)
+  - release()   → nonce was never broadcast; becomes a gap to fill
+  - resync()    → realign with the node's pending count (worker start + beat)
+
+Backends (settings.NONCE_BACKEND):
+  - "postgres" (default): one OwnerNonce row, SELECT ... FOR UPDATE
+  - "redis":              JSON blob guarded by a redis lock (settings.REDIS_URL)
+  - "local":              in-process dict + threading.Lock (dev / single worker)
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+from blockchain.utils import w3
+
+logger = logging.getLogger(__name__)
+
+OWNER         = settings.OWNER_ADDRESS
+NONCE_BACKEND = getattr(settings, "NONCE_BACKEND", "postgres")
+# a lease older than this without confirm()/release() is treated as lost (worker died mid-send)
+LEASE_SECONDS = int(getattr(settings, "NONCE_LEASE_SECONDS", 120))
+# a broadcast nonce the node still doesn't count after this long was dropped from the mempool
+SENT_SECONDS  = int(getattr(settings, "NONCE_SENT_SECONDS", 3600))
+
+
+def _pending_count(address: str) -> int:
+    return w3.eth.get_transaction_count(address, "pending")
+
+
+def _empty_state(address: str) -> dict:
+    return {"next": _pending_count(address), "gaps": [], "leases": {}, "sent": {}}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Backends: each yields a mutable state dict and persists it on exit
+# ─────────────────────────────────────────────────────────────────────────────
+
+_local_lock  = threading.Lock()
+_local_state = {}
+
+
+@contextmanager
+def _local_locked(address: str):
+    with _local_lock:
+        if address not in _local_state:
+            _local_state[address] = _empty_state(address)
+        yield _local_state[address]
+
+
+@contextmanager
+def _postgres_locked(address: str):
+    from blockchain.models import OwnerNonce
+
+    with transaction.atomic():
+        # built-in: select_for_update() holds a row lock until the atomic block ends
+        row = OwnerNonce.objects.select_for_update().filter(address=address).first()
+        if row is None:
+            seed = _empty_state(address)
+            OwnerNonce.objects.get_or_create(address=address, defaults={"next_nonce": seed["next"]})
+            row = OwnerNonce.objects.select_for_update().get(address=address)
+
+        state = {
+            "next":   row.next_nonce,
+            "gaps":   list(row.gaps or []),
+            "leases": dict(row.leases or {}),
+            "sent":   dict(row.sent or {}),
+        }
+        yield state
+
+        row.next_nonce = state["next"]
+        row.gaps       = state["gaps"]
+        row.leases     = state["leases"]
+        row.sent       = state["sent"]
+        row.save(update_fields=["next_nonce", "gaps", "leases", "sent", "updated_at"])
+
+
+_redis_client = None
+
+
+def _redis():
+    global _redis_client
+    if _redis_client is None:
+        import redis
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+
+@contextmanager
+def _redis_locked(address: str):
+    r   = _redis()
+    key = f"nonce:{address.lower()}"
+    # built-in: redis-py Lock auto-expires after `timeout` so a crashed holder can't wedge everyone
+    with r.lock(f"{key}:lock", timeout=10, blocking_timeout=15):
+        raw   = r.get(key)
+        state = json.loads(raw) if raw else _empty_state(address)
+        state.setdefault("sent", {})
+        yield state
+        r.set(key, json.dumps(state))
+
+
+_BACKENDS = {
+    "postgres": _postgres_locked,
+    "redis":    _redis_locked,
+    "local":    _local_locked,
+}
+
+
+def _locked(address: str):
+    try:
+        return _BACKENDS[NONCE_BACKEND](address)
+    except KeyError:
+        raise RuntimeError(f"Unknown NONCE_BACKEND {NONCE_BACKEND!r}")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Public API
+# ─────────────────────────────────────────────────────────────────────────────
+
+def allocate(address: str = OWNER) -> int:
+    """Hand out one nonce: fill the lowest released gap first, else take the next one."""
+    with _locked(address) as state:
+        if state["gaps"]:
+            state["gaps"].sort()
+            nonce = state["gaps"].pop(0)
+        else:
+            nonce = state["next"]
+            state["next"] += 1
+        # JSON object keys are always strings → store the nonce as str
+        state["leases"][str(nonce)] = time.time()
+        return nonce
+
+
+def reserve(count: int, address: str = OWNER) -> list:
+    """Hand out `count` contiguous nonces (never from gaps) for back-to-back batch submission."""
+    if count <= 0:
+        return []
+    with _locked(address) as state:
+        start = state["next"]
+        state["next"] += count
+        now = time.time()
+        for n in range(start, start + count):
+            state["leases"][str(n)] = now
+        return list(range(start, start + count))
+
+
+def renew(nonces, address: str = OWNER) -> None:
+    """Refresh the leases of reserved nonces that are still waiting to be broadcast."""
+    now = time.time()
+    with _locked(address) as state:
+        for n in nonces:
+            if str(n) in state["leases"]:
+                state["leases"][str(n)] = now
+
+
+def confirm(nonce: int, address: str = OWNER) -> None:
+    """The tx carrying `nonce` was accepted by the node: no longer leased, but not mined yet."""
+    with _locked(address) as state:
+        state["leases"].pop(str(nonce), None)
+        state["sent"][str(nonce)] = time.time()
+
+
+def release(nonce: int, address: str = OWNER) -> None:
+    """`nonce` was handed out but never broadcast: put it back so the next allocate() fills the gap."""
+    release_many([nonce], address)
+
+
+def release_many(nonces, address: str = OWNER) -> None:
+    nonces = [int(n) for n in nonces]
+    if not nonces:
+        return
+    with _locked(address) as state:
+        for n in nonces:
+            state["leases"].pop(str(n), None)
+            if n < state["next"] and n not in state["gaps"]:
+                state["gaps"].append(n)
+        state["gaps"].sort()
+
+
+def resync(address: str = OWNER, forget_sent: bool = False) -> dict:
+    """
+    Realign with the node's pending nonce:
+      - anything below the pending count is spent → drop it from gaps/leases/sent
+      - nonces in [pending, next) that aren't held by a live lease and weren't
+        broadcast recently never reached the node (crashed worker, dropped tx)
+        → they become gaps
+      - next never moves below the highest live lease or recently sent nonce
+    The pending count is read under the lock: a nonce confirmed after the read
+    would otherwise sit above a stale count with no lease and be handed out again.
+    forget_sent=True drops every sent nonce the node doesn't count (its mempool was
+    wiped, or the chain was reset under a dev simulator).
+    Returns the new state (for logging / management command output).
+    """
+    with _locked(address) as state:
+        pending = _pending_count(address)
+        now     = time.time()
+        live = {
+            int(n): ts for n, ts in state["leases"].items()
+            if int(n) >= pending and now - ts < LEASE_SECONDS
+        }
+        sent = {
+            int(n): ts for n, ts in state["sent"].items()
+            if int(n) >= pending and now - ts < SENT_SECONDS and not forget_sent
+        }
+        held = {**sent, **live}
+        nxt  = max(pending, max(held) + 1) if held else pending
+
+        state["gaps"]   = [n for n in range(pending, nxt) if n not in held]
+        state["leases"] = {str(n): ts for n, ts in live.items()}
+        state["sent"]   = {str(n): ts for n, ts in sent.items()}
+        state["next"]   = nxt
+
+        if state["gaps"]:
+            logger.warning("nonce resync %s: pending=%s next=%s gaps=%s", address, pending, nxt, state["gaps"])
+        return {
+            "pending": pending, "next": nxt, "gaps": list(state["gaps"]),
+            "leases": len(live), "sent": len(sent),
+        }
+
+
+# node error fragments meaning "this nonce is already used on-chain / in the mempool"
+NONCE_SPENT_ERRORS = ("nonce too low", "already known", "replacement transaction underpriced")
+
+
+def is_nonce_spent_error(exc: Exception) -> bool:
+    msg = str(exc).lower()
+    return any(s in msg for s in NONCE_SPENT_ERRORS)
@@ -0,0 +1,138 @@
+# blockchain/providers.py
+"""
+Lazy web3 provider registry.
+
+Nothing here touches the network at import time: the Web3 client for a name is built on
+first use, over a keep-alive requests.Session whose pool holds WEB3_POOL_MAXSIZE
+connections, and the connectivity check runs once in a background thread instead of
+blocking (or failing) model loading, management commands, Daphne or worker boot.
+
+Providers are pluggable via settings.WEB3_PROVIDER:
+  - "http" (default)   HTTPProvider on WEB3_PROVIDER_URL
+  - "eth_tester"       in-memory EthereumTesterProvider (needs eth-tester installed)
+  - "pkg.module.func"  any callable returning a web3 provider (local stand-ins, fakes)
+or at runtime with register_provider(name, factory).
+"""
+
+import logging
+import threading
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+from web3.middleware import ExtraDataToPOAMiddleware
+
+logger = logging.getLogger(__name__)
+
+POOL_CONNECTIONS = int(getattr(settings, "WEB3_POOL_CONNECTIONS", 4))
+POOL_MAXSIZE     = int(getattr(settings, "WEB3_POOL_MAXSIZE", 32))
+REQUEST_TIMEOUT  = float(getattr(settings, "WEB3_REQUEST_TIMEOUT", 15))
+# static chain data answered from the provider's request cache after the first call
+CACHED_REQUESTS  = frozenset(getattr(settings, "WEB3_CACHED_REQUESTS", ("eth_chainId",)))
+
+_lock      = threading.RLock()
+_factories = {}   # name → callable() returning a provider
+_clients   = {}   # name → Web3
+_checked   = set()
+
+
+def _http_session() -> requests.Session:
+    # built-in: HTTPAdapter keeps pooled keep-alive connections per host
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _http_provider():
+    return Web3.HTTPProvider(
+        settings.WEB3_PROVIDER_URL,
+        request_kwargs={"timeout": REQUEST_TIMEOUT},
+        session=_http_session(),
+    )
+
+
+def _eth_tester_provider():
+    return Web3.EthereumTesterProvider()
+
+
+def _default_factory():
+    kind = getattr(settings, "WEB3_PROVIDER", "http") or "http"
+    if kind == "http":
+        return _http_provider
+    if kind == "eth_tester":
+        return _eth_tester_provider
+    return import_string(kind)
+
+
+def register_provider(name: str, factory) -> None:
+    """Use `factory()` to build the provider for `name` (drops an already-built client)."""
+    with _lock:
+        _factories[name] = factory
+        _clients.pop(name, None)
+        _checked.discard(name)
+
+
+def reset() -> None:
+    """Forget every built client (e.g. after fork, or between tests)."""
+    with _lock:
+        _clients.clear()
+        _checked.clear()
+
+
+def _health_check(name: str, client: Web3) -> None:
+    try:
+        if not client.is_connected():
+            logger.error("web3 provider %r is not reachable", name)
+    except Exception:
+        logger.exception("web3 provider %r health check failed", name)
+
+
+def get_w3(name: str = "default") -> Web3:
+    """The Web3 client for `name`, built on first call."""
+    client = _clients.get(name)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            factory  = _factories.get(name) or _default_factory()
+            provider = factory()
+            # built-in: web3's request cache; the validation middleware re-queries eth_chainId
+            #           on every build_transaction / estimate_gas / call otherwise
+            provider.cache_allowed_requests = True
+            provider.cacheable_requests     = set(CACHED_REQUESTS)
+            client   = Web3(provider)
+            # PoA chains: extraData > 32 bytes is OK
+            client.middleware_onion.inject(ExtraDataToPOAMiddleware(), layer=0)
+            _clients[name] = client
+
+        if name not in _checked:
+            _checked.add(name)
+            threading.Thread(target=_health_check, args=(name, client), daemon=True).start()
+    return client
+
+
+class LazyProxy:
+    """
+    Stand-in for a module-level object that is built on first attribute access,
+    so `from blockchain.utils import w3, contract` stays cheap to import.
+    """
+
+    __slots__ = ("_factory",)
+
+    def __init__(self, factory):
+        object.__setattr__(self, "_factory", factory)
+
+    def __getattr__(self, item):
+        return getattr(self._factory(), item)
+
+    def __setattr__(self, key, value):
+        setattr(self._factory(), key, value)
+
+    def __repr__(self):
+        return f"<lazy {self._factory()!r}>"
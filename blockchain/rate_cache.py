@@ -0,0 +1,128 @@
+# blockchain/rate_cache.py
+"""
+Versioned conversion-rate cache.
+
+The on-chain conversionRate changes rarely (ConversionRateUpdated), but it used to be read
+with a live eth_call on every participation / hold / withdraw. Now:
+
+  - `manage.py watch_rate` is the only writer: publish(rate, block) stores the rate in the
+    ConversionRate row and in the shared Django cache (Redis), versioned by the block the
+    update happened in — an older version never overwrites a newer one
+  - get_rate_wei() reads the shared cache (no RPC), falls back to the DB row, and only hits
+    the chain if neither exists; each process also remembers the newest version it has seen
+    so a lagging cache entry can't make it go back to an old rate
+
+Entries expire after RATE_CACHE_TTL_SECONDS, after which the next reader reloads the DB row.
+That bounds staleness where the cache isn't shared: with the LocMem fallback (no REDIS_URL)
+watch_rate's publish() only reaches its own process, and web processes would otherwise keep
+their first value forever.
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from blockchain.models import ConversionRate
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "conversion_rate"
+CACHE_TTL = int(getattr(settings, "RATE_CACHE_TTL_SECONDS", 60))
+
+_lock  = threading.Lock()
+_local = {"rate": None, "block": -1}
+
+
+def _get_shared():
+    try:
+        return cache.get(CACHE_KEY)
+    except Exception:
+        logger.warning("rate cache unavailable; reading ConversionRate from the DB", exc_info=True)
+        return None
+
+
+def _set_shared(entry: dict, only_if_missing: bool = False) -> None:
+    try:
+        if only_if_missing:
+            # built-in: cache.add() is a no-op when the key exists → readers never clobber the watcher
+            cache.add(CACHE_KEY, entry, CACHE_TTL)
+        else:
+            cache.set(CACHE_KEY, entry, CACHE_TTL)
+    except Exception:
+        logger.warning("rate cache unavailable; skipping publish", exc_info=True)
+
+
+def _remember(entry: dict) -> int:
+    """Keep the newest version seen by this process; returns the rate to use."""
+    with _lock:
+        if entry["block"] >= _local["block"]:
+            _local.update(entry)
+        return _local["rate"]
+
+
+def _load_db():
+    row = ConversionRate.objects.filter(pk=1).values("rate_wei", "block_number").first()
+    if row is None:
+        return None
+    return {"rate": int(row["rate_wei"]), "block": int(row["block_number"] or 0)}
+
+
+def _load_chain() -> dict:
+    from blockchain.utils import w3, contract
+
+    block = w3.eth.block_number
+    rate  = contract.functions.conversionRate().call(block_identifier=block)
+    publish(rate, block)
+    return {"rate": int(rate), "block": int(block)}
+
+
+def get_rate_wei() -> int:
+    """Current conversionRate (credits per TT, uint256) — no RPC in the steady state."""
+    entry = _get_shared()
+    if entry is None:
+        entry = _load_db() or _load_chain()
+        _set_shared(entry, only_if_missing=True)
+    return _remember(entry)
+
+
+async def aget_rate_wei() -> int:
+    """get_rate_wei() for async views: async cache read; DB / chain fallback in a thread."""
+    from asgiref.sync import sync_to_async
+
+    try:
+        entry = await cache.aget(CACHE_KEY)
+    except Exception:
+        entry = None
+    if entry is None:
+        return await sync_to_async(get_rate_wei)()
+    return _remember(entry)
+
+
+def publish(rate_wei: int, block: int) -> bool:
+    """
+    Record the rate as of `block` (DB row + shared cache). Returns True if it changed.
+    Versions older than the stored one are ignored.
+    """
+    rate_wei, block = int(rate_wei), int(block)
+
+    obj, created = ConversionRate.objects.get_or_create(
+        pk=1, defaults={"rate_wei": rate_wei, "block_number": block}
+    )
+    changed = created
+    if not created:
+        if obj.block_number is not None and block < obj.block_number:
+            return False
+        changed = obj.rate_wei != rate_wei
+        if changed:
+            obj.rate_wei     = rate_wei
+            obj.block_number = block
+            obj.save(update_fields=["rate_wei", "block_number", "updated_at"])
+
+    entry = {"rate": rate_wei, "block": block}
+    current = _get_shared()
+    if current is None or current["block"] <= block:
+        _set_shared(entry)
+    _remember(entry)
+    return changed
@@ -0,0 +1,344 @@
+# blockchain/reconciler.py
+"""
+Receipt reconciler: tasks broadcast a tx, call register_pending(...) and return
+immediately instead of parking a worker in wait_for_transaction_receipt().
+
+One long-running process (`manage.py reconcile_pending_txs`) calls reconcile_once()
+in a loop: it resolves every outstanding hash with batched eth_getTransactionReceipt
+calls and fires each row's continuation task once the tx is mined.
+
+Continuations are called as  task(tx_hash, *args, **kwargs)  — same convention as our
+chains (tx_hash first) — and re-fetch the full receipt themselves if they need logs.
+
+Every OWNER broadcast is tracked here (tx_utils.sign_and_send → track_broadcast) so the
+watchdog can fee-bump stuck ones. A bumped tx keeps its nonce; whichever hash of the
+family gets mined wins, and DB rows are remapped to it (see remap_tx_hash / current_hash).
+"""
+
+import logging
+from datetime import timedelta
+
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from blockchain.models import PendingTransaction
+
+logger = logging.getLogger(__name__)
+
+# rows claimed per tick (one batched RPC round-trip per RPC_BATCH_SIZE of these)
+RECONCILE_BATCH = int(getattr(settings, "RECONCILE_BATCH", 500))
+# after this long without a receipt the tx is considered lost: once its nonce is used by
+# something else (cancelled with a 0-value self-send if needed), on_failure fires
+PENDING_TX_TIMEOUT = int(getattr(settings, "PENDING_TX_TIMEOUT_SECONDS", 30 * 60))
+
+
+def _prefixed(tx_hash: str) -> str:
+    # rows and raw JSON-RPC params always carry "0x…" (the ledger tables store it that way too)
+    from blockchain.tasks import _ensure_prefixed
+    return _ensure_prefixed(tx_hash)
+
+
+def _task_name(task) -> str:
+    # accept either a celery task object or its dotted name
+    return getattr(task, "name", task) or ""
+
+
+def track_broadcast(tx_hash: str, tx: dict) -> PendingTransaction:
+    """Record a freshly broadcast OWNER tx (nonce, fees, unsigned payload) for the watchdog."""
+    row, created = PendingTransaction.objects.get_or_create(
+        tx_hash=_prefixed(tx_hash),
+        defaults={
+            "nonce":                tx.get("nonce"),
+            "payload":              tx,
+            "max_fee_per_gas":      tx.get("maxFeePerGas", tx.get("gasPrice")),
+            "priority_fee_per_gas": tx.get("maxPriorityFeePerGas"),
+            "first_seen_at":        timezone.now(),
+        },
+    )
+    return row
+
+
+def register_pending(tx_hash: str, on_success=None, on_failure=None, args=(), kwargs=None, kind: str = "") -> PendingTransaction:
+    """
+    Record what to run once the tx resolves. The row usually exists already
+    (track_broadcast); safe to call twice for the same hash.
+
+    The continuation is written only while the row is still pending (following fee-bump
+    replacements to the head of the family); if a reconciler tick resolved it first, the
+    continuation is recorded and fired right away instead of being left on a finished row.
+    """
+    continuation = {
+        "kind":       kind,
+        "on_success": _task_name(on_success),
+        "on_failure": _task_name(on_failure),
+        "args":       list(args),
+        "kwargs":     kwargs or {},
+    }
+    row, created = PendingTransaction.objects.get_or_create(
+        tx_hash=_prefixed(tx_hash),
+        defaults={"first_seen_at": timezone.now(), **continuation},
+    )
+    if created:
+        return row
+
+    seen = set()
+    while True:
+        # status only ever leaves PENDING, so a miss here means the row is resolved for good
+        if PendingTransaction.objects.filter(pk=row.pk, status=PendingTransaction.PENDING).update(**continuation):
+            row.refresh_from_db()
+            return row
+        row = PendingTransaction.objects.get(pk=row.pk)
+        if row.status != PendingTransaction.REPLACED or not row.replaced_by_id or row.replaced_by_id in seen:
+            break
+        seen.add(row.replaced_by_id)
+        row = PendingTransaction.objects.get(pk=row.replaced_by_id)
+
+    for field, value in continuation.items():
+        setattr(row, field, value)
+    row.save(update_fields=list(continuation))
+    if row.status == PendingTransaction.CONFIRMED:
+        transaction.on_commit(lambda: _fire(row.on_success, row.tx_hash, row))
+    elif row.status in (PendingTransaction.REVERTED, PendingTransaction.EXPIRED):
+        transaction.on_commit(lambda: _fire(row.on_failure, row.tx_hash, row))
+    else:
+        logger.error("tx %s resolved as %s before its continuation was registered", row.tx_hash, row.status)
+    return row
+
+
+def _hash_forms(tx_hash: str) -> list:
+    # ledger rows store "0x…"; rows written before broadcast() prefixed its result may be bare
+    prefixed = _prefixed(tx_hash)
+    return [prefixed, prefixed[2:]]
+
+
+def current_hash(tx_hash: str) -> str:
+    """Follow fee-bump replacements to the hash that is (or will be) mined for this nonce."""
+    seen = set()
+    row  = PendingTransaction.objects.filter(tx_hash__in=_hash_forms(tx_hash)).only("tx_hash", "replaced_by").first()
+    while row is not None and row.replaced_by_id and row.replaced_by_id not in seen:
+        seen.add(row.replaced_by_id)
+        row = PendingTransaction.objects.filter(pk=row.replaced_by_id).only("tx_hash", "replaced_by").first()
+    return row.tx_hash if row is not None else tx_hash
+
+
+def remap_tx_hash(old_hash: str, new_hash: str) -> None:
+    """Point rows that already carry `old_hash` at `new_hash`, keeping the original in replaces_tx_hash."""
+    from blockchain.models import Transaction, InfluencerTransaction, OnChainAction
+    from campaign.models import EscrowRecord
+
+    old_forms = _hash_forms(old_hash)
+    old_hash  = old_forms[0]
+    new_hash  = _prefixed(new_hash)
+    for model in (Transaction, InfluencerTransaction, OnChainAction):
+        model.objects.filter(tx_hash__in=old_forms, replaces_tx_hash__isnull=True).update(
+            tx_hash=new_hash, replaces_tx_hash=old_hash
+        )
+        model.objects.filter(tx_hash__in=old_forms).update(tx_hash=new_hash)
+        # an earlier hash of the family won after all → it's no longer a replacement
+        model.objects.filter(tx_hash=new_hash, replaces_tx_hash__in=[new_hash, new_hash[2:]]).update(replaces_tx_hash=None)
+    EscrowRecord.objects.filter(tx_hash__in=old_forms).update(tx_hash=new_hash)
+
+
+def _nonce_consumed(row: PendingTransaction, mined_count: int) -> bool:
+    """
+    A timed-out row may only fail once its nonce can no longer carry it. If no other tx
+    has used the nonce yet, send a 0-value self-send with it (once) and keep waiting:
+    either the cancel or the original gets mined, and the next ticks see which.
+    Called outside any transaction: cancelled_at is claimed with a conditional UPDATE first,
+    so the watchdog stops bumping the row and a second reconciler doesn't cancel it again.
+    """
+    from blockchain.watchdog import cancel
+
+    if row.nonce is None or mined_count > row.nonce:
+        return True
+    if row.cancelled_at is None:
+        claimed_at = timezone.now()
+        claim = PendingTransaction.objects.filter(pk=row.pk, status=PendingTransaction.PENDING, cancelled_at__isnull=True)
+        if not claim.update(cancelled_at=claimed_at):
+            return False
+        try:
+            cancel_hash = cancel(row)
+        except Exception:
+            PendingTransaction.objects.filter(pk=row.pk).update(cancelled_at=None)
+            logger.exception("cancelling expired tx %s (nonce %s) failed; retrying next tick", row.tx_hash, row.nonce)
+        else:
+            row.cancelled_at = claimed_at
+            logger.warning("tx %s (nonce %s) expired; cancel sent as %s", row.tx_hash, row.nonce, cancel_hash)
+    return False
+
+
+def _fire(task_name: str, tx_hash: str, row: PendingTransaction) -> None:
+    if not task_name:
+        return
+    if current_app.conf.task_always_eager:
+        # eager mode (dev / simulator benchmarks): send_task would still go to the broker
+        current_app.tasks[task_name].apply(args=[tx_hash, *row.args], kwargs=row.kwargs)
+        return
+    # built-in: send_task() enqueues by name, so the reconciler doesn't import every task module
+    current_app.send_task(task_name, args=[tx_hash, *row.args], kwargs=row.kwargs)
+
+
+def _claim(limit: int, now) -> list:
+    """Least recently checked pending rows first; stamping checked_at moves them to the back."""
+    with transaction.atomic():
+        # built-in: skip_locked → a second reconciler claims other rows instead of waiting
+        rows = list(
+            PendingTransaction.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=PendingTransaction.PENDING)
+            .order_by(F("checked_at").asc(nulls_first=True), "created_at")[:limit]
+        )
+        PendingTransaction.objects.filter(pk__in=[r.pk for r in rows]).update(checks=F("checks") + 1, checked_at=now)
+    for r in rows:
+        r.checks    += 1
+        r.checked_at = now
+    return rows
+
+
+def reconcile_once(limit: int = RECONCILE_BATCH) -> dict:
+    """
+    One tick: claim up to `limit` pending rows (short transaction), look up all their receipts
+    (and those of the hashes they replaced) in batched RPC calls with no locks held, then
+    persist the outcome of rows that are still pending and enqueue continuations after commit.
+    Returns counters for logging; "resolved" is 0 when nothing moved.
+    """
+    from blockchain.utils import batch_get_receipts, w3
+
+    stats = {"checked": 0, "resolved": 0, "confirmed": 0, "reverted": 0, "expired": 0, "inclusion_seconds": []}
+    now   = timezone.now()
+    mined_count = None   # OWNER's mined nonce count, read once per tick if some row timed out
+
+    rows = _claim(limit, now)
+    stats["checked"] = len(rows)
+    if not rows:
+        return stats
+
+    hashes = []
+    for r in rows:
+        hashes.append(r.tx_hash)
+        hashes.extend(r.replaced_hashes or [])
+    receipts = batch_get_receipts(hashes)
+
+    resolved = []   # (row, winning hash, receipt or None when expired)
+    for row in rows:
+        # newest hash first, then the ones it replaced
+        family = [row.tx_hash] + list(reversed(row.replaced_hashes or []))
+        mined  = next((h for h in family if receipts.get(h)), None)
+
+        if mined is None:
+            if now - row.created_at > timedelta(seconds=PENDING_TX_TIMEOUT):
+                if row.nonce is not None and mined_count is None:
+                    mined_count = w3.eth.get_transaction_count(settings.OWNER_ADDRESS, "latest")
+                if _nonce_consumed(row, mined_count):
+                    row.status      = PendingTransaction.EXPIRED
+                    row.resolved_at = now
+                    resolved.append((row, row.tx_hash, None))
+            continue
+
+        rcpt = receipts[mined]
+        ok   = rcpt["status"] == 1
+        if mined != row.tx_hash:
+            # an earlier, cheaper tx with the same nonce won the race
+            row.status = PendingTransaction.REPLACED
+        else:
+            row.block_number = rcpt["block_number"]
+            row.gas_used     = rcpt["gas_used"]
+            row.status       = PendingTransaction.CONFIRMED if ok else PendingTransaction.REVERTED
+        row.resolved_at = now
+        resolved.append((row, mined, rcpt))
+
+    if not resolved:
+        return stats
+
+    with transaction.atomic():
+        # lock the rows and keep those nobody resolved meanwhile (watchdog bump, another reconciler);
+        # continuations are re-read here since register_pending may have set them after the claim
+        still_pending = {
+            c["pk"]: c
+            for c in PendingTransaction.objects
+            .select_for_update()
+            .filter(pk__in=[r.pk for r, *_ in resolved], status=PendingTransaction.PENDING)
+            .values("pk", "on_success", "on_failure", "args", "kwargs")
+        }
+        resolved = [entry for entry in resolved if entry[0].pk in still_pending]
+        for row, *_ in resolved:
+            for field, value in still_pending[row.pk].items():
+                setattr(row, field, value)
+        PendingTransaction.objects.bulk_update(
+            [row for row, *_ in resolved], ["status", "block_number", "gas_used", "resolved_at"]
+        )
+
+        to_fire = []   # (task_name, winning hash, row carrying the continuation)
+        for row, mined, rcpt in resolved:
+            ok = rcpt is not None and rcpt["status"] == 1
+            to_fire.append((row.on_success if ok else row.on_failure, mined, row))
+            stats["resolved"] += 1
+            if rcpt is None:
+                stats["expired"] += 1
+                continue
+            stats["confirmed" if ok else "reverted"] += 1
+            if row.first_seen_at:
+                stats["inclusion_seconds"].append((now - row.first_seen_at).total_seconds())
+            if mined == row.tx_hash:
+                continue
+
+            # an earlier hash won: mark it mined, make it the head of its family, remap to it
+            PendingTransaction.objects.filter(tx_hash=mined).update(
+                status=PendingTransaction.CONFIRMED if ok else PendingTransaction.REVERTED,
+                block_number=rcpt["block_number"],
+                gas_used=rcpt["gas_used"],
+                resolved_at=now,
+                replaced_by=None,
+            )
+            winner_id = PendingTransaction.objects.filter(tx_hash=mined).values_list("id", flat=True).first()
+            PendingTransaction.objects.filter(pk=row.pk).update(replaced_by_id=winner_id)
+            remap_tx_hash(row.tx_hash, mined)
+
+        def _after_commit():
+            for task_name, tx_hash, row in to_fire:
+                try:
+                    _fire(task_name, tx_hash, row)
+                except Exception:
+                    logger.exception("continuation %s for %s failed to enqueue", task_name, tx_hash)
+
+        transaction.on_commit(_after_commit)
+
+    return stats
+
+
+def inclusion_stats(since=None) -> dict:
+    """
+    Time-to-inclusion over mined txs (first broadcast of the nonce → receipt observed).
+    Returns {"count", "avg", "p50", "p90", "p99", "max", "pending", "bumped"} in seconds.
+    """
+    since = since or timezone.now() - timedelta(hours=24)
+    mined = (
+        PendingTransaction.objects
+        .filter(
+            status__in=[PendingTransaction.CONFIRMED, PendingTransaction.REVERTED],
+            resolved_at__gte=since,
+            first_seen_at__isnull=False,
+        )
+        .values_list("first_seen_at", "resolved_at")
+    )
+    # built-in: sorted() → percentiles by index
+    samples = sorted((resolved - first).total_seconds() for first, resolved in mined)
+
+    def _pct(p):
+        if not samples:
+            return None
+        return round(samples[min(len(samples) - 1, int(p * len(samples)))], 1)
+
+    return {
+        "count":   len(samples),
+        "avg":     round(sum(samples) / len(samples), 1) if samples else None,
+        "p50":     _pct(0.50),
+        "p90":     _pct(0.90),
+        "p99":     _pct(0.99),
+        "max":     round(samples[-1], 1) if samples else None,
+        "pending": PendingTransaction.objects.filter(status=PendingTransaction.PENDING).count(),
+        "bumped":  PendingTransaction.objects.filter(status=PendingTransaction.REPLACED, resolved_at__gte=since).count(),
+    }
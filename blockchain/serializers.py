@@ -26,7 +26,7 @@ class TransactionSerializer(BaseOnChainSerializer):
             "id", "tx_hash", "tx_type", "tt_amount", "credits_delta",
             "status", "block_number", "transaction_index",
             "gas_used", "effective_gas_price",
-            "from_address", "to_address", "value", "input_data",
+            "from_address", "to_address", "value", "input_data", "fn_name", "fn_args",
             "timestamp", "campaign", "wallet_address", "wallet_mismatch",
         ]
         
@@ -46,7 +46,7 @@ class InfluencerTransactionSerializer(BaseOnChainSerializer):
             "id", "tx_hash", "tx_type", "tt_amount", "credits_delta",
             "status", "block_number", "transaction_index",
             "gas_used", "effective_gas_price",
-            "from_address", "to_address", "value", "input_data",
+            "from_address", "to_address", "value", "input_data", "fn_name", "fn_args",
             "timestamp", "campaign","viewer_role", 
         ]
         
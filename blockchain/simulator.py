@@ -0,0 +1,969 @@
+# blockchain/simulator.py
+"""
+In-process simulated chain + contract, for load testing without an RPC node.
+
+Select it with  WEB3_PROVIDER = "blockchain.simulator.provider"  (see blockchain/providers.py):
+every sync web3 call then answers from a SimulatedChain held in this process —
+eth_call / eth_estimateGas run the contract functions below, eth_sendRawTransaction
+enforces nonces and fee-bump replacement like a node, receipts and eth_getLogs carry
+ABI-encoded events, and batched JSON-RPC is one round-trip like over HTTP.
+
+Settings:
+  SIMULATOR_BLOCK_TIME       seconds per block; 0 → every accepted tx is mined at once (default 0)
+  SIMULATOR_LATENCY_MS       delay per RPC round-trip; a batch POST pays it once          (default 0)
+  SIMULATOR_JITTER_MS        extra uniform random delay per round-trip                   (default 0)
+  SIMULATOR_CHAIN_ID         (default 1337)
+  SIMULATOR_CONVERSION_RATE  initial conversionRate (default 10)
+  SIMULATOR_HOLDER_GAS       gas per settled hold in release/refund batches (default 3000;
+                             raise it to push batches past GAS_LIMIT and exercise adaptive sizing)
+
+Scope: the contract functions / events this codebase uses (anything else reverts with
+"simulator: <fn> not implemented"). State is process-local and reads always see "latest"
+— historical block identifiers are accepted but not replayed. The AsyncWeb3 client in
+blockchain/async_utils.py still talks HTTP.
+"""
+
+import copy
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from eth_abi import decode as abi_decode, encode as abi_encode
+from eth_account import Account
+from eth_account._utils.legacy_transactions import Transaction as LegacyTransaction
+from eth_account.typed_transactions import TypedTransaction
+from eth_utils import (
+    event_abi_to_log_topic,
+    function_abi_to_4byte_selector,
+    keccak,
+    to_checksum_address,
+)
+from eth_utils.abi import collapse_if_tuple
+from hexbytes import HexBytes
+from web3.providers.base import JSONBaseProvider
+from web3._utils.caching import handle_request_caching
+
+BLOCK_TIME   = float(getattr(settings, "SIMULATOR_BLOCK_TIME", 0))
+LATENCY_MS   = float(getattr(settings, "SIMULATOR_LATENCY_MS", 0))
+JITTER_MS    = float(getattr(settings, "SIMULATOR_JITTER_MS", 0))
+CHAIN_ID     = int(getattr(settings, "SIMULATOR_CHAIN_ID", 1337))
+INITIAL_RATE = int(getattr(settings, "SIMULATOR_CONVERSION_RATE", 10))
+HOLDER_GAS   = int(getattr(settings, "SIMULATOR_HOLDER_GAS", 3_000))
+
+BASE_FEE_WEI     = 1_000_000_000      # 1 gwei, constant
+PRIORITY_FEE_WEI = 1_000_000_000
+BLOCK_GAS_LIMIT  = 30_000_000
+FEE_DENOMINATOR  = 10_000
+ZERO_ADDRESS     = "0x" + "00" * 20
+REVERT_SELECTOR  = bytes.fromhex("08c379a0")     # Error(string)
+AGGREGATE3       = keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+
+# rough gas model: flat cost per call, batch release/refund add HOLDER_GAS per settled hold
+GAS_COST = {
+    "registerUser":       90_000,
+    "registerCampaign":   95_000,
+    "deposit":            70_000,
+    "setUserWallet":      50_000,
+    "holdForCampaign":   140_000,
+    "depositPending":     70_000,
+    "claimPending":       80_000,
+    "withdraw":           90_000,
+}
+DEFAULT_GAS    = 60_000
+BATCH_BASE_GAS = 40_000
+BATCH_FUNCTIONS = {"releaseHoldsBatch", "refundHoldsBatch", "releaseAllHoldsForCampaign", "refundAllHoldsForCampaign"}
+
+
+class Revert(Exception):
+    """A failed require() in the simulated contract; the message is the revert reason."""
+
+
+class RPCError(Exception):
+    def __init__(self, code: int, message: str, data: str = None):
+        super().__init__(message)
+        self.code    = code
+        self.message = message
+        self.data    = data
+
+
+class _Ctx:
+    """msg.sender + the events a call emitted, in order."""
+
+    __slots__ = ("sender", "events")
+
+    def __init__(self, sender: str):
+        self.sender = (sender or ZERO_ADDRESS).lower()
+        self.events = []
+
+    def emit(self, name: str, *values):
+        self.events.append((name, values))
+
+
+def _require(cond, reason: str):
+    if not cond:
+        raise Revert(reason)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Contract: storage + one method per ABI function (same name, same argument order)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class SimulatedContract:
+
+    def __init__(self, owner: str, rate: int = INITIAL_RATE):
+        self._owner        = owner.lower()
+        self._rate         = rate
+        self._users        = {}                  # userId → [ttWei, creditWei]
+        self._user_ids     = []
+        self._wallets      = {}                  # userId → address
+        self._campaigns    = {}                  # campaignId → sellerId
+        self._campaign_ids = []
+        self._buyers       = defaultdict(list)   # campaignId → [buyerId, ...] (first hold order)
+        self._holds        = {}                  # (campaignId, buyerId) → [ttWei, creditWei]
+        self._held_tt      = defaultdict(int)
+        self._held_cr      = defaultdict(int)
+        self._pending      = {}                  # ref → [ttWei, rate]
+        self._minted       = 0
+        self._reward_bp    = 0
+        self._part_bp      = 0
+        self._max_holders  = 0                   # 0 → unlimited
+        self._paused       = False
+
+    # ── guards ───────────────────────────────────────────────────────────────
+    def _only_owner(self, ctx):
+        _require(ctx.sender == self._owner, "AccessControl: caller is not an operator")
+
+    def _not_paused(self):
+        _require(not self._paused, "Pausable: paused")
+
+    def _registered(self, user_id):
+        _require(user_id in self._users, "User not registered")
+
+    def holders_in(self, campaign_id, start=0, end=None) -> int:
+        """Non-empty holds in buyers[start..end] — drives the batch gas model."""
+        buyers = self._buyers.get(campaign_id, [])
+        end    = len(buyers) - 1 if end is None else min(end, len(buyers) - 1)
+        return sum(1 for b in buyers[start:end + 1] if any(self._holds.get((campaign_id, b), (0, 0))))
+
+    # ── writes ───────────────────────────────────────────────────────────────
+    def registerUser(self, ctx, userId):
+        self._only_owner(ctx)
+        _require(userId not in self._users, "User already registered")
+        self._users[userId] = [0, 0]
+        self._user_ids.append(userId)
+        ctx.emit("UserRegistered", userId)
+
+    def deposit(self, ctx, userId, amountWei):
+        self._only_owner(ctx)
+        self._not_paused()
+        self._registered(userId)
+        _require(amountWei > 0, "Zero amount")
+        credits = amountWei * self._rate
+        self._users[userId][0] += amountWei
+        self._users[userId][1] += credits
+        self._minted += credits
+        ctx.emit("Deposited", userId, amountWei, credits)
+
+    def setUserWallet(self, ctx, userId, wallet):
+        self._only_owner(ctx)
+        self._registered(userId)
+        self._wallets[userId] = wallet
+        ctx.emit("UserWalletUpdated", userId, wallet)
+
+    def registerCampaign(self, ctx, campaignId, sellerId):
+        self._only_owner(ctx)
+        _require(campaignId not in self._campaigns, "Campaign already registered")
+        self._registered(sellerId)
+        self._campaigns[campaignId] = sellerId
+        self._campaign_ids.append(campaignId)
+        ctx.emit("CampaignRegistered", campaignId, sellerId)
+
+    def holdForCampaign(self, ctx, campaignId, buyerId, spentTTWei, spentCreditWei):
+        self._only_owner(ctx)
+        self._not_paused()
+        _require(campaignId in self._campaigns, "Campaign not registered")
+        self._registered(buyerId)
+        bal = self._users[buyerId]
+        _require(bal[0] >= spentTTWei and bal[1] >= spentCreditWei, "Insufficient balance")
+
+        key = (campaignId, buyerId)
+        if key not in self._holds:
+            _require(
+                not self._max_holders or len(self._buyers[campaignId]) < self._max_holders,
+                "Max holders reached",
+            )
+            self._buyers[campaignId].append(buyerId)
+            self._holds[key] = [0, 0]
+
+        bal[0] -= spentTTWei
+        bal[1] -= spentCreditWei
+        self._holds[key][0] += spentTTWei
+        self._holds[key][1] += spentCreditWei
+        self._held_tt[campaignId] += spentTTWei
+        self._held_cr[campaignId] += spentCreditWei
+        ctx.emit("CreditsSpent", buyerId, spentTTWei, spentCreditWei)
+        ctx.emit("HoldCreated", campaignId, buyerId, spentTTWei, spentCreditWei)
+
+    def _settle(self, ctx, campaignId, buyers, release: bool) -> tuple:
+        seller = self._campaigns[campaignId]
+        count = total_tt = total_cr = 0
+        for buyer in buyers:
+            hold = self._holds.get((campaignId, buyer))
+            if not hold or not any(hold):
+                continue
+            tt, cr = hold
+            hold[0] = hold[1] = 0
+            self._held_tt[campaignId] -= tt
+            self._held_cr[campaignId] -= cr
+
+            if release:
+                tt -= tt * self._reward_bp // FEE_DENOMINATOR
+                cr -= cr * self._reward_bp // FEE_DENOMINATOR
+                self._users[seller][0] += tt
+                self._users[seller][1] += cr
+                ctx.emit("HoldReleased", campaignId, buyer, seller, tt, cr)
+            else:
+                self._users[buyer][0] += tt
+                self._users[buyer][1] += cr
+                ctx.emit("HoldRefunded", campaignId, buyer, tt, cr)
+            count    += 1
+            total_tt += tt
+            total_cr += cr
+        return count, total_tt, total_cr
+
+    def _batch_range(self, campaignId, startIndex, endIndex) -> list:
+        buyers = self._buyers.get(campaignId, [])
+        _require(startIndex <= endIndex < len(buyers), "Invalid range")
+        return buyers[startIndex:endIndex + 1]
+
+    def releaseHoldsBatch(self, ctx, campaignId, sellerId, startIndex, endIndex):
+        self._only_owner(ctx)
+        _require(self._campaigns.get(campaignId) == sellerId, "Not campaign owner")
+        self._settle(ctx, campaignId, self._batch_range(campaignId, startIndex, endIndex), release=True)
+
+    def refundHoldsBatch(self, ctx, campaignId, startIndex, endIndex):
+        self._only_owner(ctx)
+        _require(campaignId in self._campaigns, "Campaign not registered")
+        self._settle(ctx, campaignId, self._batch_range(campaignId, startIndex, endIndex), release=False)
+
+    def releaseAllHoldsForCampaign(self, ctx, campaignId, sellerId):
+        self._only_owner(ctx)
+        _require(self._campaigns.get(campaignId) == sellerId, "Not campaign owner")
+        totals = self._settle(ctx, campaignId, list(self._buyers.get(campaignId, [])), release=True)
+        ctx.emit("BulkHoldsReleased", campaignId, sellerId, *totals)
+
+    def refundAllHoldsForCampaign(self, ctx, campaignId, sellerId):
+        self._only_owner(ctx)
+        _require(self._campaigns.get(campaignId) == sellerId, "Not campaign owner")
+        totals = self._settle(ctx, campaignId, list(self._buyers.get(campaignId, [])), release=False)
+        ctx.emit("BulkHoldsRefunded", campaignId, sellerId, *totals)
+
+    def depositPending(self, ctx, ref, amountWei):
+        self._only_owner(ctx)
+        _require(ref not in self._pending, "Pending exists")
+        _require(amountWei > 0, "Zero amount")
+        self._pending[ref] = [amountWei, self._rate]
+        ctx.emit("DepositPending", ref, amountWei, self._rate)
+
+    def claimPending(self, ctx, ref, userId):
+        self._only_owner(ctx)
+        self._not_paused()
+        _require(ref in self._pending, "No pending deposit")
+        self._registered(userId)
+        tt, rate = self._pending.pop(ref)
+        credits  = tt * rate
+        self._users[userId][0] += tt
+        self._users[userId][1] += credits
+        self._minted += credits
+        ctx.emit("PendingClaimed", ref, userId, tt, credits)
+
+    def withdraw(self, ctx, userId, amountWei):
+        self._only_owner(ctx)
+        self._not_paused()
+        self._registered(userId)
+        wallet = self._wallets.get(userId)
+        _require(wallet and wallet.lower() != ZERO_ADDRESS, "No wallet set")
+        credits = amountWei * self._rate
+        bal     = self._users[userId]
+        _require(bal[0] >= amountWei and bal[1] >= credits, "Insufficient balance")
+        bal[0] -= amountWei
+        bal[1] -= credits
+        ctx.emit("Withdrawn", userId, wallet, amountWei)
+
+    def setConversionRate(self, ctx, newRate):
+        self._only_owner(ctx)
+        _require(newRate > 0, "Zero rate")
+        old, self._rate = self._rate, newRate
+        ctx.emit("ConversionRateUpdated", old, newRate)
+
+    def setRewardFeeBP(self, ctx, newBP):
+        self._only_owner(ctx)
+        _require(newBP <= FEE_DENOMINATOR, "Fee too high")
+        old, self._reward_bp = self._reward_bp, newBP
+        ctx.emit("RewardFeeUpdated", old, newBP)
+
+    def setParticipationFeeBP(self, ctx, newBP):
+        self._only_owner(ctx)
+        _require(newBP <= FEE_DENOMINATOR, "Fee too high")
+        old, self._part_bp = self._part_bp, newBP
+        ctx.emit("ParticipationFeeUpdated", old, newBP)
+
+    def setMaxHolders(self, ctx, newLimit):
+        self._only_owner(ctx)
+        old, self._max_holders = self._max_holders, newLimit
+        ctx.emit("MaxHoldersUpdated", old, newLimit)
+
+    def pause(self, ctx):
+        self._only_owner(ctx)
+        self._paused = True
+        ctx.emit("Paused", ctx.sender)
+
+    def unpause(self, ctx):
+        self._only_owner(ctx)
+        self._paused = False
+        ctx.emit("Unpaused", ctx.sender)
+
+    # ── views ────────────────────────────────────────────────────────────────
+    def conversionRate(self, ctx):
+        return self._rate
+
+    def getUserBalances(self, ctx, userId):
+        self._registered(userId)
+        return tuple(self._users[userId])
+
+    def getUserWallet(self, ctx, userId):
+        return self._wallets.get(userId, ZERO_ADDRESS)
+
+    def getHold(self, ctx, campaignId, buyerId):
+        return tuple(self._holds.get((campaignId, buyerId), (0, 0)))
+
+    holds = getHold
+
+    def getCampaignBuyers(self, ctx, campaignId):
+        return list(self._buyers.get(campaignId, []))
+
+    def getCampaignOwner(self, ctx, campaignId):
+        _require(campaignId in self._campaigns, "Campaign not registered")
+        return self._campaigns[campaignId]
+
+    def getAllUsers(self, ctx):
+        return list(self._user_ids)
+
+    def getAllCampaigns(self, ctx):
+        return list(self._campaign_ids)
+
+    def allUsers(self, ctx, index):
+        return self._user_ids[index]
+
+    def allCampaigns(self, ctx, index):
+        return self._campaign_ids[index]
+
+    def totalUsers(self, ctx):
+        return len(self._user_ids)
+
+    def totalCampaigns(self, ctx):
+        return len(self._campaign_ids)
+
+    def totalHeldTTWei(self, ctx, campaignId):
+        return self._held_tt[campaignId]
+
+    def totalHeldCreditWei(self, ctx, campaignId):
+        return self._held_cr[campaignId]
+
+    def getTotalHeldInCampaigns(self, ctx, campaignIds):
+        return sum(self._held_tt[c] for c in campaignIds)
+
+    def pending(self, ctx, ref):
+        return tuple(self._pending.get(ref, (0, 0)))
+
+    def getTotalCreditsMinted(self, ctx):
+        return self._minted
+
+    totalCreditsMintedWei = getTotalCreditsMinted
+
+    def rewardFeeBP(self, ctx):
+        return self._reward_bp
+
+    def participationFeeBP(self, ctx):
+        return self._part_bp
+
+    def maxHolders(self, ctx):
+        return self._max_holders
+
+    def paused(self, ctx):
+        return self._paused
+
+    def owner(self, ctx):
+        return to_checksum_address(self._owner)
+
+    def FEE_DENOMINATOR(self, ctx):
+        return FEE_DENOMINATOR
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Chain: blocks, mempool, receipts, logs and the JSON-RPC surface
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _hex(n: int) -> str:
+    return hex(int(n))
+
+
+def _int(value) -> int:
+    if isinstance(value, str):
+        return int(value, 16) if value.startswith("0x") else int(value)
+    return int(value)
+
+
+def _hexbytes(b: bytes) -> str:
+    return "0x" + bytes(b).hex()
+
+
+def _tx_hash(value) -> str:
+    # internal callers pass bytes; JSON-RPC params must be "0x…" — a real node rejects
+    # bare hex (HexBytes.hex()) the same way, so the benchmark catches unprefixed hashes
+    if isinstance(value, (bytes, bytearray)):
+        return _hexbytes(value)
+    if not isinstance(value, str) or not value.startswith("0x"):
+        raise RPCError(-32602, "invalid argument 0: json: cannot unmarshal hex string without 0x prefix into Go value of type common.Hash")
+    return value.lower()
+
+
+def _to_bytes(value) -> bytes:
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    value = value or "0x"
+    return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+
+
+class SimulatedChain:
+
+    def __init__(self, block_time: float = BLOCK_TIME, rate: int = INITIAL_RATE):
+        from blockchain.utils import get_abi
+
+        self.lock             = threading.RLock()
+        self.block_time       = block_time
+        self.contract_address = settings.CONTRACT_ADDRESS.lower()
+        self.multicall        = (getattr(settings, "MULTICALL3_ADDRESS", "") or "").lower()
+        self.contract         = SimulatedContract(settings.OWNER_ADDRESS, rate)
+
+        abi                 = get_abi()
+        functions           = [e for e in abi if e.get("type") == "function"]
+        self.by_selector    = {function_abi_to_4byte_selector(f): f for f in functions}
+        self.events         = {e["name"]: e for e in abi if e.get("type") == "event"}
+
+        self.genesis   = time.time()
+        self.head      = 0
+        self.blocks    = {}                    # number → block (only blocks with txs are stored)
+        self.by_hash   = {}                    # block hash → number
+        self.txs       = {}                    # hash → tx (RPC shape)
+        self.receipts  = {}                    # hash → receipt (RPC shape)
+        self.mempool   = {}                    # (sender, nonce) → pending tx record
+        self.nonces    = defaultdict(int)      # sender → next nonce to be mined
+
+        self.calls       = Counter()           # RPC method → calls
+        self.round_trips = 0
+
+    # ── stats ────────────────────────────────────────────────────────────────
+    def reset_stats(self):
+        with self.lock:
+            self.calls.clear()
+            self.round_trips = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"calls": sum(self.calls.values()), "round_trips": self.round_trips, "by_method": dict(self.calls)}
+
+    # ── seeding (benchmarks / fixtures; bypasses transactions) ────────────────
+    def seed_user(self, user_id: int, tt_wei: int = 0, credit_wei: int = 0):
+        with self.lock:
+            c = self.contract
+            if user_id not in c._users:
+                c._users[user_id] = [0, 0]
+                c._user_ids.append(user_id)
+            c._users[user_id][0] += tt_wei
+            c._users[user_id][1] += credit_wei
+
+    def seed_campaign(self, campaign_id: int, seller_id: int):
+        with self.lock:
+            self.seed_user(seller_id)
+            if campaign_id not in self.contract._campaigns:
+                self.contract._campaigns[campaign_id] = seller_id
+                self.contract._campaign_ids.append(campaign_id)
+
+    def seed_hold(self, campaign_id: int, buyer_id: int, tt_wei: int, credit_wei: int):
+        with self.lock:
+            self.seed_user(buyer_id)
+            self.contract.holdForCampaign(_Ctx(self.contract._owner), campaign_id, buyer_id, 0, 0)
+            hold = self.contract._holds[(campaign_id, buyer_id)]
+            hold[0] += tt_wei
+            hold[1] += credit_wei
+            self.contract._held_tt[campaign_id] += tt_wei
+            self.contract._held_cr[campaign_id] += credit_wei
+
+    def seed_pending(self, ref: bytes, tt_wei: int):
+        with self.lock:
+            self.contract._pending[_to_bytes(ref)] = [tt_wei, self.contract._rate]
+
+    # ── blocks ───────────────────────────────────────────────────────────────
+    def _block_hash(self, number: int) -> bytes:
+        return keccak(b"meetyourfan-simulator" + number.to_bytes(32, "big"))
+
+    def _block(self, number: int) -> dict:
+        block = self.blocks.get(number)
+        if block is not None:
+            return block
+        # empty blocks are synthesized on demand
+        return self._new_block(number, [], 0)
+
+    def _new_block(self, number: int, tx_hashes: list, gas_used: int) -> dict:
+        timestamp = int(self.genesis + number * (self.block_time or 1))
+        return {
+            "number":        _hex(number),
+            "hash":          _hexbytes(self._block_hash(number)),
+            "parentHash":    _hexbytes(self._block_hash(number - 1)) if number else "0x" + "00" * 32,
+            "timestamp":     _hex(timestamp),
+            "baseFeePerGas": _hex(BASE_FEE_WEI),
+            "gasLimit":      _hex(BLOCK_GAS_LIMIT),
+            "gasUsed":       _hex(gas_used),
+            "miner":         ZERO_ADDRESS,
+            "extraData":     "0x",
+            "difficulty":    "0x0",
+            "totalDifficulty": "0x0",
+            "nonce":         "0x" + "00" * 8,
+            "sha3Uncles":    "0x" + "00" * 32,
+            "logsBloom":     "0x" + "00" * 256,
+            "transactionsRoot": "0x" + "00" * 32,
+            "stateRoot":     "0x" + "00" * 32,
+            "receiptsRoot":  "0x" + "00" * 32,
+            "mixHash":       "0x" + "00" * 32,
+            "size":          "0x0",
+            "uncles":        [],
+            "transactions":  list(tx_hashes),
+        }
+
+    def _advance(self):
+        """Mine every block that is due by wall clock (block_time > 0)."""
+        if self.block_time <= 0:
+            return
+        due = int((time.time() - self.genesis) / self.block_time)
+        if due <= self.head:
+            return
+        if self.mempool:
+            self._mine(self.head + 1)
+        # the blocks in between are empty → just move the head
+        self.head = max(self.head, due)
+
+    def _mine(self, number: int):
+        """Include executable mempool txs (per-sender nonce order, fee priority) in block `number`."""
+        ready = []
+        for (sender, nonce), rec in self.mempool.items():
+            if nonce == self.nonces[sender]:
+                ready.append(rec)
+        included, gas_total, log_count = [], 0, 0
+        while ready:
+            ready.sort(key=lambda r: -r["fee"])
+            rec = ready.pop(0)
+            if gas_total + rec["gas"] > BLOCK_GAS_LIMIT:
+                continue
+            gas, logs  = self._execute(rec, number, len(included), log_count)
+            gas_total += gas
+            log_count += logs
+            included.append(rec["hash"])
+            del self.mempool[(rec["from"], rec["nonce"])]
+            self.nonces[rec["from"]] = rec["nonce"] + 1
+            nxt = self.mempool.get((rec["from"], rec["nonce"] + 1))
+            if nxt is not None:
+                ready.append(nxt)
+
+        block = self._new_block(number, included, gas_total)
+        self.blocks[number]           = block
+        self.by_hash[block["hash"]]   = number
+        self.head                     = max(self.head, number)
+        for h in included:
+            self.txs[h].update({"blockNumber": block["number"], "blockHash": block["hash"]})
+            self.receipts[h].update({"blockHash": block["hash"]})
+
+    # ── execution ────────────────────────────────────────────────────────────
+    def _decode_call(self, data: bytes):
+        fn = self.by_selector.get(data[:4])
+        if fn is None:
+            raise Revert("simulator: unknown function selector")
+        types = [collapse_if_tuple(i) for i in fn["inputs"]]
+        return fn, list(abi_decode(types, data[4:]))
+
+    def _run(self, contract: SimulatedContract, fn: dict, args: list, sender: str) -> tuple:
+        impl = getattr(contract, fn["name"], None)
+        if impl is None or fn["name"].startswith("_"):
+            raise Revert(f"simulator: {fn['name']} not implemented")
+        ctx    = _Ctx(sender)
+        result = impl(ctx, *args)
+        return ctx, result
+
+    def _gas(self, fn: dict, args: list) -> int:
+        name = fn["name"]
+        if name in BATCH_FUNCTIONS:
+            c = self.contract
+            if name in ("releaseHoldsBatch",):
+                holders = c.holders_in(args[0], args[2], args[3])
+            elif name == "refundHoldsBatch":
+                holders = c.holders_in(args[0], args[1], args[2])
+            else:
+                holders = c.holders_in(args[0])
+            return BATCH_BASE_GAS + HOLDER_GAS * holders
+        return GAS_COST.get(name, DEFAULT_GAS)
+
+    def _encode_output(self, fn: dict, result) -> bytes:
+        outputs = [collapse_if_tuple(o) for o in fn.get("outputs", [])]
+        if not outputs:
+            return b""
+        values = list(result) if len(outputs) > 1 else [result]
+        return abi_encode(outputs, values)
+
+    def _encode_log(self, name: str, values: tuple) -> tuple:
+        event  = self.events[name]
+        topics = [event_abi_to_log_topic(event)]
+        data_types, data_values = [], []
+        for inp, value in zip(event["inputs"], values):
+            typ = collapse_if_tuple(inp)
+            if inp.get("indexed"):
+                enc = abi_encode([typ], [value])
+                topics.append(keccak(enc) if typ in ("string", "bytes") or typ.endswith("]") else enc)
+            else:
+                data_types.append(typ)
+                data_values.append(value)
+        return topics, abi_encode(data_types, data_values)
+
+    def _execute(self, rec: dict, number: int, index: int, log_offset: int) -> tuple:
+        """Apply one tx at (block, index); writes its receipt, returns (gas used, log count)."""
+        logs, status, gas_used = [], 1, 21_000
+        to = (rec["to"] or "").lower()
+
+        if to == self.contract_address:
+            try:
+                fn, args = self._decode_call(rec["input"])
+                gas_used = self._gas(fn, args)
+                if gas_used > rec["gas"]:
+                    raise Revert("out of gas")
+                ctx, _ = self._run(self.contract, fn, args, rec["from"])
+                for i, (name, values) in enumerate(ctx.events):
+                    topics, data = self._encode_log(name, values)
+                    logs.append({
+                        "address":          to_checksum_address(self.contract_address),
+                        "topics":           [_hexbytes(t) for t in topics],
+                        "data":             _hexbytes(data),
+                        "blockNumber":      _hex(number),
+                        "transactionHash":  rec["hash"],
+                        "transactionIndex": _hex(index),
+                        "blockHash":        _hexbytes(self._block_hash(number)),
+                        "logIndex":         _hex(log_offset + i),
+                        "removed":          False,
+                    })
+            except Revert:
+                status   = 0
+                gas_used = min(rec["gas"], max(gas_used, 21_000))
+                logs     = []
+
+        self.receipts[rec["hash"]] = {
+            "transactionHash":   rec["hash"],
+            "transactionIndex":  _hex(index),
+            "blockNumber":       _hex(number),
+            "blockHash":         _hexbytes(self._block_hash(number)),
+            "from":              to_checksum_address(rec["from"]),
+            "to":                rec["to"],
+            "cumulativeGasUsed": _hex(gas_used),
+            "gasUsed":           _hex(gas_used),
+            "effectiveGasPrice": _hex(rec["price"]),
+            "contractAddress":   None,
+            "logs":              logs,
+            "logsBloom":         "0x" + "00" * 256,
+            "status":            _hex(status),
+            "type":              _hex(rec["type"]),
+        }
+        self.txs[rec["hash"]]["transactionIndex"] = _hex(index)
+        return gas_used, len(logs)
+
+    # ── JSON-RPC ─────────────────────────────────────────────────────────────
+    def handle(self, method: str, params) -> object:
+        with self.lock:
+            self.calls[method] += 1
+            self._advance()
+            handler = getattr(self, "rpc_" + method, None)
+            if handler is None:
+                raise RPCError(-32601, f"the method {method} does not exist/is not available")
+            return handler(*(params or []))
+
+    def _block_number(self, tag) -> int:
+        if tag in (None, "latest", "pending", "safe", "finalized"):
+            return self.head
+        if tag == "earliest":
+            return 0
+        return _int(tag)
+
+    def rpc_web3_clientVersion(self):
+        return "meetyourfan-simulator/1.0"
+
+    def rpc_net_version(self):
+        return str(CHAIN_ID)
+
+    def rpc_eth_chainId(self):
+        return _hex(CHAIN_ID)
+
+    def rpc_eth_syncing(self):
+        return False
+
+    def rpc_eth_blockNumber(self):
+        return _hex(self.head)
+
+    def rpc_eth_gasPrice(self):
+        return _hex(BASE_FEE_WEI + PRIORITY_FEE_WEI)
+
+    def rpc_eth_maxPriorityFeePerGas(self):
+        return _hex(PRIORITY_FEE_WEI)
+
+    def rpc_eth_getBlockByNumber(self, tag, full=False):
+        number = self._block_number(tag)
+        if number > self.head:
+            return None
+        return self._block(number)
+
+    def rpc_eth_getBlockByHash(self, block_hash, full=False):
+        number = self.by_hash.get(block_hash)
+        return None if number is None else self._block(number)
+
+    def rpc_eth_getTransactionCount(self, address, tag="latest"):
+        sender = address.lower()
+        nonce  = self.nonces[sender]
+        if tag == "pending":
+            while (sender, nonce) in self.mempool:
+                nonce += 1
+        return _hex(nonce)
+
+    def rpc_eth_getTransactionByHash(self, tx_hash):
+        return self.txs.get(_tx_hash(tx_hash))
+
+    def rpc_eth_getTransactionReceipt(self, tx_hash):
+        tx_hash = _tx_hash(tx_hash)
+        if tx_hash not in self.receipts or not self.txs.get(tx_hash, {}).get("blockHash"):
+            return None
+        return self.receipts[tx_hash]
+
+    def _call(self, tx: dict, state: SimulatedContract) -> bytes:
+        to     = (tx.get("to") or "").lower()
+        data   = _to_bytes(tx.get("data") or tx.get("input"))
+        sender = tx.get("from") or ZERO_ADDRESS
+
+        if self.multicall and to == self.multicall and data[:4] == AGGREGATE3:
+            (calls,) = abi_decode(["(address,bool,bytes)[]"], data[4:])
+            results  = []
+            for target, allow_failure, call_data in calls:
+                try:
+                    results.append((True, self._call({"to": target, "data": call_data, "from": sender}, state)))
+                except Revert as e:
+                    if not allow_failure:
+                        raise
+                    results.append((False, REVERT_SELECTOR + abi_encode(["string"], [str(e)])))
+            return abi_encode(["(bool,bytes)[]"], [results])
+
+        if to != self.contract_address:
+            return b""
+        fn, args = self._decode_call(data)
+        if fn.get("stateMutability") not in ("view", "pure"):
+            state = copy.deepcopy(state)    # eth_call of a write: dry-run, state unchanged
+        _, result = self._run(state, fn, args, sender)
+        return self._encode_output(fn, result)
+
+    def _revert_error(self, e: Revert) -> RPCError:
+        data = REVERT_SELECTOR + abi_encode(["string"], [str(e)])
+        return RPCError(3, f"execution reverted: {e}", _hexbytes(data))
+
+    def rpc_eth_call(self, tx, block="latest"):
+        try:
+            return _hexbytes(self._call(tx, self.contract))
+        except Revert as e:
+            raise self._revert_error(e)
+
+    def rpc_eth_estimateGas(self, tx, block=None):
+        if (tx.get("to") or "").lower() != self.contract_address:
+            return _hex(21_000)
+        try:
+            fn, args = self._decode_call(_to_bytes(tx.get("data") or tx.get("input")))
+            self._run(copy.deepcopy(self.contract), fn, args, tx.get("from"))
+        except Revert as e:
+            raise self._revert_error(e)
+        return _hex(self._gas(fn, args))
+
+    def rpc_eth_getLogs(self, flt):
+        start   = self._block_number(flt.get("fromBlock", "latest"))
+        end     = self._block_number(flt.get("toBlock", "latest"))
+        address = flt.get("address")
+        if isinstance(address, str):
+            address = [address]
+        addresses = {a.lower() for a in address} if address else None
+        topic0    = (flt.get("topics") or [None])[0]
+        if isinstance(topic0, str):
+            topic0 = [topic0]
+        topic0 = {t.lower() for t in topic0} if topic0 else None
+
+        out = []
+        for number in sorted(n for n in self.blocks if start <= n <= end):
+            for h in self.blocks[number]["transactions"]:
+                for log in self.receipts[h]["logs"]:
+                    if addresses and log["address"].lower() not in addresses:
+                        continue
+                    if topic0 and log["topics"][0] not in topic0:
+                        continue
+                    out.append(log)
+        return out
+
+    def rpc_eth_sendRawTransaction(self, raw_hex):
+        raw     = _to_bytes(raw_hex)
+        tx_hash = _hexbytes(keccak(raw))
+        if tx_hash in self.txs:
+            raise RPCError(-32000, "already known")
+
+        sender = Account.recover_transaction(raw).lower()
+        if raw[0] <= 0x7f:
+            fields  = TypedTransaction.from_bytes(HexBytes(raw)).as_dict()
+            tx_type = fields.get("type", 2)
+        else:
+            fields  = LegacyTransaction.from_bytes(raw).as_dict()
+            tx_type = 0
+
+        nonce = int(fields["nonce"])
+        if nonce < self.nonces[sender]:
+            raise RPCError(-32000, "nonce too low")
+
+        max_fee = int(fields.get("maxFeePerGas") or fields.get("gasPrice") or 0)
+        tip     = int(fields.get("maxPriorityFeePerGas") or max(0, max_fee - BASE_FEE_WEI))
+        price   = min(max_fee, BASE_FEE_WEI + tip)
+        _require_rpc(max_fee >= BASE_FEE_WEI, "max fee per gas less than block base fee")
+
+        existing = self.mempool.get((sender, nonce))
+        if existing is not None:
+            # same rule as geth: a replacement must raise the fee by at least 10%
+            if max_fee * 10 < existing["max_fee"] * 11:
+                raise RPCError(-32000, "replacement transaction underpriced")
+            self.txs.pop(existing["hash"], None)
+
+        to = fields.get("to")
+        to = to_checksum_address(to) if to else None
+        rec = {
+            "hash":    tx_hash,
+            "from":    sender,
+            "to":      to,
+            "nonce":   nonce,
+            "gas":     int(fields["gas"]),
+            "input":   _to_bytes(fields.get("data")),
+            "fee":     tip,
+            "max_fee": max_fee,
+            "price":   price,
+            "type":    tx_type,
+        }
+        self.mempool[(sender, nonce)] = rec
+        self.txs[tx_hash] = {
+            "hash":             tx_hash,
+            "from":             to_checksum_address(sender),
+            "to":               to,
+            "nonce":            _hex(nonce),
+            "gas":              _hex(rec["gas"]),
+            "value":            _hex(fields.get("value", 0)),
+            "input":            _hexbytes(rec["input"]),
+            "type":             _hex(tx_type),
+            "chainId":          _hex(CHAIN_ID),
+            "gasPrice":         _hex(price),
+            "blockNumber":      None,
+            "blockHash":        None,
+            "transactionIndex": None,
+            **({"maxFeePerGas": _hex(max_fee), "maxPriorityFeePerGas": _hex(tip)} if tx_type == 2 else {}),
+        }
+        if self.block_time <= 0:
+            self._mine(self.head + 1)
+        return tx_hash
+
+
+def _require_rpc(cond, message: str):
+    if not cond:
+        raise RPCError(-32000, message)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# web3 provider
+# ─────────────────────────────────────────────────────────────────────────────
+
+class SimulatedProvider(JSONBaseProvider):
+    """Answers web3's JSON-RPC from a SimulatedChain, with injected per-round-trip latency."""
+
+    def __init__(self, chain: SimulatedChain = None, latency_ms: float = LATENCY_MS, jitter_ms: float = JITTER_MS):
+        super().__init__()
+        self._chain     = chain
+        self.latency_ms = latency_ms
+        self.jitter_ms  = jitter_ms
+        self._ids       = iter(range(1, 1 << 62))
+        self._id_lock   = threading.Lock()
+
+    @property
+    def chain(self) -> SimulatedChain:
+        # no explicit chain → follow get_chain(), so reset_chain() applies to live clients
+        return self._chain or get_chain()
+
+    def _next_id(self) -> int:
+        with self._id_lock:
+            return next(self._ids)
+
+    def _wait(self):
+        delay = (self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000.0
+        if delay > 0:
+            time.sleep(delay)
+
+    def _respond(self, method, params) -> dict:
+        response = {"jsonrpc": "2.0", "id": self._next_id()}
+        try:
+            response["result"] = self.chain.handle(method, params)
+        except RPCError as e:
+            response["error"] = {"code": e.code, "message": e.message, **({"data": e.data} if e.data else {})}
+        return response
+
+    @handle_request_caching   # like HTTPProvider, so providers.CACHED_REQUESTS applies here too
+    def make_request(self, method, params):
+        self._wait()
+        with self.chain.lock:
+            self.chain.round_trips += 1
+        return self._respond(method, params)
+
+    def make_batch_request(self, requests):
+        self._wait()
+        with self.chain.lock:
+            self.chain.round_trips += 1
+        return [self._respond(method, params) for method, params in requests]
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+_chain      = None
+_chain_lock = threading.Lock()
+
+
+def get_chain() -> SimulatedChain:
+    """The process-wide simulated chain (created on first use)."""
+    global _chain
+    if _chain is None:
+        with _chain_lock:
+            if _chain is None:
+                _chain = SimulatedChain()
+    return _chain
+
+
+def reset_chain(**kwargs) -> SimulatedChain:
+    """Start over from an empty chain (kwargs → SimulatedChain, e.g. block_time=2)."""
+    global _chain
+    with _chain_lock:
+        _chain = SimulatedChain(**kwargs)
+    return _chain
+
+
+def provider() -> SimulatedProvider:
+    """WEB3_PROVIDER = "blockchain.simulator.provider" → factory used by blockchain/providers.py."""
+    return SimulatedProvider()
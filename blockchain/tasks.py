@@ -1,14 +1,15 @@
 # blockchain/tasks.py
 
 from celery import shared_task
+from celery.signals import worker_process_init, worker_ready
 from django.conf import settings
-from blockchain.utils import w3, contract, fetch_tx_details
+from blockchain.utils import w3, contract, fetch_tx_details, batch_holds, get_current_rate_wei, reset_clients
 from web3.exceptions import ContractLogicError, TimeExhausted
 from rest_framework.response import Response
 from decimal import Decimal, ROUND_DOWN
 from web3 import Web3
 import logging
-from .models import Transaction, InfluencerTransaction, OnChainAction, GuestOrder, WertOrder
+from .models import Transaction, InfluencerTransaction, OnChainAction, GuestOrder, WertOrder, PendingTransaction
 from typing import Optional
 from web3.exceptions import TransactionNotFound
 from django.contrib.auth import get_user_model
@@ -17,7 +18,10 @@ from django.core.mail import send_mail
 from django.template.loader import render_to_string
 import time
 from django.utils import timezone
+from django.core.cache import cache
 from blockchain.tx_utils import build_and_send as _build_and_send
+from blockchain import nonce_manager, fee_oracle, balance_cache, withdraw_limits
+from blockchain.reconciler import register_pending
 from blockchain.crypto_utils import b64u as _b64u, sign as _sign
 from uuid import UUID
 from django.db import transaction
@@ -37,6 +41,15 @@ def _already_recorded_tx(tx_hash: str) -> bool:
 
 
 
+def _ledger_row_exists(model, tx_hash: str, user_id: int, tx_type: str) -> bool:
+    """
+    The event indexer may have written this row already (blockchain/indexer.py);
+    it upserts on (tx_hash, log_index), so the task side checks (tx_hash, user, type).
+    """
+    return model.objects.filter(tx_hash=tx_hash, user_id=user_id, tx_type=tx_type).exists()
+
+
+
 def _from_wei(value_wei: int, token_decimals: int = 18, places: int = 2) -> Decimal:
     """
     Convert an integer 'wei-like' amount to Decimal with fixed scale.
@@ -55,8 +68,7 @@ logger = logging.getLogger(__name__)
 
 OWNER          = settings.OWNER_ADDRESS
 PK             = settings.PRIVATE_KEY
-GAS_LIMIT      = 200_000
-GAS_PRICE_GWEI = "50"
+GAS_LIMIT      = 200_000   # release/refund batches; everything else uses fee_oracle estimates
 BATCH_SIZE = 50
 
 
@@ -114,6 +126,19 @@ def _ensure_prefixed(tx_hash: str) -> str:
     return tx_hash
 
 
+def _follow_replacement(tx_hash: str):
+    """
+    (hash to read, original hash or None): a fee-bumped tx is mined under its
+    replacement's hash, so fetch details for that one and remember where we started.
+    """
+    from blockchain.reconciler import current_hash
+
+    mined = current_hash(tx_hash)
+    if _ensure_prefixed(mined) == _ensure_prefixed(tx_hash):
+        return tx_hash, None
+    return mined, _ensure_prefixed(tx_hash)
+
+
 @shared_task(bind=True, max_retries=5, default_retry_delay=30)
 def save_transaction_info(
     self,
@@ -128,13 +153,17 @@ def save_transaction_info(
     tt_amount_wei: str = None,
     credits_delta_wei: str = None,
     wallet_address: str = None,
+    usage_day: str = None,
     **kwargs,                            # built-in: collect any future args
 ):
     """
     Fetch on‑chain details for a user transaction and save Transaction model.
+    For a WITHDRAW, usage_day (YYYY-MM-DD) is the WithdrawalDailyUsage day its credits
+    were reserved on; they move from pending to completed once the row is saved.
     """
     try:
         # May raise TransactionNotFound if not yet mined → triggers retry
+        tx_hash, replaces = _follow_replacement(tx_hash)
         details = fetch_tx_details(tx_hash)
     except TransactionNotFound as exc:
         # Celery’s self.retry will re‑enqueue this task after default_retry_delay
@@ -142,6 +171,9 @@ def save_transaction_info(
     
     # normalize incoming hash so downstream logic always gets 0x-prefixed
     tx_hash = _ensure_prefixed(tx_hash)
+    if details.get("receipt_status") == 0:
+        # a reverted tx moved nothing → no ledger row (link_error handlers see the failure)
+        raise ContractLogicError(f"{tx_type} tx {tx_hash} reverted")
     safe_details = _sanitize_details_for_model(details, Transaction)
     
     # Parse strings into Decimal and clamp to 2dp
@@ -156,22 +188,34 @@ def save_transaction_info(
     tt_wei_dec = Decimal(str(tt_amount_wei)) if tt_amount_wei is not None else None
     cr_wei_dec = Decimal(str(credits_delta_wei)) if credits_delta_wei is not None else None
 
-    # Django ORM .objects.create(): INSERT a new row with the given fields
-    Transaction.objects.create(
-        user_id=user_id,
-        campaign_id=campaign_id,
-        status=Transaction.COMPLETED,  # mark completed once details fetched
-        tx_hash=tx_hash,
-        **safe_details,                     # unpack block_number, gas_used, etc.
-        tx_type=tx_type,
-        tt_amount=tt_amount_dec,
-        credits_delta=credits_delta_dec,
-        email_verified=email_verified,
-        phone_verified=phone_verified,
-        tt_amount_wei=tt_wei_dec,
-        credits_delta_wei=cr_wei_dec,
-        wallet_address=wallet_address,      # NEW: which wallet paid this tx
-    )
+    if _ledger_row_exists(Transaction, tx_hash, user_id, tx_type):
+        if usage_day and tx_type == Transaction.WITHDRAW:
+            withdraw_limits.complete(user_id, usage_day, abs(credits_delta_dec))
+        balance_cache.invalidate(user_id)
+        return
+
+    with transaction.atomic():
+        # Django ORM .objects.create(): INSERT a new row with the given fields
+        Transaction.objects.create(
+            user_id=user_id,
+            campaign_id=campaign_id,
+            status=Transaction.COMPLETED,  # mark completed once details fetched
+            tx_hash=tx_hash,
+            **safe_details,                     # unpack block_number, gas_used, etc.
+            tx_type=tx_type,
+            tt_amount=tt_amount_dec,
+            credits_delta=credits_delta_dec,
+            email_verified=email_verified,
+            phone_verified=phone_verified,
+            tt_amount_wei=tt_wei_dec,
+            credits_delta_wei=cr_wei_dec,
+            wallet_address=wallet_address,      # NEW: which wallet paid this tx
+            replaces_tx_hash=replaces,
+        )
+        if usage_day and tx_type == Transaction.WITHDRAW:
+            withdraw_limits.complete(user_id, usage_day, abs(credits_delta_dec))
+    # the user's on-chain balance just moved → next MyBalancesView read goes to the chain
+    balance_cache.invalidate(user_id)
 
 @shared_task(bind=True, max_retries=5, default_retry_delay=30)
 def save_influencer_transaction_info(
@@ -199,6 +243,7 @@ def save_influencer_transaction_info(
         raise ValueError("tx_type/transaction_type is required")
     
     try:
+        tx_hash, replaces = _follow_replacement(tx_hash)
         details = fetch_tx_details(tx_hash)
     except TransactionNotFound as exc:
         raise self.retry(exc=exc)
@@ -219,7 +264,11 @@ def save_influencer_transaction_info(
     # Optional raw exact amounts (as Decimals with 0 scale)
     tt_wei_dec = Decimal(str(tt_amount_wei)) if tt_amount_wei is not None else None
     cr_wei_dec = Decimal(str(credits_delta_wei)) if credits_delta_wei is not None else None
-    
+
+    if _ledger_row_exists(InfluencerTransaction, tx_hash, user_id, transaction_type):
+        balance_cache.invalidate(user_id, influencer_id)
+        return
+
     InfluencerTransaction.objects.create(
         user_id=user_id,
         campaign_id=campaign_id,
@@ -232,7 +281,9 @@ def save_influencer_transaction_info(
         credits_delta=credits_delta_dec,
         tt_amount_wei=tt_wei_dec,
         credits_delta_wei=cr_wei_dec,
+        replaces_tx_hash=replaces,
     )
+    balance_cache.invalidate(user_id, influencer_id)
 
 @shared_task(bind=True, max_retries=5, default_retry_delay=30)
 def save_onchain_action_info(
@@ -248,6 +299,7 @@ def save_onchain_action_info(
     and save OnChainAction.
     """
     try:
+        tx_hash, replaces = _follow_replacement(tx_hash)
         details = fetch_tx_details(tx_hash)
     except TransactionNotFound as exc:
         raise self.retry(exc=exc)
@@ -255,6 +307,8 @@ def save_onchain_action_info(
     # normalize incoming hash so downstream logic always gets 0x-prefixed
     tx_hash = _ensure_prefixed(tx_hash)
     safe_details = _sanitize_details_for_model(details, OnChainAction)
+    if _ledger_row_exists(OnChainAction, tx_hash, user_id, event_type):
+        return
     OnChainAction.objects.create(
         user_id=user_id,
         campaign_id=campaign_id,
@@ -262,6 +316,7 @@ def save_onchain_action_info(
         tx_hash=tx_hash,
         **safe_details,
         tx_type=event_type,
+        replaces_tx_hash=replaces,
         args=args or {},
     )
     
@@ -269,92 +324,276 @@ def save_onchain_action_info(
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
 def register_user_on_chain(self, user_id):
     try:
-        
-        chain_id = w3.eth.chain_id
-        nonce    = w3.eth.get_transaction_count(OWNER)
-        tx_params= {
-            "chainId":  chain_id,
-            "from":     OWNER,
-            "nonce":    nonce,
-            "gas":      GAS_LIMIT,
-            "gasPrice": w3.to_wei(GAS_PRICE_GWEI, "gwei"),
-        }
-        return _build_and_send(contract.functions.registerUser(user_id), tx_params)
+        fn = contract.functions.registerUser(user_id)
+        return _build_and_send(fn, fee_oracle.tx_params(fn))
     except Exception as exc:
         raise self.retry(exc=exc)
 
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=30)
-def release_all_holds_for_campaign_task(self, campaign_id, seller_id):
-    campaign_id = int(campaign_id)
-    seller_id   = int(seller_id)
+MAX_BATCH_ATTEMPTS = 3
 
-    try:
-        # 1) Fetch buyers on‑chain (eth_call, no gas)
-        buyers = contract.functions.getCampaignBuyers(campaign_id).call({'from': OWNER})
-        original_buyers = list(buyers)
-        total  = len(buyers)
-        if total == 0:
-            return f"No holders to release for campaign {campaign_id}"
+# Pipelined mode: sign + broadcast every batch back-to-back on contiguous nonces and let the
+# reconciler collect the receipts; otherwise each mined batch submits the next one.
+HOLD_BATCH_PIPELINED = getattr(settings, "HOLD_BATCH_PIPELINED", True)
 
-        base_nonce = w3.eth.get_transaction_count(OWNER)  # next nonce
-        recorded   = []  # collect for return/debug
+# Adaptive batch size: fit as many holders as the observed gas per holder allows under GAS_LIMIT
+MIN_BATCH_SIZE      = getattr(settings, "HOLD_BATCH_MIN_SIZE", 10)
+MAX_BATCH_SIZE      = getattr(settings, "HOLD_BATCH_MAX_SIZE", 200)
+BATCH_GAS_HEADROOM  = 0.8   # leave 20% of GAS_LIMIT for per-tx overhead / variance
+GAS_EWMA_ALPHA      = 0.3   # weight of the newest observation
+BATCH_GAS_OVERHEAD  = 50_000   # intrinsic + loop setup, on top of holders × gas per holder
+BATCH_GAS_MARGIN    = 1.25     # per-holder cost varies (cold vs warm storage)
 
-        for batch_index, start in enumerate(range(0, total, BATCH_SIZE)):
-            end = min(start + BATCH_SIZE - 1, total - 1)
 
-            tx_params = {
-                "chainId":  w3.eth.chain_id,                  # current chain ID
-                "from":     OWNER,                            # sender address
-                "nonce":    base_nonce + batch_index,         # avoid collisions
-                "gas":      GAS_LIMIT,
-                "gasPrice": w3.to_wei(GAS_PRICE_GWEI, "gwei"),  # gwei→wei
-            }
+def _gas_per_holder_key(action: str) -> str:
+    return f"hold_batch:gas_per_holder:{action}"
 
-            # Prepare the batch release function call
-            fn      = contract.functions.releaseHoldsBatch(campaign_id, seller_id, start, end)
-            tx_hash = _build_and_send(fn, tx_params)  # sign & broadcast
 
-            # Wait for the tx to be mined (blocks until mined)
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-            # Decode all HoldReleased events from receipt.logs
-            events = contract.events.HoldReleased.process_receipt(receipt)
-            
+def _adaptive_batch_size(action: str) -> int:
+    """BATCH_SIZE until we've seen a mined batch, then GAS_LIMIT-bounded size from the EWMA."""
+    per_holder = cache.get(_gas_per_holder_key(action))
+    if not per_holder:
+        return BATCH_SIZE
+    size = int(GAS_LIMIT * BATCH_GAS_HEADROOM // per_holder)
+    # built-in: max/min clamp into [MIN, MAX]
+    return max(MIN_BATCH_SIZE, min(MAX_BATCH_SIZE, size))
+
+
+def _batch_gas(action: str, holders: int) -> int:
+    """Gas limit for a batch of `holders`: sized from the EWMA, GAS_LIMIT until one is known."""
+    per_holder = cache.get(_gas_per_holder_key(action))
+    if not per_holder:
+        return GAS_LIMIT
+    return int(holders * per_holder * BATCH_GAS_MARGIN) + BATCH_GAS_OVERHEAD
+
+
+def _observe_batch_gas(action: str, gas_used: int, holders: int) -> None:
+    """Fold one mined batch into the gas-per-holder EWMA."""
+    if holders <= 0 or not gas_used:
+        return
+    key     = _gas_per_holder_key(action)
+    sample  = gas_used / holders
+    current = cache.get(key)
+    value   = sample if not current else GAS_EWMA_ALPHA * sample + (1 - GAS_EWMA_ALPHA) * current
+    cache.set(key, value, timeout=None)
+
+
+def _observe_batch_failure(action: str, gas_used: int, holders: int) -> None:
+    """
+    A failed batch burned `gas_used` without finishing `holders`: the real cost per holder is
+    above gas_used / holders, so never let the EWMA sit below twice that (we retry at half size).
+    """
+    if holders <= 0 or not gas_used:
+        return
+    key   = _gas_per_holder_key(action)
+    floor = 2 * gas_used / holders
+    cache.set(key, max(cache.get(key) or 0, floor), timeout=None)
+
+
+def _hold_event_amounts(ev):
+    """
+    (tt_wei, credit_wei) from a HoldReleased / HoldRefunded event.
+    HoldReleased emits the seller's net amounts (netTTWei / netCrWei);
+    HoldRefunded emits ttAmountWei / creditAmountWei.
+    """
+    args   = ev.args
+    wei_tt = args.get("ttAmountWei", args.get("netTTWei", 0))
+    wei_cr = args.get("creditAmountWei", args.get("netCrWei", 0))
+    return int(wei_tt), int(wei_cr)
+
+
+def _plan_hold_batches(action: str, total: int) -> list:
+    """[(start, size), ...] covering buyers[0:total] with the current adaptive size."""
+    size = _adaptive_batch_size(action)
+    return [(start, min(size, total - start)) for start in range(0, total, size)]
+
+
+def _submit_hold_batch(
+    action: str,
+    campaign_id: int,
+    seller_id: int,
+    start: int,
+    total: int,
+    attempt: int = 0,
+    size: int = None,
+    nonce: int = None,
+    pipelined: bool = False,
+) -> str:
+    """
+    Broadcast one releaseHoldsBatch / refundHoldsBatch tx for buyers[start:start+size]
+    and hand it to the reconciler.
+      - pipelined=False: the continuation submits the next batch once this one is mined
+      - pipelined=True:  the caller already submitted every batch; the continuation only records
+    """
+    size = size or _adaptive_batch_size(action)
+    end  = min(start + size - 1, total - 1)
+
+    # batch gas scales with holders → sized from this batch, not a constant
+    # (a MIN_BATCH_SIZE batch may need more than GAS_LIMIT)
+    gas       = _batch_gas(action, end - start + 1)
+    tx_params = fee_oracle.tx_params(gas=gas, nonce=nonce)  # nonce None → allocated by build_and_send
+    if action == "release":
+        fn = contract.functions.releaseHoldsBatch(campaign_id, seller_id, start, end)
+    else:
+        fn = contract.functions.refundHoldsBatch(campaign_id, start, end)
+    tx_hash = _build_and_send(fn, tx_params)  # sign & broadcast (nonce from nonce_manager)
+
+    batch = {
+        "action":      action,
+        "campaign_id": campaign_id,
+        "seller_id":   seller_id,
+        "start":       start,
+        "total":       total,
+        "attempt":     attempt,
+        "size":        end - start + 1,
+        "pipelined":   pipelined,
+    }
+    register_pending(
+        tx_hash,
+        on_success=continue_hold_batches,
+        on_failure=retry_hold_batch,
+        kwargs=batch,
+        kind=f"{action}_batch",
+    )
+    return tx_hash
+
 
-            for ev in events:
-                sellerId = ev.args['sellerId']
-                buyerId = ev.args['buyerId']
-                wei_tt    = ev.args['ttAmountWei']
-                wei_cr    = ev.args['creditAmountWei']
-
-                # ── CONVERSION ──
-                tt_amount = _from_wei(wei_tt, places=2)
-                cr_amount = _from_wei(wei_cr, places=2)
-
-                save_influencer_transaction_info.delay(
-                    tx_hash=tx_hash,
-                    user_id=User.objects.get(user_id=buyerId).id,
-                    campaign_id=campaign_id,
-                    influencer_id=User.objects.get(user_id=sellerId).id,
-                    tx_type=InfluencerTransaction.RELEASE,
-                    tt_amount=str(tt_amount),
-                    credits_delta=str(cr_amount),
-                    tt_amount_wei=str(wei_tt),          
-                    credits_delta_wei=str(wei_cr),
+def _submit_all_hold_batches(action: str, campaign_id: int, seller_id: int, total: int) -> list:
+    """
+    Pipelined mode: reserve one contiguous nonce per batch, then sign + broadcast them
+    back-to-back without waiting for any receipt. If a broadcast fails, the unsent
+    nonces go back to the allocator and the remaining batches are queued one by one
+    (their fresh allocate() calls fill those gaps first).
+    """
+    plan   = _plan_hold_batches(action, total)
+    nonces = nonce_manager.reserve(len(plan))
+    hashes = []
+
+    for i, (start, size) in enumerate(plan):
+        if i:
+            nonce_manager.renew(nonces[i:])   # slow pipelines must not have their reservation resynced into gaps
+        try:
+            hashes.append(_submit_hold_batch(
+                action, campaign_id, seller_id, start, total,
+                size=size, nonce=nonces[i], pipelined=True,
+            ))
+        except Exception:
+            logger.exception("%s batch start=%s for campaign %s failed to broadcast", action, start, campaign_id)
+            nonce_manager.release_many(nonces[i + 1:])   # nonces[i] was released by build_and_send
+            for rest_start, rest_size in plan[i:]:
+                submit_hold_batch.delay(
+                    action, campaign_id, seller_id, rest_start, total,
+                    size=rest_size, pipelined=True,
                 )
+            break
+    return hashes
+
+
+def _start_hold_batches(action: str, campaign_id: int, seller_id: int, total: int):
+    if HOLD_BATCH_PIPELINED:
+        return _submit_all_hold_batches(action, campaign_id, seller_id, total)
+    return _submit_hold_batch(action, campaign_id, seller_id, 0, total)
 
-                recorded.append({
-                    'tx_hash':     tx_hash,
-                    'buyerId':     buyerId,
-                    'ttAmount': str(tt_amount),
-                    'creditAmount': str(cr_amount),
-                    'ttAmountWei': str(wei_tt),
-                    'creditAmountWei': str(wei_cr),
-                })
 
+def _record_hold_events(tx_hash: str, receipt, action: str, campaign_id: int, seller_id: int) -> list:
+    """
+    Decode HoldReleased / HoldRefunded from a mined batch and write one ledger row per buyer:
+    one IN query for all user ids, one fetch_tx_details for the batch tx, one bulk upsert
+    on (tx_hash, log_index) — the same key the event indexer uses, so replays are no-ops.
+    """
+    from blockchain.indexer import upsert_ledger_rows
+
+    if action == "release":
+        events  = contract.events.HoldReleased.process_receipt(receipt)
+        tx_type = InfluencerTransaction.RELEASE
+    else:
+        # Note: refund emits HoldRefunded events
+        events  = contract.events.HoldRefunded.process_receipt(receipt)
+        tx_type = InfluencerTransaction.REFUND
+    if not events:
+        return []
+
+    # built-in: set comprehension → each on-chain id queried once
+    onchain_ids = {str(ev.args['buyerId']) for ev in events} | {str(ev.args.get('sellerId', seller_id)) for ev in events}
+    pk_by_id    = dict(User.objects.filter(user_id__in=onchain_ids).values_list("user_id", "id"))
+
+    tx_hash      = _ensure_prefixed(tx_hash)
+    safe_details = _sanitize_details_for_model(fetch_tx_details(tx_hash), InfluencerTransaction)
+
+    rows, recorded = [], []
+    for ev in events:
+        buyerId  = ev.args['buyerId']
+        sellerId = ev.args.get('sellerId', seller_id)
+        wei_tt, wei_cr = _hold_event_amounts(ev)
+
+        # ── CONVERSION ──
+        tt_amount = _from_wei(wei_tt, places=2)
+        cr_amount = _from_wei(wei_cr, places=2)
+
+        user_pk, influencer_pk = pk_by_id.get(str(buyerId)), pk_by_id.get(str(sellerId))
+        if user_pk is None or influencer_pk is None:
+            logger.error("hold %s in %s: unknown user (buyer %s / seller %s); not recorded", action, tx_hash, buyerId, sellerId)
+            continue
+
+        rows.append(InfluencerTransaction(
+            user_id=user_pk,
+            campaign_id=campaign_id,
+            influencer_id=influencer_pk,
+            status=InfluencerTransaction.COMPLETED,
+            tx_hash=tx_hash,
+            log_index=ev.logIndex,
+            **safe_details,
+            tx_type=tx_type,
+            tt_amount=tt_amount,
+            credits_delta=cr_amount,
+            tt_amount_wei=Decimal(wei_tt),          # keep exact on-chain integers
+            credits_delta_wei=Decimal(wei_cr),
+        ))
+
+        recorded.append({
+            'tx_hash':     tx_hash,
+            'buyerId':     buyerId,
+            'ttAmount': str(tt_amount),
+            'creditAmount': str(cr_amount),
+            'ttAmountWei': str(wei_tt),
+            'creditAmountWei': str(wei_cr),
+        })
+
+    upsert_ledger_rows(InfluencerTransaction, rows)
+    balance_cache.invalidate(*{pk for row in rows for pk in (row.user_id, row.influencer_id)})
+    return recorded
+
+
+def _any_open_holds(campaign_id: int, buyers) -> bool:
+    """
+    One batched getHold read over every buyer: skip paying for a release/refund sweep
+    that would move nothing. Unreadable holds count as open (never skip on doubt).
+    """
+    try:
+        holds = batch_holds(campaign_id, buyers)
+    except Exception:
+        logger.exception("batched getHold read failed for campaign %s", campaign_id)
+        return True
+    return any(h is None or h[0] or h[1] for h in holds.values())
 
 
-        return recorded
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def release_all_holds_for_campaign_task(self, campaign_id, seller_id):
+    """
+    Kick off releaseHoldsBatch for every buyer of the campaign.
+    Returns the broadcast tx hash(es); the reconciler records each batch as it is mined.
+    """
+    campaign_id = int(campaign_id)
+    seller_id   = int(seller_id)
+
+    try:
+        # 1) Fetch buyers on‑chain (eth_call, no gas)
+        buyers = contract.functions.getCampaignBuyers(campaign_id).call({'from': OWNER})
+        total  = len(buyers)
+        if total == 0 or not _any_open_holds(campaign_id, buyers):
+            return f"No holders to release for campaign {campaign_id}"
+
+        return _start_hold_batches("release", campaign_id, seller_id, total)
 
     except Exception as exc:
         raise self.retry(exc=exc)
@@ -362,72 +601,97 @@ def release_all_holds_for_campaign_task(self, campaign_id, seller_id):
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
 def refund_all_holds_for_campaign_task(self, campaign_id, seller_id):
+    """Same as release_all_holds_for_campaign_task but with refundHoldsBatch."""
     campaign_id = int(campaign_id)
     seller_id   = int(seller_id)
 
     try:
         buyers = contract.functions.getCampaignBuyers(campaign_id).call({'from': OWNER})
         total  = len(buyers)
-        if total == 0:
+        if total == 0 or not _any_open_holds(campaign_id, buyers):
             return f"No holds to refund for campaign {campaign_id}"
 
-        base_nonce = w3.eth.get_transaction_count(OWNER)
-        recorded   = []
+        return _start_hold_batches("refund", campaign_id, seller_id, total)
 
-        for batch_index, start in enumerate(range(0, total, BATCH_SIZE)):
-            end = min(start + BATCH_SIZE - 1, total - 1)
+    except Exception as exc:
+        raise self.retry(exc=exc)
 
-            tx_params = {
-                "chainId":  w3.eth.chain_id,
-                "from":     OWNER,
-                "nonce":    base_nonce + batch_index,
-                "gas":      GAS_LIMIT,
-                "gasPrice": w3.to_wei(GAS_PRICE_GWEI, "gwei"),
-            }
 
-            fn      = contract.functions.refundHoldsBatch(campaign_id, start, end)
-            tx_hash = _build_and_send(fn, tx_params)
-
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-            # Note: refund emits HoldRefunded events
-            events = contract.events.HoldRefunded.process_receipt(receipt)
-
-            for ev in events:
-                buyerId = ev.args['buyerId']
-                wei_tt    = ev.args['ttAmountWei']
-                wei_cr    = ev.args['creditAmountWei']
-
-                # ── CONVERSION ──
-                tt_amount = _from_wei(wei_tt, places=2)
-                cr_amount = _from_wei(wei_cr, places=2)
-
-                save_influencer_transaction_info.delay(
-                    tx_hash=tx_hash,
-                    user_id=User.objects.get(user_id=buyerId).id,
-                    campaign_id=campaign_id,
-                    influencer_id=User.objects.get(user_id=seller_id).id,
-                    tx_type=InfluencerTransaction.REFUND,
-                    tt_amount=str(tt_amount),
-                    credits_delta=str(cr_amount),
-                    tt_amount_wei=str(wei_tt),          # keep exact on-chain integers
-                    credits_delta_wei=str(wei_cr),
-                )
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def submit_hold_batch(self, action, campaign_id, seller_id, start, total, attempt=0, size=None, pipelined=False):
+    try:
+        return _submit_hold_batch(
+            action, int(campaign_id), int(seller_id), int(start), int(total),
+            attempt=attempt, size=size, pipelined=pipelined,
+        )
+    except Exception as exc:
+        raise self.retry(exc=exc)
 
-                recorded.append({
-                    'tx_hash':     tx_hash,
-                    'buyerId':     buyerId,
-                    'ttAmount': str(tt_amount),
-                    'creditAmount': str(cr_amount),
-                    'ttAmountWei': str(wei_tt),
-                    'creditAmountWei': str(wei_cr),
-                })
 
-        return recorded
+@shared_task
+def continue_hold_batches(tx_hash, action, campaign_id, seller_id, start, total, attempt=0, size=None, pipelined=False):
+    """
+    Reconciler continuation for a mined release/refund batch:
+    feed its gas into the batch-size EWMA, queue the next batch (sequential mode only),
+    then record this batch's events.
+    Not retried as a whole — a re-run would queue the next batch twice
+    (recording the events is idempotent: upsert on (tx_hash, log_index)).
+    """
+    size    = size or BATCH_SIZE
+    receipt = w3.eth.get_transaction_receipt(tx_hash)
+    # the last batch of a campaign is usually partial
+    _observe_batch_gas(action, receipt.gasUsed, min(size, total - start))
+
+    next_start = start + size
+    if not pipelined and next_start < total:
+        submit_hold_batch.delay(action, campaign_id, seller_id, next_start, total)
+
+    return _record_hold_events(tx_hash, receipt, action, campaign_id, seller_id)
+
+
+@shared_task
+def retry_hold_batch(tx_hash, action, campaign_id, seller_id, start, total, attempt=0, size=None, pipelined=False):
+    """
+    Reconciler continuation for a reverted / lost batch: re-submit just that range.
+      - lost (never mined): same range, same size
+      - mined but failed (revert / out of gas): the failure raises the gas-per-holder
+        estimate and the range is retried in two halves
+    """
+    if attempt + 1 >= MAX_BATCH_ATTEMPTS:
+        logger.error(
+            "%s batch start=%s for campaign %s failed %s times (last tx %s); giving up",
+            action, start, campaign_id, attempt + 1, tx_hash,
+        )
+        return None
+
+    size = min(size or BATCH_SIZE, total - start)
+    try:
+        receipt = w3.eth.get_transaction_receipt(tx_hash)
+    except TransactionNotFound:
+        receipt = None
+
+    if receipt is None or size <= 1:
+        submit_hold_batch.delay(
+            action, campaign_id, seller_id, start, total,
+            attempt=attempt + 1, size=size, pipelined=pipelined,
+        )
+        return None
+
+    _observe_batch_failure(action, receipt.gasUsed, size)
+    half = size // 2
+    submit_hold_batch.delay(
+        action, campaign_id, seller_id, start, total,
+        attempt=attempt + 1, size=half, pipelined=pipelined,
+    )
+    if pipelined:
+        # sequential mode continues from start + half on its own; pipelined batches don't chain
+        submit_hold_batch.delay(
+            action, campaign_id, seller_id, start + half, total,
+            attempt=attempt + 1, size=size - half, pipelined=True,
+        )
+    return None
 
-    except Exception as exc:
-        raise self.retry(exc=exc)
 
-    
 @shared_task(bind=True, max_retries=5, default_retry_delay=5)
 def register_campaign_on_chain(self, campaign_id, seller_id):
     from campaign.models import EscrowRecord, Campaign
@@ -454,33 +718,21 @@ def register_campaign_on_chain(self, campaign_id, seller_id):
 
     try:
         # 3) Build, sign & send the tx
-        chain_id = w3.eth.chain_id
-        nonce    = w3.eth.get_transaction_count(OWNER)
-        tx_params = {
-            "chainId":  chain_id,
-            "from":     OWNER,
-            "nonce":    nonce,
-            "gas":      GAS_LIMIT,
-            "gasPrice": w3.to_wei(GAS_PRICE_GWEI, "gwei"),
-        }
         fn     = contract.functions.registerCampaign(campaign_id, seller_id)
-        raw_tx = _build_and_send(fn, tx_params)
-
-        # 4) Wait for the receipt & assert success
-        receipt = w3.eth.wait_for_transaction_receipt(raw_tx, timeout=120)
-        if receipt.status != 1:
-            raise ContractLogicError("On-chain tx reverted")
-
-        # 5) Update your escrow record with the real tx hash & final status
-        rec.tx_hash          = receipt.transactionHash.hex()
-        rec.status           = "released"      # or "registered"
-        rec.gas_cost_credits = int(tx_params["gasPrice"]) * receipt.gasUsed // (10**9)
-        rec.gas_cost_tt      = receipt.gasUsed
-        rec.save(update_fields=[
-            "tx_hash", "status", "gas_cost_credits", "gas_cost_tt"
-        ])
+        raw_tx = _build_and_send(fn, fee_oracle.tx_params(fn))
+
+        # 4) Store the hash now; the reconciler finalizes the record once mined
+        rec.tx_hash = raw_tx
+        rec.save(update_fields=["tx_hash"])
+        register_pending(
+            raw_tx,
+            on_success=finalize_register_campaign,
+            on_failure=fail_escrow_tx,
+            args=[rec.id],
+            kind="register_campaign",
+        )
 
-        return rec.tx_hash
+        return raw_tx
 
     except (ContractLogicError, TimeExhausted) as exc:
         rec.status = "refunded"    # or “failed” if you prefer
@@ -492,6 +744,71 @@ def register_campaign_on_chain(self, campaign_id, seller_id):
         raise self.retry(exc=exc)
     
     
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def finalize_register_campaign(self, tx_hash, escrow_record_id):
+    """Reconciler continuation: registerCampaign mined OK → mark escrow record + gas."""
+    from campaign.models import EscrowRecord
+
+    try:
+        receipt = w3.eth.get_transaction_receipt(tx_hash)
+    except TransactionNotFound as exc:
+        raise self.retry(exc=exc)
+
+    rec = EscrowRecord.objects.get(pk=escrow_record_id)
+    rec.status           = "released"      # or "registered"
+    rec.gas_cost_credits = receipt.get("effectiveGasPrice", 0) * receipt.gasUsed // (10**9)
+    rec.gas_cost_tt      = receipt.gasUsed
+    rec.save(update_fields=["status", "gas_cost_credits", "gas_cost_tt"])
+    return tx_hash
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def finalize_hold_for_campaign(self, tx_hash, escrow_record_id, max_fee_per_gas=0):
+    """
+    Reconciler continuation: holdForCampaign mined OK → record gas costs on the escrow row
+    and write the fan's SPEND ledger row (only a successful hold gets one).
+    """
+    from campaign.models import EscrowRecord
+
+    try:
+        receipt = w3.eth.get_transaction_receipt(tx_hash)
+    except TransactionNotFound as exc:
+        raise self.retry(exc=exc)
+
+    # Compute gas costs
+    gas_used        = receipt.gasUsed
+    effective_price = receipt.get("effectiveGasPrice", max_fee_per_gas)
+    gas_cost_wei    = gas_used * effective_price
+    gas_cost_eth    = w3.from_wei(gas_cost_wei, "ether")
+    # convert ETH→credits (whatever your formula is)
+    gas_cost_credits = int(Decimal(str(gas_cost_eth)) * 1000)
+
+    rec = EscrowRecord.objects.get(pk=escrow_record_id)
+    rec.status           = "held"
+    rec.gas_cost_credits = gas_cost_credits
+    rec.gas_cost_tt      = gas_used
+    rec.save(update_fields=["status", "gas_cost_credits", "gas_cost_tt"])
+
+    save_transaction_info.delay(
+        tx_hash,
+        user_id=rec.user_id,
+        campaign_id=rec.campaign_id,
+        tx_type=Transaction.SPEND,
+        tt_amount=rec.tt_amount,
+        credits_delta=rec.credit_amount,
+    )
+    return tx_hash
+
+
+@shared_task
+def fail_escrow_tx(tx_hash, escrow_record_id, **kwargs):
+    """Reconciler continuation: escrow tx reverted or never mined."""
+    from campaign.models import EscrowRecord
+
+    logger.error("escrow tx %s for record %s reverted/expired", tx_hash, escrow_record_id)
+    EscrowRecord.objects.filter(pk=escrow_record_id).update(status="refunded")   # or “failed” if you prefer
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
 def hold_for_campaign_on_chain(
     self,
@@ -511,8 +828,8 @@ def hold_for_campaign_on_chain(
     
     # Convert logical credits into Wei
     spent_credit_wei   = Web3.to_wei(str(cost_in_credits), "ether")  # e.g. 66 → 66e18
-    # Pull the on‐chain conversionRate (uint256)
-    conv_rate          = contract.functions.conversionRate().call()
+    # conversionRate (uint256) from the shared rate cache — no eth_call on this path
+    conv_rate          = get_current_rate_wei()
     # Derive the exact TT‐Wei (including fractions!) by dividing credits‐Wei by conversionRate
     spent_tt_wei       = spent_credit_wei // conv_rate            # e.g. 66e18//10 = 6.6e18
 
@@ -538,47 +855,23 @@ def hold_for_campaign_on_chain(
             spent_tt_wei,
             spent_credit_wei,
         )
-        latest   = w3.eth.get_block("latest")
-        base_fee = latest["baseFeePerGas"]
-        tip      = w3.to_wei(2, "gwei")
-        tx       = fn.build_transaction({
-            "chainId":           w3.eth.chain_id,
-            "from":              OWNER,
-            "nonce":             w3.eth.get_transaction_count(OWNER),
-            "maxFeePerGas":      int(base_fee * 1.2) + tip,
-            "maxPriorityFeePerGas": tip,
-        })
+        # 3) Fees for the current block; gas estimated for this call (a revert raises ContractLogicError here, before broadcast)
+        tx_params = fee_oracle.tx_params(fn)
+
+        # 4) Send (allocates / confirms / releases the nonce)
+        tx_hash = _build_and_send(fn, tx_params)
 
-        # 3) Estimate & set gas
-        estimated = w3.eth.estimate_gas(tx)
-        tx["gas"] = int(estimated * 1.2)
-
-        # 4) Send
-        signed = w3.eth.account.sign_transaction(tx, private_key=PK)
-        raw    = w3.eth.send_raw_transaction(signed.raw_transaction)
-        tx_hash = raw.hex()
-
-        # 5) Wait for receipt
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-        if receipt.status != 1:
-            raise ContractLogicError("holdForCampaign reverted")
-
-        # 6) Compute gas costs
-        gas_used        = receipt.gasUsed
-        effective_price = getattr(receipt, "effectiveGasPrice", tx["maxFeePerGas"])
-        gas_cost_wei    = gas_used * effective_price
-        gas_cost_eth    = w3.from_wei(gas_cost_wei, "ether")
-        # convert ETH→credits (whatever your formula is)
-        gas_cost_credits = int(Decimal(str(gas_cost_eth)) * 1000)
-
-        # 7) Update the EscrowRecord
-        rec.tx_hash           = tx_hash
-        rec.status            = "held"
-        rec.gas_cost_credits  = gas_cost_credits
-        rec.gas_cost_tt       = gas_used
-        rec.save(update_fields=[
-            "tx_hash", "status", "gas_cost_credits", "gas_cost_tt"
-        ])
+        # 5) Store the hash now; the reconciler finalizes gas costs once mined
+        rec.tx_hash = tx_hash
+        rec.save(update_fields=["tx_hash"])
+        register_pending(
+            tx_hash,
+            on_success=finalize_hold_for_campaign,
+            on_failure=fail_escrow_tx,
+            args=[rec.id],
+            kwargs={"max_fee_per_gas": int(tx_params.get("maxFeePerGas") or tx_params.get("gasPrice") or 0)},
+            kind="hold",
+        )
 
         return tx_hash
 
@@ -607,23 +900,14 @@ def withdraw_for_user_task(self, user_id: int, credits_amount: int):
         credit_wei = Web3.to_wei(str(credits_amount), "ether")      # e.g. 100 → 100e18
 
         # 2) fetch conversionRate from contract (uint256)
-        conv_rate = contract.functions.conversionRate().call()      # e.g. 10
+        conv_rate = get_current_rate_wei()                          # e.g. 10
 
         # 3) compute how many TT-Wei to withdraw
         tt_wei    = credit_wei // conv_rate                          # integer division
 
         # 4) build & send the tx
-        chain_id = w3.eth.chain_id
-        nonce    = w3.eth.get_transaction_count(OWNER)
-        tx_params = {
-            "chainId":  chain_id,
-            "from":     OWNER,
-            "nonce":    nonce,
-            "gas":      GAS_LIMIT,
-            "gasPrice": w3.to_wei(GAS_PRICE_GWEI, "gwei"),
-        }
         fn = contract.functions.withdraw(user_id, tt_wei)
-        tx_hash = _build_and_send(fn, tx_params)
+        tx_hash = _build_and_send(fn, fee_oracle.tx_params(fn))
         return tx_hash
 
     except (ContractLogicError, TimeExhausted) as e:
@@ -631,6 +915,16 @@ def withdraw_for_user_task(self, user_id: int, credits_amount: int):
         raise self.retry(exc=e)
     except Exception as e:
         raise self.retry(exc=e)
+
+
+@shared_task
+def release_withdraw_reservation(user_pk: int, day: str, credits_amount: int):
+    """
+    link_error of WithdrawView's chain: the withdraw never got recorded, so hand its
+    credits back to the user's daily limit (WithdrawalDailyUsage.pending_credits).
+    """
+    withdraw_limits.release(user_pk, day, credits_amount)
+    logger.warning("withdraw failed for user %s: released %s credits reserved on %s", user_pk, credits_amount, day)
     
     
     
@@ -768,7 +1062,8 @@ def claim_guest_after_registration(self, click_id: str, user_id: int) -> str:
     Retries until:
       - Wert order is confirmed
       - user is registered on-chain
-    Then calls claimPending(ref, userId), saves status and an OnChainAction row.
+    Then calls claimPending(ref, userId) and hands the tx to the reconciler;
+    finalize_guest_claim saves status and the Transaction / OnChainAction rows.
     """
     from blockchain.models import GuestOrder, WertOrder
 
@@ -795,69 +1090,83 @@ def claim_guest_after_registration(self, click_id: str, user_id: int) -> str:
     if not _is_user_registered(int(user_id)):
         raise self.retry(exc=RuntimeError("user not registered on chain yet"))
 
+    # A claim tx for this order is already waiting to be mined
+    if PendingTransaction.objects.filter(
+        kind="guest_claim", status=PendingTransaction.PENDING, args__0=str(go.click_id)
+    ).exists():
+        return "claim_in_flight"
+
     # 3) Do the claim
     try:
-        tx_params = {
-            "chainId":  w3.eth.chain_id,
-            "from":     OWNER,
-            "nonce":    w3.eth.get_transaction_count(OWNER),
-            "gas":      GAS_LIMIT,
-            "gasPrice": w3.to_wei(GAS_PRICE_GWEI, "gwei"),
-        }
-
         # claimPending(ref, userId) is the contract function that moves pending TT -> user balances
-        tx_hash = _build_and_send(
-            contract.functions.claimPending(go.ref, int(user_id)),
-            tx_params
+        fn      = contract.functions.claimPending(go.ref, int(user_id))
+        tx_hash = _build_and_send(fn, fee_oracle.tx_params(fn))
+
+        # The reconciler runs finalize_guest_claim once the claim is mined
+        register_pending(
+            tx_hash,
+            on_success=finalize_guest_claim,
+            on_failure=fail_guest_claim,
+            args=[str(go.click_id), int(user_id)],
+            kind="guest_claim",
         )
+        return _ensure_prefixed(tx_hash)
 
-        try:
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=180)
-            # wait_for_transaction_receipt(): web3 call that blocks until mined or timeout
-        except TimeExhausted as exc:
-            raise self.retry(exc=exc)
-
-        if receipt.status != 1:
-            raise ContractLogicError("claimPending reverted")
-
-        # ✅ Mark order as claimed
-        go.status = GuestOrder.Status.CLAIMED
-        go.save(update_fields=["status"])
-        # save(update_fields=...): Django built-in -> UPDATE only these columns
-
-        # ✅ Extract the actual amounts from the PendingClaimed event
-        # contract.events.PendingClaimed.process_receipt(...) decodes logs using ABI
-        claimed_events = contract.events.PendingClaimed().process_receipt(receipt)
-
-        if not claimed_events:
-            # Fallback: if for any reason logs are not decoded, retry once.
-            # built-in len(): returns number of items in list
-            raise self.retry(exc=RuntimeError("PendingClaimed event not found in receipt logs"))
-
-        ev = claimed_events[0]
-        wei_tt = int(ev.args.get("ttWei", 0))          # int(): built-in -> safely coerce to Python int
-        wei_cr = int(ev.args.get("creditsWei", 0))
-
-        # Convert Wei -> display units (2dp) for your Transaction table
-        tt_amount_dec = _from_wei(wei_tt, token_decimals=18, places=2)
-        cr_amount_dec = _from_wei(wei_cr, token_decimals=18, places=2)
-
-        # ✅ Record the claim as a DEPOSIT Transaction so FE balance (DB-based) updates
-        # Idempotency: do not double-insert if task retries
-        normalized_hash = _ensure_prefixed(tx_hash)
-        if not Transaction.objects.filter(tx_hash__iexact=normalized_hash).exists():
-            # .delay(): Celery built-in -> enqueue task async
-            save_transaction_info.delay(
-                normalized_hash,
-                go.user.id,                                  # DB user PK (NOT on-chain user_id)
-                go.campaign_id if go.campaign_id else None,  # optional campaign link
-                Transaction.DEPOSIT,
-                str(tt_amount_dec),                          # string so Decimal(str(..)) stays exact
-                str(cr_amount_dec),
-                tt_amount_wei=str(wei_tt),
-                credits_delta_wei=str(wei_cr),
-                wallet_address=None,                         # claim is executed by OWNER, not user wallet
-            )
+    except ContractLogicError as e:
+        msg = str(e).lower()   # str.lower(): built-in string method
+        if any(s in msg for s in ["pending", "not found", "no claim", "not funded"]):
+            raise self.retry(exc=e)
+        raise
+    
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def finalize_guest_claim(self, tx_hash: str, click_id: str, user_id: int) -> str:
+    """
+    Reconciler continuation for a mined claimPending tx:
+    mark the order claimed and record the DEPOSIT + action rows.
+    """
+    go = GuestOrder.objects.select_related("campaign").get(click_id=UUID(str(click_id)))
+
+    receipt = w3.eth.get_transaction_receipt(tx_hash)
+
+    # ✅ Mark order as claimed
+    go.status = GuestOrder.Status.CLAIMED
+    go.save(update_fields=["status"])
+    # save(update_fields=...): Django built-in -> UPDATE only these columns
+
+    # ✅ Extract the actual amounts from the PendingClaimed event
+    # contract.events.PendingClaimed.process_receipt(...) decodes logs using ABI
+    claimed_events = contract.events.PendingClaimed().process_receipt(receipt)
+
+    if not claimed_events:
+        # Fallback: if for any reason logs are not decoded, retry once.
+        raise self.retry(exc=RuntimeError("PendingClaimed event not found in receipt logs"))
+
+    ev = claimed_events[0]
+    wei_tt = int(ev.args.get("ttWei", 0))          # int(): built-in -> safely coerce to Python int
+    wei_cr = int(ev.args.get("creditsWei", 0))
+
+    # Convert Wei -> display units (2dp) for your Transaction table
+    tt_amount_dec = _from_wei(wei_tt, token_decimals=18, places=2)
+    cr_amount_dec = _from_wei(wei_cr, token_decimals=18, places=2)
+
+    # ✅ Record the claim as a DEPOSIT Transaction so FE balance (DB-based) updates
+    # Idempotency: do not double-insert if task retries
+    normalized_hash = _ensure_prefixed(tx_hash)
+    if not Transaction.objects.filter(tx_hash__iexact=normalized_hash).exists():
+        # .delay(): Celery built-in -> enqueue task async
+        save_transaction_info.delay(
+            normalized_hash,
+            go.user.id,                                  # DB user PK (NOT on-chain user_id)
+            go.campaign_id if go.campaign_id else None,  # optional campaign link
+            Transaction.DEPOSIT,
+            str(tt_amount_dec),                          # string so Decimal(str(..)) stays exact
+            str(cr_amount_dec),
+            tt_amount_wei=str(wei_tt),
+            credits_delta_wei=str(wei_cr),
+            wallet_address=None,                         # claim is executed by OWNER, not user wallet
+        )
 
         # ✅ (Optional) also record an action row (your existing behavior)
         save_onchain_action_info.delay(
@@ -868,21 +1177,32 @@ def claim_guest_after_registration(self, click_id: str, user_id: int) -> str:
             {"ref": go.ref, "click_id": str(go.click_id)},
         )
 
-        # ✅ (Optional) mark WertOrder as "claimed" for your dashboard/ops
-        try:
-            WertOrder.objects.filter(click_id=str(go.click_id)).update(status="claimed")
-            # .update(): Django ORM built-in -> SQL UPDATE without loading objects
-        except Exception:
-            logger.exception("Failed to mark WertOrder as claimed")
+    # ✅ (Optional) mark WertOrder as "claimed" for your dashboard/ops
+    try:
+        WertOrder.objects.filter(click_id=str(go.click_id)).update(status="claimed")
+        # .update(): Django ORM built-in -> SQL UPDATE without loading objects
+    except Exception:
+        logger.exception("Failed to mark WertOrder as claimed")
 
-        return normalized_hash
+    return normalized_hash
 
-    except ContractLogicError as e:
-        msg = str(e).lower()   # str.lower(): built-in string method
-        if any(s in msg for s in ["pending", "not found", "no claim", "not funded"]):
-            raise self.retry(exc=e)
-        raise
-    
+
+MAX_CLAIM_ATTEMPTS = 3
+
+
+@shared_task
+def fail_guest_claim(tx_hash: str, click_id: str, user_id: int):
+    """
+    Reconciler continuation for a reverted / lost claimPending tx.
+    The pending balance may simply not be funded yet → try the claim again later (bounded).
+    """
+    failures = PendingTransaction.objects.filter(
+        kind="guest_claim", args__0=str(click_id),
+        status__in=[PendingTransaction.REVERTED, PendingTransaction.EXPIRED],
+    ).count()
+    logger.warning("claimPending %s for guest order %s reverted/expired (%s so far)", tx_hash, click_id, failures)
+    if failures < MAX_CLAIM_ATTEMPTS:
+        claim_guest_after_registration.apply_async(args=[click_id, user_id], countdown=60)
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=30)
@@ -898,19 +1218,66 @@ def sync_user_wallet_on_chain(self, user_id: int, wallet_address: str):
         checksum = wallet_address
 
     try:
-        chain_id = w3.eth.chain_id
-        nonce    = w3.eth.get_transaction_count(OWNER)
-        tx_params = {
-            "chainId":  chain_id,
-            "from":     OWNER,
-            "nonce":    nonce,
-            "gas":      GAS_LIMIT,
-            "gasPrice": w3.to_wei(GAS_PRICE_GWEI, "gwei"),
-        }
         # ⚠️ adapt this to your real ABI name
         fn = contract.functions.setUserWallet(int(user_id), checksum)
-        tx_hash = _build_and_send(fn, tx_params)
+        tx_hash = _build_and_send(fn, fee_oracle.tx_params(fn))
         return tx_hash
     except Exception as exc:
         # self.retry: Celery built-in – re-enqueue the task on failure
-        raise self.retry(exc=exc)
\ No newline at end of file
+        raise self.retry(exc=exc)
+
+
+@shared_task
+def resync_owner_nonce():
+    """
+    Beat job: realign the shared OWNER nonce ledger with the node's pending count
+    (drops spent nonces, turns expired leases into gaps). See blockchain/nonce_manager.py.
+    """
+    return nonce_manager.resync()
+
+
+@shared_task
+def index_contract_events(max_ranges: int = 5):
+    """
+    Beat task: advance the contract event indexer (blockchain/indexer.py) by up to
+    `max_ranges` block ranges. A second run while one is active returns immediately.
+    """
+    from blockchain.indexer import index_once
+
+    totals = {"logs": 0, "rows": 0, "skipped": 0}
+    for _ in range(max_ranges):
+        stats = index_once()
+        if stats.get("locked") or stats.get("to") is None:
+            break
+        for key in totals:
+            totals[key] += stats[key]
+    return totals
+
+
+@shared_task
+def reconcile_escrow_holds(max_chunks: int = None):
+    """
+    Beat task (nightly): sweep held EscrowRecords against getHold (blockchain/escrow_reconcile.py).
+    Resumes from the cursor if a previous run stopped mid-pass.
+    """
+    from blockchain.escrow_reconcile import sweep
+
+    totals = sweep(fix=getattr(settings, "ESCROW_RECONCILE_REPAIR", False), max_chunks=max_chunks)
+    logger.info("escrow reconcile: %s", totals)
+    return totals
+
+
+# built-in: celery's worker_ready signal fires once per worker process start
+@worker_ready.connect
+def _resync_nonce_on_worker_start(**kwargs):
+    try:
+        nonce_manager.resync()
+    except Exception:
+        logger.exception("nonce resync on worker start failed")
+
+
+# built-in: worker_process_init fires in each prefork child right after the fork; a client
+# built in the parent would share its pooled sockets with every child
+@worker_process_init.connect
+def _reset_web3_after_fork(**kwargs):
+    reset_clients()
@@ -1,6 +1,60 @@
 # blockchain/tx_utils.py
+import logging
 from django.conf import settings
 from blockchain.utils import w3  # your existing web3 instance
+from blockchain import nonce_manager
+
+logger = logging.getLogger(__name__)
+
+
+def broadcast(tx) -> str:
+    """
+    Sign & send a fully built tx dict (nonce included) — no nonce bookkeeping.
+    Used directly by the watchdog to re-broadcast a fee-bumped replacement.
+    """
+    signed = w3.eth.account.sign_transaction(                     # built-in method on web3 account; signs bytes
+        tx, private_key=settings.PRIVATE_KEY
+    )
+    from blockchain.tasks import _ensure_prefixed
+
+    raw = w3.eth.send_raw_transaction(signed.raw_transaction)     # sends bytes to the node mempool
+    # HexBytes.hex() has no "0x" (hexbytes ≥ 1.0); raw JSON-RPC (batch_get_receipts) needs it
+    return _ensure_prefixed(raw.hex())
+
+
+def sign_and_send(tx):
+    """
+    Sign & broadcast an already-built tx dict from the OWNER account.
+
+    The nonce is owned by blockchain.nonce_manager:
+    - missing "nonce" → one is allocated here
+    - broadcast OK    → nonce confirmed, tx tracked for the reconciler / watchdog
+    - broadcast fails → nonce released (gap refilled by the next allocate),
+                        unless the node says it's already spent → resync instead
+    """
+    from blockchain.reconciler import track_broadcast
+
+    if tx.get("nonce") is None:
+        tx["nonce"] = nonce_manager.allocate()
+    nonce = tx["nonce"]
+
+    try:
+        tx_hash = broadcast(tx)
+    except Exception as exc:
+        if nonce_manager.is_nonce_spent_error(exc):
+            nonce_manager.resync()
+        else:
+            nonce_manager.release(nonce)
+        raise
+
+    nonce_manager.confirm(nonce)
+    try:
+        track_broadcast(tx_hash, tx)
+    except Exception:
+        # tracking is best-effort: the tx is already in the mempool
+        logger.exception("failed to track broadcast %s", tx_hash)
+    return tx_hash
+
 
 def build_and_send(fn, tx_params):
     """
@@ -8,11 +62,15 @@ def build_and_send(fn, tx_params):
 
     Built-ins used:
     - dict access: tx_params[...] → get values from the dict the same way you'd index a list, but by key.
-    - .hex(): bytes → hex string prefixed with '0x' (human-readable transaction hash).
+    - returns the 0x-prefixed transaction hash (see broadcast()).
     """
-    tx = fn.build_transaction(tx_params)                          # web3: build tx dict
-    signed = w3.eth.account.sign_transaction(                     # built-in method on web3 account; signs bytes
-        tx, private_key=settings.PRIVATE_KEY
-    )
-    raw = w3.eth.send_raw_transaction(signed.raw_transaction)     # sends bytes to the node mempool
-    return raw.hex()                                              # built-in .hex(): bytes→"0x..."
+    tx_params = dict(tx_params)
+    if tx_params.get("nonce") is None:
+        tx_params["nonce"] = nonce_manager.allocate()
+
+    try:
+        tx = fn.build_transaction(tx_params)                      # web3: build tx dict
+    except Exception:
+        nonce_manager.release(tx_params["nonce"])
+        raise
+    return sign_and_send(tx)
@@ -1,6 +1,8 @@
 # blockchain/urls.py
 
+from django.conf import settings
 from django.urls import path
+from . import async_views
 from .views import (
     RegisterUserView,
     DepositView,
@@ -28,20 +30,32 @@ from .views import (
 
 app_name = "blockchain"
 
+# ⚡ chain-read endpoints: async views under ASGI, DRF class views otherwise
+if getattr(settings, "ASYNC_CHAIN_READS", False):
+    my_balances_view     = async_views.my_balances
+    get_user_wallet_view = async_views.get_user_wallet
+    conversion_rate_view = async_views.conversion_rate
+    wallet_confirm_view  = async_views.wallet_confirm_deposit
+else:
+    my_balances_view     = MyBalancesView.as_view()
+    get_user_wallet_view = GetUserWalletView.as_view()
+    conversion_rate_view = ConversionRateView.as_view()
+    wallet_confirm_view  = WalletConfirmDepositView.as_view()
+
 urlpatterns = [
     path('register/',        RegisterUserView.as_view(),   name='register_user'),
     path('deposit/',         DepositView.as_view(),        name='deposit'),
     path('set-wallet/',      SetUserWalletView.as_view(),  name='set_user_wallet'),
-    path('balances/me/',  MyBalancesView.as_view(),      name='my_balances'),
+    path('balances/me/',  my_balances_view,      name='my_balances'),
     path('balances/me/latest/', MyLatestSnapshotView.as_view(), name='my_latest_snapshot'),
-    path('get-wallet/',   GetUserWalletView.as_view(),   name='get_user_wallet'),
+    path('get-wallet/',   get_user_wallet_view,   name='get_user_wallet'),
     path("withdraw/request-code/", WithdrawVerifyRequestCodeView.as_view()),
     path("withdraw/verify-code/",  WithdrawVerifyCodeView.as_view()),
     path("withdraw/",              WithdrawView.as_view()),
     path( "withdraw/update-email/", WithdrawUpdateEmailView.as_view(), name="withdraw-update-email"),
     path('confirm-deposit/', ConfirmDepositView.as_view(), name='confirm-deposit'),
     path('webhooks/wert/', WertWebhookView.as_view(), name='wert-webhook'),
-    path('conversion-rate/', ConversionRateView.as_view(), name='conversion-rate'),
+    path('conversion-rate/', conversion_rate_view, name='conversion-rate'),
     path('user-transactions/', UserTransactionsView.as_view(), name='user-transactions'),
     path("report-transaction-issue/", ReportTransactionIssueView.as_view(), name="report-transaction-issue"),
     path("influencer-earnings/", InfluencerEarningsView.as_view(), name="influencer-earnings"),
@@ -51,5 +65,5 @@ urlpatterns = [
     path("guest/claim/",        GuestClaimView.as_view(),      name="guest-claim"),
     path("guest/claim/preview/", GuestClaimPreviewView.as_view()),
     # 🔥 NEW: wallet-specific confirmation endpoint (MetaMask / WalletConnect)
-    path('wallet/confirm-deposit/', WalletConfirmDepositView.as_view(), name='wallet-confirm-deposit'),
+    path('wallet/confirm-deposit/', wallet_confirm_view, name='wallet-confirm-deposit'),
 ]
@@ -1,29 +1,50 @@
 # blockchain/utils.py
 
 import json
+import logging
+from functools import lru_cache
 from django.conf import settings
 from web3 import Web3
 from web3.middleware import ExtraDataToPOAMiddleware
-from blockchain.models import ConversionRate
+from blockchain.providers import get_w3, LazyProxy, reset as _reset_providers
 
-# 1️⃣ Point at your configured provider
-w3 = Web3(Web3.HTTPProvider(settings.WEB3_PROVIDER_URL))
+logger = logging.getLogger(__name__)
 
-# 2️⃣ Inject the PoA middleware so extraData > 32 bytes is OK
-w3.middleware_onion.inject(ExtraDataToPOAMiddleware(), layer=0)
+# Nothing below talks to the node at import time: the client is built on first use by
+# blockchain.providers (pooled keep-alive session, background health check).
 
-# 3️⃣ Load your ABI & instantiate the contract once
-with open(settings.CONTRACT_ABI_PATH) as f:
-    abi = json.load(f)
 
-contract = w3.eth.contract(address=settings.CONTRACT_ADDRESS, abi=abi)
+@lru_cache(maxsize=1)
+def get_abi() -> list:
+    # 1️⃣ Load your ABI once per process
+    with open(settings.CONTRACT_ABI_PATH) as f:
+        return json.load(f)
+
+
+_contracts = {}   # id(Web3 client) → contract bound to it
+
+
+def get_contract():
+    # 2️⃣ Instantiate the contract once per client
+    client = get_w3()
+    bound  = _contracts.get(id(client))
+    if bound is None or bound.w3 is not client:
+        bound = client.eth.contract(address=settings.CONTRACT_ADDRESS, abi=get_abi())
+        _contracts[id(client)] = bound
+    return bound
 
-contract_http = contract  # alias; modules importing contract_http expect this to exist
 
+def reset_clients() -> None:
+    """Drop built clients and bound contracts, so the next call opens a fresh session (after fork)."""
+    _reset_providers()
+    _contracts.clear()
 
-# 4️⃣ Sanity check at import time
-if not w3.is_connected():
-    raise RuntimeError("Cannot connect to WEB3_PROVIDER_URL")
+
+# 3️⃣ Module-level names the rest of the code imports; resolved lazily on attribute access
+w3       = LazyProxy(get_w3)
+contract = LazyProxy(get_contract)
+
+contract_http = contract  # alias; modules importing contract_http expect this to exist
 
 
 def get_ws_contract():
@@ -48,7 +69,7 @@ def get_ws_contract():
     if not w3_ws.is_connected():
         raise RuntimeError(f"Failed to connect over websocket to {ws_url}")
 
-    contract_ws = w3_ws.eth.contract(address=settings.CONTRACT_ADDRESS, abi=abi)
+    contract_ws = w3_ws.eth.contract(address=settings.CONTRACT_ADDRESS, abi=get_abi())
     return w3_ws, contract_ws
 
 
@@ -70,6 +91,7 @@ def fetch_tx_details(tx_hash: str) -> dict:
     txn = w3.eth.get_transaction(tx_hash)
 
     return {
+        "receipt_status":      receipt.status,
         "block_number":        receipt.blockNumber,
         "transaction_index":   receipt.transactionIndex,
         "gas_used":            receipt.gasUsed,
@@ -78,13 +100,287 @@ def fetch_tx_details(tx_hash: str) -> dict:
         "to_address":          txn["to"],
         "value":               txn["value"],
         "input_data":          txn["input"],
+        **dict(zip(("fn_name", "fn_args"), decode_calldata(txn["input"]))),
     }
+
+
+@lru_cache(maxsize=1)
+def _function_selectors() -> dict:
+    # 4-byte selector → (name, [arg names], [arg types]) for every function in the ABI
+    from eth_utils import function_abi_to_4byte_selector
+    from eth_utils.abi import collapse_if_tuple
+
+    return {
+        function_abi_to_4byte_selector(e): (
+            e["name"],
+            [i["name"] for i in e.get("inputs", [])],
+            [collapse_if_tuple(i) for i in e.get("inputs", [])],
+        )
+        for e in get_abi()
+        if e.get("type") == "function"
+    }
+
+
+def _json_safe(value):
+    # uint256 / bytes → strings so the JSON column keeps them exact
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    return value
+
+
+def decode_calldata(input_data) -> tuple:
+    """
+    (fn_name, args) for calldata sent to our contract — decoded once when a ledger row is
+    written (fetch_tx_details / the event indexer), so reads never touch the ABI decoder.
+    args is JSON-ready: ints and bytes become strings. (None, None) for empty or unknown input.
+    Pure eth_abi + the cached selector map: safe to call from backfill worker processes.
+    """
+    from eth_abi import decode as abi_decode
+
+    if not input_data:
+        return None, None
+    if isinstance(input_data, str):
+        try:
+            input_data = bytes.fromhex(input_data[2:] if input_data.startswith("0x") else input_data)
+        except ValueError:
+            return None, None
+    data = bytes(input_data)
+
+    entry = _function_selectors().get(data[:4])
+    if entry is None:
+        return None, None
+    name, arg_names, arg_types = entry
+    try:
+        values = abi_decode(arg_types, data[4:])
+    except Exception:
+        return name, None
+    return name, {k: _json_safe(v) for k, v in zip(arg_names, values)}
     
     
     
 def get_current_rate_wei() -> int:
     """
-    Always returns the latest on-chain rate (in Wei) from the DB singleton.
+    Always returns the latest on-chain rate (in Wei): shared cache → DB singleton → chain,
+    kept current by `manage.py watch_rate` (see blockchain/rate_cache.py).
+    """
+    from blockchain.rate_cache import get_rate_wei
+    return get_rate_wei()
+
+RPC_BATCH_SIZE = getattr(settings, "RPC_BATCH_SIZE", 100)
+
+
+def batch_rpc(calls, chunk_size: int = RPC_BATCH_SIZE, log_errors: bool = True) -> list:
+    """
+    Send raw JSON-RPC calls as batched HTTP POSTs (chunk_size calls per POST).
+      calls: [(method, params), ...]
+    Returns the raw "result" values in the same order (None where the node had nothing).
+
+    Raw on purpose: web3's batch_requests() applies each method's null-result formatter,
+    so one not-yet-mined receipt would raise TransactionNotFound for the whole batch.
+    """
+    calls   = list(calls)
+    results = []
+    for i in range(0, len(calls), chunk_size):
+        chunk    = calls[i:i + chunk_size]
+        response = w3.provider.make_batch_request(chunk)
+        if not isinstance(response, list):
+            # a single error object means the node rejected the whole batch
+            raise RuntimeError(f"batch RPC failed: {response.get('error') if isinstance(response, dict) else response}")
+        for item in response:
+            if item.get("error") and log_errors:
+                logger.warning("batch RPC item error: %s", item["error"])
+            results.append(item.get("result"))
+    return results
+
+
+def batch_get_receipts(tx_hashes) -> dict:
+    """
+    {tx_hash: receipt-or-None} for many hashes in a few round-trips.
+    Receipts are trimmed to the fields the reconciler needs (ints, not hex).
     """
-    # built-in: Query for pk=1 row
-    return ConversionRate.objects.get(pk=1).rate_wei
\ No newline at end of file
+    tx_hashes = list(tx_hashes)
+    raw = batch_rpc([("eth_getTransactionReceipt", [h]) for h in tx_hashes])
+
+    out = {}
+    for h, rcpt in zip(tx_hashes, raw):
+        if not rcpt:
+            out[h] = None
+            continue
+        # built-in: int(x, 16) parses a hex string like "0x1a" → 26
+        out[h] = {
+            "status":       int(rcpt.get("status") or "0x0", 16),
+            "block_number": int(rcpt["blockNumber"], 16),
+            "gas_used":     int(rcpt.get("gasUsed") or "0x0", 16),
+        }
+    return out
+
+
+# ─── Batched contract reads ─────────────────────────────────────────────────────
+# eth_call per user is one HTTP round-trip per user; these pack N view calls into
+# RPC_BATCH_SIZE-sized JSON-RPC batches, or into Multicall3.aggregate3 calls
+# (MULTICALL_CHUNK sub-calls each) when MULTICALL3_ADDRESS is configured.
+
+MULTICALL3_ADDRESS = getattr(settings, "MULTICALL3_ADDRESS", "") or ""
+# aggregate3 runs each sub-call with msg.sender = the Multicall3 contract, not OWNER.
+# Only views listed here (confirmed not to gate on msg.sender) go through it; every other
+# read stays on JSON-RPC batches with from=OWNER, like our direct .call({"from": OWNER}).
+MULTICALL3_FUNCTIONS = frozenset(getattr(settings, "MULTICALL3_FUNCTIONS", ()) or ())
+MULTICALL_CHUNK    = int(getattr(settings, "MULTICALL_CHUNK", 300))
+ZERO_ADDRESS       = "0x" + "00" * 20
+
+_MULTICALL3_ABI = [{
+    "name": "aggregate3",
+    "type": "function",
+    "stateMutability": "payable",
+    "inputs": [{
+        "name": "calls",
+        "type": "tuple[]",
+        "components": [
+            {"name": "target",       "type": "address"},
+            {"name": "allowFailure", "type": "bool"},
+            {"name": "callData",     "type": "bytes"},
+        ],
+    }],
+    "outputs": [{
+        "name": "returnData",
+        "type": "tuple[]",
+        "components": [
+            {"name": "success",    "type": "bool"},
+            {"name": "returnData", "type": "bytes"},
+        ],
+    }],
+}]
+
+@lru_cache(maxsize=1)
+def _output_types() -> dict:
+    # function name → output types, e.g. "getUserBalances" → ["uint256", "uint256"]
+    return {
+        e["name"]: [o["type"] for o in e.get("outputs", [])]
+        for e in get_abi()
+        if e.get("type") == "function"
+    }
+
+
+def _decode_output(fn_name: str, data: bytes):
+    """ABI-decode a view's return data; single outputs are unwrapped, None if it can't be decoded."""
+    if not data:
+        return None
+    try:
+        values = w3.codec.decode(_output_types()[fn_name], data)
+    except Exception:
+        return None
+    return values[0] if len(values) == 1 else tuple(values)
+
+
+def _block_param(block):
+    # built-in: hex() turns an int block number into the "0x.." form JSON-RPC expects
+    return hex(block) if isinstance(block, int) else block
+
+
+def _multicall(encoded, block) -> list:
+    """[(success, returnData bytes)] for every encoded call, via Multicall3.aggregate3."""
+    mc     = w3.eth.contract(address=Web3.to_checksum_address(MULTICALL3_ADDRESS), abi=_MULTICALL3_ABI)
+    target = contract.address
+    rpc    = []
+    for i in range(0, len(encoded), MULTICALL_CHUNK):
+        chunk = encoded[i:i + MULTICALL_CHUNK]
+        data  = mc.encode_abi("aggregate3", args=[[(target, True, d) for d in chunk]])
+        rpc.append(("eth_call", [{"to": mc.address, "data": data}, _block_param(block)]))
+
+    out = []
+    for i, raw in enumerate(batch_rpc(rpc)):
+        size = min(MULTICALL_CHUNK, len(encoded) - i * MULTICALL_CHUNK)
+        if raw is None:
+            out.extend([(False, b"")] * size)
+            continue
+        (results,) = w3.codec.decode(["(bool,bytes)[]"], bytes.fromhex(raw[2:]))
+        out.extend(results)
+    return out
+
+
+def batch_call(calls, block="latest") -> list:
+    """
+    Run many view calls on our contract in a few round-trips.
+      calls: [(function_name, args), ...]  e.g. [("getUserBalances", [42]), ...]
+    Returns decoded results in the same order; None for calls that reverted
+    (e.g. unregistered user) or that the node didn't answer.
+    Functions in MULTICALL3_FUNCTIONS go through Multicall3 when it is configured.
+    """
+    calls   = [(name, list(args)) for name, args in calls]
+    encoded = [contract.encode_abi(name, args=args) for name, args in calls]
+    if not calls:
+        return []
+
+    out   = [None] * len(calls)
+    multi = [i for i, (name, _) in enumerate(calls) if MULTICALL3_ADDRESS and name in MULTICALL3_FUNCTIONS]
+    if multi:
+        results = _multicall([encoded[i] for i in multi], block)
+        for i, (ok, ret) in zip(multi, results):
+            out[i] = _decode_output(calls[i][0], ret) if ok else None
+
+    multi_set = set(multi)
+    direct    = [i for i in range(len(calls)) if i not in multi_set]
+    if direct:
+        owner = settings.OWNER_ADDRESS
+        raw   = batch_rpc(
+            [
+                ("eth_call", [{"from": owner, "to": contract.address, "data": encoded[i]}, _block_param(block)])
+                for i in direct
+            ],
+            log_errors=False,   # reverts are expected (unregistered users) → None
+        )
+        for i, r in zip(direct, raw):
+            out[i] = _decode_output(calls[i][0], bytes.fromhex(r[2:])) if r else None
+    return out
+
+
+def batch_user_balances(user_ids, block="latest") -> dict:
+    """{user_id: (tt_balance_wei, credit_balance_wei) or None if not registered}."""
+    user_ids = [int(u) for u in user_ids]
+    results  = batch_call([("getUserBalances", [u]) for u in user_ids], block=block)
+    return dict(zip(user_ids, results))
+
+
+def batch_user_wallets(user_ids, block="latest") -> dict:
+    """{user_id: checksum wallet or None if unset / not registered}."""
+    user_ids = [int(u) for u in user_ids]
+    results  = batch_call([("getUserWallet", [u]) for u in user_ids], block=block)
+    return {
+        u: (Web3.to_checksum_address(w) if w and w.lower() != ZERO_ADDRESS else None)
+        for u, w in zip(user_ids, results)
+    }
+
+
+def batch_holds(campaign_id: int, buyer_ids, block="latest") -> dict:
+    """{buyer_id: (tt_amount_wei, credit_amount_wei) or None} held for one campaign."""
+    buyer_ids = [int(b) for b in buyer_ids]
+    results   = batch_call([("getHold", [int(campaign_id), b]) for b in buyer_ids], block=block)
+    return dict(zip(buyer_ids, results))
+
+
+def batch_user_state(user_ids, block="latest") -> dict:
+    """
+    Balances + wallet per user in one pass (both reads share the same batches):
+      {user_id: {"registered", "tt_balance_wei", "credit_balance_wei", "wallet"}}
+    `registered` is inferred from getUserBalances not reverting.
+    """
+    user_ids = [int(u) for u in user_ids]
+    calls    = [("getUserBalances", [u]) for u in user_ids] + [("getUserWallet", [u]) for u in user_ids]
+    results  = batch_call(calls, block=block)
+    n        = len(user_ids)
+
+    out = {}
+    for u, bal, wallet in zip(user_ids, results[:n], results[n:]):
+        out[u] = {
+            "registered":         bal is not None,
+            "tt_balance_wei":     bal[0] if bal else 0,
+            "credit_balance_wei": bal[1] if bal else 0,
+            "wallet":             Web3.to_checksum_address(wallet) if wallet and wallet.lower() != ZERO_ADDRESS else None,
+        }
+    return out
@@ -8,10 +8,9 @@ from rest_framework.decorators import api_view, permission_classes
 from blockchain.utils import w3, contract
 from rest_framework.permissions import IsAuthenticated
 from uuid import uuid4
-from blockchain.models import Transaction, BalanceSnapshot, InfluencerTransaction, TransactionIssueReport, IssueAttachment
+from blockchain.models import Transaction, InfluencerTransaction, TransactionIssueReport, IssueAttachment
 from decimal import Decimal, InvalidOperation
 import logging
-from web3.exceptions import ContractCustomError
 from django.utils import timezone
 from datetime import timedelta
 from django.core.mail import send_mail
@@ -41,23 +40,22 @@ from celery import chain
 import base64
 from uuid import uuid4, UUID
 from blockchain.tx_utils import build_and_send as _build_and_send
+from blockchain import fee_oracle, balance_cache, withdraw_limits
 from blockchain.crypto_utils import b64u as _b64u, b64u_dec as _b64u_dec, sign as _sign
-from blockchain.tasks import withdraw_for_user_task, save_transaction_info
+from blockchain.tasks import withdraw_for_user_task, save_transaction_info, release_withdraw_reservation
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.db import IntegrityError
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.db import transaction
 from blockchain.tasks import claim_guest_after_registration, _from_wei, sync_user_wallet_on_chain
-from django.db.models import Case, When, IntegerField
+from django.db.models import IntegerField
 
 logger = logging.getLogger(__name__)
 
 OWNER        = settings.OWNER_ADDRESS
 PK           = settings.PRIVATE_KEY
 WERT_PK      = settings.WERT_SC_SIGNER_KEY
-GAS_LIMIT    = 200_000
-GAS_PRICE_GWEI = "50"
 SC_ADDRESS = settings.CONTRACT_ADDRESS
 
 
@@ -70,26 +68,6 @@ if not WERT_WEBHOOK_SECRET:
 
 DAILY_LIMIT_USDT = Decimal("500")  # product requirement
 
-def _sum_withdrawn_credits_for_date(user, day, include_pending=True) -> Decimal:
-    """
-    Sum *credits* withdrawn by `user` on date `day` (YYYY-MM-DD), as a positive Decimal.
-    If include_pending=True we count both PENDING and COMPLETED.
-    """
-    status_filter = ["pending", "completed"] if include_pending else ["completed"]
-    qs = (
-        Transaction.objects
-        .filter(
-            user=user,
-            tx_type=Transaction.WITHDRAW,
-            timestamp__date=day,
-            status__in=status_filter,
-        )
-        .annotate(abs_credits=Abs(F("credits_delta")))
-        .aggregate(total=Coalesce(Sum("abs_credits", output_field=DecimalField()), Value(0, output_field=DecimalField())))
-    )
-    return qs["total"] or Decimal(0)
-
-
 def decode_tx_input(tx_input: str):
     """
     Decode a contract call's input data into (function_name, args_dict).
@@ -141,8 +119,8 @@ class DailyWithdrawUsageView(APIView):
         limit_usdt    = DAILY_LIMIT_USDT
         limit_credits = (limit_usdt * conv_rate)
 
-        # how much used today (sum of WITHDRAW credits)
-        used_credits = _sum_withdrawn_credits_for_date(request.user, day, include_pending=True)
+        # how much used that day (pending + completed, from the per-day counter)
+        used_credits = withdraw_limits.used_credits(request.user, day)
         used_usdt    = (used_credits / conv_rate).quantize(Decimal("0.01"))
 
         # remaining
@@ -191,16 +169,8 @@ class RegisterUserView(APIView):
             return Response({"error": "user_id is required."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            chain_id = w3.eth.chain_id
-            nonce    = w3.eth.get_transaction_count(OWNER)
-            tx_params = {
-                "chainId":  chain_id,
-                "from":     OWNER,
-                "nonce":    nonce,
-                "gas":      GAS_LIMIT,
-                "gasPrice": w3.to_wei(GAS_PRICE_GWEI, "gwei"),
-            }
-            tx_hash = _build_and_send(contract.functions.registerUser(user_id), tx_params)
+            fn      = contract.functions.registerUser(user_id)
+            tx_hash = _build_and_send(fn, fee_oracle.tx_params(fn))
             return Response({"tx_hash": tx_hash})
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -225,16 +195,8 @@ class DepositView(APIView):
                             status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            chain_id = w3.eth.chain_id
-            nonce    = w3.eth.get_transaction_count(OWNER)
-            tx_params = {
-                "chainId":  chain_id,
-                "from":     OWNER,
-                "nonce":    nonce,
-                "gas":      GAS_LIMIT,
-                "gasPrice": w3.to_wei(GAS_PRICE_GWEI, "gwei"),
-            }
-            tx_hash = _build_and_send(contract.functions.deposit(user_id, amount), tx_params)
+            fn      = contract.functions.deposit(user_id, amount)
+            tx_hash = _build_and_send(fn, fee_oracle.tx_params(fn))
             return Response({"tx_hash": tx_hash})
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -284,22 +246,9 @@ class SetUserWalletView(APIView):
             return Response({"error": "Zero address is not allowed."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            chain_id = w3.eth.chain_id
-            nonce    = w3.eth.get_transaction_count(OWNER)
-
-            tx_params = {
-                "chainId":  chain_id,
-                "from":     OWNER,
-                "nonce":    nonce,
-                "gas":      GAS_LIMIT,
-                "gasPrice": w3.to_wei(GAS_PRICE_GWEI, "gwei"),
-            }
-
             # IMPORTANT: pass checksum address to contract call
-            tx_hash = _build_and_send(
-                contract.functions.setUserWallet(user_id, wallet_checksum),
-                tx_params
-            )
+            fn      = contract.functions.setUserWallet(user_id, wallet_checksum)
+            tx_hash = _build_and_send(fn, fee_oracle.tx_params(fn))
             return Response({"tx_hash": tx_hash})
 
         except Exception as e:
@@ -309,23 +258,9 @@ class MyBalancesView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user_id = int(request.user.user_id)
-        
-        try:
-            # Returns (tt_bal, credit_bal) in wei
-            tt_bal, credit_bal = contract.functions.getUserBalances(user_id).call({
-                "from": OWNER
-            })
-        except ContractCustomError:
-            # If user not registered, treat as zero
-            tt_bal, credit_bal = 0, 0
-
-        # Record a snapshot in the database (still store raw wei)
-        BalanceSnapshot.objects.create(
-            user=request.user,
-            tt_balance=tt_bal,
-            credit_balance=credit_bal
-        )
+        # Returns (tt_bal, credit_bal) in wei; one eth_call per user per block at most,
+        # and a BalanceSnapshot only when the balance moved (see blockchain/balance_cache.py)
+        tt_bal, credit_bal = balance_cache.get_balances(request.user)
 
         # Return integer token/credit counts
         return Response({
@@ -338,15 +273,14 @@ class MyLatestSnapshotView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        try:
-            snap = BalanceSnapshot.objects.filter(user=request.user).latest()
-            return Response({
-                "tt_balance":     snap.tt_balance,
-                "credit_balance": snap.credit_balance,
-                "taken_at":       snap.taken_at
-            })
-        except BalanceSnapshot.DoesNotExist:
+        snap = balance_cache.latest_snapshot(request.user)
+        if snap is None:
             return Response({"error":"no snapshot yet"}, status=404)
+        return Response({
+            "tt_balance":     snap["tt_balance"],
+            "credit_balance": snap["credit_balance"],
+            "taken_at":       snap["taken_at"]
+        })
 
 
 class GetUserWalletView(APIView):
@@ -444,14 +378,16 @@ class WithdrawView(APIView):
         limit_usdt = DAILY_LIMIT_USDT                          # 500.00
         limit_credits = (limit_usdt * conv_rate)               # e.g. 5000
 
+        # 3) reserve against today's counter: the (user, day) row is locked, so two
+        #    concurrent withdrawals can't both pass the check
         today = timezone.localdate()
-        already_today = _sum_withdrawn_credits_for_date(user, today, include_pending=True)
+        ok, already_today = withdraw_limits.reserve(user, today, credits, limit_credits)
 
         remaining_credits = limit_credits - already_today
         if remaining_credits < 0:
             remaining_credits = Decimal(0)
 
-        if Decimal(credits) > remaining_credits:
+        if not ok:
             remaining_usdt = (remaining_credits / conv_rate).quantize(Decimal("0.01"))
             return Response(
                 {
@@ -473,16 +409,21 @@ class WithdrawView(APIView):
             )
             
         amount = credits // get_current_rate_wei()
-        res = chain(
-            withdraw_for_user_task.s(user_id, credits),
-            save_transaction_info.s(
-                request.user.id,        # user_id (pos 2)
-                None,                   # campaign_id
-                Transaction.WITHDRAW,   # tx_type
-                int(amount),            # tt_amount (wei)
-                -int(credits),       # credits_delta (burn is negative)
-            ),
-        ).apply_async()
+        try:
+            res = chain(
+                withdraw_for_user_task.s(user_id, credits),
+                save_transaction_info.s(
+                    request.user.id,        # user_id (pos 2)
+                    None,                   # campaign_id
+                    Transaction.WITHDRAW,   # tx_type
+                    int(amount),            # tt_amount (wei)
+                    -int(credits),       # credits_delta (burn is negative)
+                    usage_day=str(today),   # moves the reservation pending → completed
+                ),
+            ).apply_async(link_error=release_withdraw_reservation.si(user.id, str(today), credits))
+        except Exception:
+            withdraw_limits.release(user.id, today, credits)
+            raise
 
         # 4) clear the one-time OTP flags so it can’t be reused
         vc.withdraw_email_verified = vc.withdraw_phone_verified = False
@@ -887,6 +828,11 @@ def _apply_filters_to_qs(qs, params):
     if tx_type:
         qs = qs.filter(tx_type__iexact=tx_type)
 
+    # contract function (fn_name is decoded at write time and indexed)
+    fn = params.get("fn")
+    if fn:
+        qs = qs.filter(fn_name=fn)
+
     # credits_delta range
     min_credit = params.get("min_credit")
     if min_credit is not None:
@@ -915,6 +861,7 @@ class UserTransactionsView(APIView):
         & max_credit=...
         & campaign_title=...
         & tx_type=...
+        & fn=holdForCampaign|claimPending|...
         & page=...
         & page_size=...
 
@@ -1524,149 +1471,131 @@ class WalletConfirmDepositView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # 2️⃣ Extract sender (wallet that actually paid)
-        tx_from_raw = tx.get("from")  # dict.get(): built-in — read key or return None
-        if not tx_from_raw:
-            return Response({"error": "Transaction has no 'from' field"}, status=status.HTTP_400_BAD_REQUEST)
-
-        try:
-            from_addr = Web3.to_checksum_address(tx_from_raw)
-            # Web3.to_checksum_address: web3 helper – normalizes and EIP-55 checks an address
-        except Exception:
-            from_addr = tx_from_raw  # fall back to whatever we got
-
-        # 3️⃣ Check that tx was sent to *our* contract
-        to_addr = (tx["to"] or "").lower()   # dict access + str.lower(): built-in
-        if not to_addr or to_addr != SC_ADDRESS.lower():
-            return Response(
-                {"error": "Transaction was not sent to the MYF contract"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        payload, code = confirm_wallet_deposit(user, tx_hash, tx, raw_amount)
+        return Response(payload, status=code)
 
-        # 4️⃣ Decode called function + args
-        try:
-            fn_name, args = decode_tx_input(tx["input"])
-            # tx["input"]: raw calldata hex string
-        except Exception as e:
-            logger.exception("wallet-confirm: decode_input failed")
-            return Response(
-                {"error": f"Could not decode transaction input: {e}"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
 
-        allowed_fns = {"walletDeposit", "depositFromWallet", "deposit"}  # set(): built-in unique collection
-        if fn_name not in allowed_fns:
-            return Response(
-                {
-                    "error": (
-                        f"Unexpected function '{fn_name}' for wallet deposit; "
-                        f"expected one of {', '.join(sorted(allowed_fns))}"
-                    )
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+def confirm_wallet_deposit(user, tx_hash: str, tx, raw_amount):
+    """
+    Steps 2️⃣–9️⃣ of WalletConfirmDepositView once the tx is fetched (shared with the
+    async view in blockchain/async_views.py). Returns (payload, http_status).
+    """
+    # 2️⃣ Extract sender (wallet that actually paid)
+    tx_from_raw = tx.get("from")  # dict.get(): built-in — read key or return None
+    if not tx_from_raw:
+        return {"error": "Transaction has no 'from' field"}, status.HTTP_400_BAD_REQUEST
 
-        # 5️⃣ Make sure calldata userId matches logged-in MYF user
-        try:
-            myf_user_id = int(user.user_id)  # int(): built-in – parse string → int
-        except Exception:
-            return Response(
-                {"error": "User has no valid on-chain user_id"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+    try:
+        from_addr = Web3.to_checksum_address(tx_from_raw)
+        # Web3.to_checksum_address: web3 helper – normalizes and EIP-55 checks an address
+    except Exception:
+        from_addr = tx_from_raw  # fall back to whatever we got
 
-        arg_user_id = None
-        for key in ("userId", "user_id", "uid"):  # for: built-in loop over possible keys
-            if key in args:                       # "in": built-in membership test on dict keys
-                arg_user_id = int(args[key])
-                break
+    # 3️⃣ Check that tx was sent to *our* contract
+    to_addr = (tx["to"] or "").lower()   # dict access + str.lower(): built-in
+    if not to_addr or to_addr != SC_ADDRESS.lower():
+        return {"error": "Transaction was not sent to the MYF contract"}, status.HTTP_400_BAD_REQUEST
 
-        if arg_user_id is not None and arg_user_id != myf_user_id:
-            return Response(
-                {"error": "Transaction userId does not match authenticated user"},
-                status=status.HTTP_400_BAD_REQUEST,
+    # 4️⃣ Decode called function + args
+    try:
+        fn_name, args = decode_tx_input(tx["input"])
+        # tx["input"]: raw calldata hex string
+    except Exception as e:
+        logger.exception("wallet-confirm: decode_input failed")
+        return {"error": f"Could not decode transaction input: {e}"}, status.HTTP_400_BAD_REQUEST
+
+    allowed_fns = {"walletDeposit", "depositFromWallet", "deposit"}  # set(): built-in unique collection
+    if fn_name not in allowed_fns:
+        return {
+            "error": (
+                f"Unexpected function '{fn_name}' for wallet deposit; "
+                f"expected one of {', '.join(sorted(allowed_fns))}"
             )
+        }, status.HTTP_400_BAD_REQUEST
 
-        # 6️⃣ Extract amount in wei from calldata
-        arg_amount_wei = None
-        for key in ("amountWei", "amount", "valueWei"):
-            if key in args:
-                arg_amount_wei = int(args[key])   # int(): built-in – string/Decimal → int
-                break
-
-        if arg_amount_wei is None:
-            return Response(
-                {"error": "Could not determine deposit amount from transaction"},
-                status=status.HTTP_400_BAD_REQUEST,
+    # 5️⃣ Make sure calldata userId matches logged-in MYF user
+    try:
+        myf_user_id = int(user.user_id)  # int(): built-in – parse string → int
+    except Exception:
+        return {"error": "User has no valid on-chain user_id"}, status.HTTP_400_BAD_REQUEST
+
+    arg_user_id = None
+    for key in ("userId", "user_id", "uid"):  # for: built-in loop over possible keys
+        if key in args:                       # "in": built-in membership test on dict keys
+            arg_user_id = int(args[key])
+            break
+
+    if arg_user_id is not None and arg_user_id != myf_user_id:
+        return {"error": "Transaction userId does not match authenticated user"}, status.HTTP_400_BAD_REQUEST
+
+    # 6️⃣ Extract amount in wei from calldata
+    arg_amount_wei = None
+    for key in ("amountWei", "amount", "valueWei"):
+        if key in args:
+            arg_amount_wei = int(args[key])   # int(): built-in – string/Decimal → int
+            break
+
+    if arg_amount_wei is None:
+        return {"error": "Could not determine deposit amount from transaction"}, status.HTTP_400_BAD_REQUEST
+
+    # Optional sanity: body "amount" must match decoded amount
+    if raw_amount is not None:
+        try:
+            fe_amount = int(raw_amount)
+        except (TypeError, ValueError):
+            return {"error": "Invalid amount in request body"}, status.HTTP_400_BAD_REQUEST
+        if fe_amount != arg_amount_wei:
+            return {"error": "Amount in request body does not match tx input"}, status.HTTP_400_BAD_REQUEST
+
+    # 7️⃣ Update user's saved wallet (DB) + detect mismatch (for FE notice)
+    existing = (user.wallet_address or "").strip()  # or "": built-in ternary-like pattern
+    wallet_mismatch = False
+
+    if existing:
+        if existing.lower() != from_addr.lower():
+            # don't block, just mark and log
+            wallet_mismatch = True
+            logger.info(
+                "wallet-confirm: user %s deposit from different wallet %s (saved=%s)",
+                user.id, from_addr, existing
             )
+    else:
+        # first time we see a wallet → save it
+        user.wallet_address = from_addr
+        user.save(update_fields=["wallet_address"])
+        # save(update_fields=...): Django built-in – UPDATE only given fields
 
-        # Optional sanity: body "amount" must match decoded amount
-        if raw_amount is not None:
-            try:
-                fe_amount = int(raw_amount)
-            except (TypeError, ValueError):
-                return Response(
-                    {"error": "Invalid amount in request body"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            if fe_amount != arg_amount_wei:
-                return Response(
-                    {"error": "Amount in request body does not match tx input"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-        # 7️⃣ Update user's saved wallet (DB) + detect mismatch (for FE notice)
-        existing = (user.wallet_address or "").strip()  # or "": built-in ternary-like pattern
-        wallet_mismatch = False
-
-        if existing:
-            if existing.lower() != from_addr.lower():
-                # don't block, just mark and log
-                wallet_mismatch = True
-                logger.info(
-                    "wallet-confirm: user %s deposit from different wallet %s (saved=%s)",
-                    user.id, from_addr, existing
-                )
-        else:
-            # first time we see a wallet → save it
-            user.wallet_address = from_addr
-            user.save(update_fields=["wallet_address"])
-            # save(update_fields=...): Django built-in – UPDATE only given fields
-
-            # fire best-effort on-chain sync (non-blocking)
-            try:
-                sync_user_wallet_on_chain.delay(myf_user_id, from_addr)
-            except Exception:
-                logger.exception("wallet-confirm: failed to enqueue sync_user_wallet_on_chain")
-
-        # 8️⃣ Convert TT wei → TT units + credits
-        tt_amount_wei = int(arg_amount_wei)
-        conv_rate = int(get_current_rate_wei())        # int(): guard against Decimal/str
-        credits_wei = tt_amount_wei * conv_rate        # *: built-in arbitrary-precision multiply
-
-        tt_amount_dec = _from_wei(tt_amount_wei, token_decimals=18, places=2)
-        credits_dec   = _from_wei(credits_wei,  token_decimals=18, places=2)
-
-        # 9️⃣ Enqueue indexer; it will fetch receipt and persist metadata + wallet
-        save_transaction_info.delay(
-            tx_hash,
-            user.id,
-            None,
-            Transaction.DEPOSIT,
-            str(tt_amount_dec),
-            str(credits_dec),
-            tt_amount_wei=str(tt_amount_wei),
-            credits_delta_wei=str(credits_wei),
-            wallet_address=from_addr,  # IMPORTANT: wallet that actually paid
-        )
+        # fire best-effort on-chain sync (non-blocking)
+        try:
+            sync_user_wallet_on_chain.delay(myf_user_id, from_addr)
+        except Exception:
+            logger.exception("wallet-confirm: failed to enqueue sync_user_wallet_on_chain")
+
+    # 8️⃣ Convert TT wei → TT units + credits
+    tt_amount_wei = int(arg_amount_wei)
+    conv_rate = int(get_current_rate_wei())        # int(): guard against Decimal/str
+    credits_wei = tt_amount_wei * conv_rate        # *: built-in arbitrary-precision multiply
+
+    tt_amount_dec = _from_wei(tt_amount_wei, token_decimals=18, places=2)
+    credits_dec   = _from_wei(credits_wei,  token_decimals=18, places=2)
+
+    # 9️⃣ Enqueue indexer; it will fetch receipt and persist metadata + wallet
+    save_transaction_info.delay(
+        tx_hash,
+        user.id,
+        None,
+        Transaction.DEPOSIT,
+        str(tt_amount_dec),
+        str(credits_dec),
+        tt_amount_wei=str(tt_amount_wei),
+        credits_delta_wei=str(credits_wei),
+        wallet_address=from_addr,  # IMPORTANT: wallet that actually paid
+    )
 
-        return Response(
-            {
-                "message": "Wallet deposit recorded; awaiting on-chain confirmation.",
-                "tt_amount": str(tt_amount_dec),
-                "credits_delta": str(credits_dec),
-                "wallet_used": from_addr,
-                "wallet_mismatch": wallet_mismatch,  # FE can show a small warning
-            },
-            status=status.HTTP_201_CREATED,
-        )
\ No newline at end of file
+    return {
+        "message": "Wallet deposit recorded; awaiting on-chain confirmation.",
+        "tt_amount": str(tt_amount_dec),
+        "credits_delta": str(credits_dec),
+        "wallet_used": from_addr,
+        "wallet_mismatch": wallet_mismatch,  # FE can show a small warning
+    }, status.HTTP_201_CREATED
\ No newline at end of file
@@ -0,0 +1,174 @@
+# blockchain/watchdog.py
+"""
+Stuck-transaction watchdog.
+
+An underpriced OWNER tx blocks every later nonce. Every broadcast is tracked as a
+PendingTransaction (nonce + unsigned payload + fees); when one has been waiting longer
+than TX_BUMP_AFTER_SECONDS, we re-sign the same payload/nonce with fees raised by at
+least TX_BUMP_PERCENT (nodes reject replacements below +10%) and broadcast it.
+
+The new row inherits the continuation and the family's first_seen_at; the old row is
+marked REPLACED → replaced_by. DB rows already carrying the old hash are remapped
+(reconciler.remap_tx_hash), and save_* tasks resolve reconciler.current_hash().
+Runs inside the reconciler loop (`manage.py reconcile_pending_txs`).
+
+cancel(row) is the reconciler's last resort for a tx that timed out with its nonce still
+unused: a 0-value self-send at bumped fees takes the nonce so the retry can't double up.
+"""
+
+import logging
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from web3 import Web3
+
+from blockchain.models import PendingTransaction
+from blockchain.reconciler import remap_tx_hash
+
+logger = logging.getLogger(__name__)
+
+OWNER = settings.OWNER_ADDRESS
+
+BUMP_AFTER_SECONDS = int(getattr(settings, "TX_BUMP_AFTER_SECONDS", 180))
+BUMP_PERCENT       = float(getattr(settings, "TX_BUMP_PERCENT", 12.5))
+MAX_BUMPS          = int(getattr(settings, "TX_MAX_BUMPS", 5))
+# hard ceiling so a fee spike can't drain the OWNER account
+BUMP_MAX_FEE_WEI   = Web3.to_wei(getattr(settings, "TX_BUMP_MAX_FEE_GWEI", 200), "gwei")
+
+
+def _bump(value, floor=0) -> int:
+    # built-in: math.ceil so +12.5% never rounds down below the node's replacement threshold
+    return max(int(math.ceil(int(value or 0) * (1 + BUMP_PERCENT / 100))) + 1, int(floor or 0))
+
+
+def _bumped_payload(payload: dict) -> dict:
+    """Same tx, same nonce, fees raised ≥ BUMP_PERCENT and at least today's oracle fees."""
+    from blockchain import fee_oracle
+
+    tx      = dict(payload)
+    current = fee_oracle.fees()
+
+    if "maxFeePerGas" in tx:
+        tip     = _bump(tx.get("maxPriorityFeePerGas"), current.get("maxPriorityFeePerGas"))
+        max_fee = _bump(tx["maxFeePerGas"], current.get("maxFeePerGas"))
+        tx["maxPriorityFeePerGas"] = tip
+        tx["maxFeePerGas"]         = max(max_fee, tip)
+    else:
+        tx["gasPrice"] = _bump(tx.get("gasPrice"), current.get("gasPrice") or current.get("maxFeePerGas"))
+    return tx
+
+
+def _fee_of(tx: dict) -> int:
+    return int(tx.get("maxFeePerGas", tx.get("gasPrice", 0)) or 0)
+
+
+def bump_stuck_transactions(limit: int = 50) -> dict:
+    """
+    One watchdog pass: re-broadcast every pending OWNER tx older than BUMP_AFTER_SECONDS
+    whose nonce hasn't been mined yet. Returns counters for logging.
+    """
+    from blockchain.tx_utils import broadcast
+    from blockchain.utils import w3
+
+    stats  = {"bumped": 0, "skipped": 0, "failed": 0}
+    now    = timezone.now()
+    cutoff = now - timedelta(seconds=BUMP_AFTER_SECONDS)
+
+    with transaction.atomic():
+        rows = list(
+            PendingTransaction.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                status=PendingTransaction.PENDING,
+                nonce__isnull=False,
+                payload__isnull=False,
+                created_at__lt=cutoff,
+                bumps__lt=MAX_BUMPS,
+                cancelled_at__isnull=True,   # the reconciler replaced it with a cancel
+            )
+            .order_by("nonce")[:limit]
+        )
+        if not rows:
+            return stats
+
+        # nonces below the mined count are already included (by some hash of the family);
+        # the reconciler will resolve which one
+        mined_count = w3.eth.get_transaction_count(OWNER, "latest")
+
+        for row in rows:
+            if row.nonce < mined_count:
+                stats["skipped"] += 1
+                continue
+
+            new_tx = _bumped_payload(row.payload)
+            if _fee_of(new_tx) > BUMP_MAX_FEE_WEI:
+                logger.warning("tx %s (nonce %s) would exceed the bump fee cap; leaving it", row.tx_hash, row.nonce)
+                stats["skipped"] += 1
+                continue
+
+            try:
+                new_hash = broadcast(new_tx)
+            except Exception as exc:
+                msg = str(exc).lower()
+                if "nonce too low" in msg or "already known" in msg:
+                    stats["skipped"] += 1   # mined / already replaced meanwhile
+                else:
+                    logger.exception("fee bump for %s (nonce %s) failed", row.tx_hash, row.nonce)
+                    stats["failed"] += 1
+                continue
+
+            successor = PendingTransaction.objects.create(
+                tx_hash              = new_hash,
+                kind                 = row.kind,
+                on_success           = row.on_success,
+                on_failure           = row.on_failure,
+                args                 = row.args,
+                kwargs               = row.kwargs,
+                nonce                = row.nonce,
+                payload              = new_tx,
+                max_fee_per_gas      = new_tx.get("maxFeePerGas", new_tx.get("gasPrice")),
+                priority_fee_per_gas = new_tx.get("maxPriorityFeePerGas"),
+                bumps                = row.bumps + 1,
+                replaced_hashes      = list(row.replaced_hashes or []) + [row.tx_hash],
+                first_seen_at        = row.first_seen_at or row.created_at,
+            )
+            row.status      = PendingTransaction.REPLACED
+            row.replaced_by = successor
+            row.resolved_at = now
+            row.save(update_fields=["status", "replaced_by", "resolved_at"])
+
+            remap_tx_hash(row.tx_hash, new_hash)
+            logger.info(
+                "bumped nonce %s: %s → %s (fee %s → %s wei)",
+                row.nonce, row.tx_hash, new_hash, _fee_of(row.payload), _fee_of(new_tx),
+            )
+            stats["bumped"] += 1
+
+    return stats
+
+
+def cancel(row: PendingTransaction) -> str:
+    """
+    Replace the (unmined) tx of `row` with a 0-value self-send on the same nonce; returns the
+    cancel's hash. Fees are bumped over the family's newest payload. No BUMP_MAX_FEE_WEI cap:
+    21000 gas bounds the cost, and a stuck nonce blocks every later OWNER tx.
+    """
+    from blockchain import fee_oracle
+    from blockchain.tx_utils import broadcast
+
+    fees = _bumped_payload(row.payload or {})
+    tx   = {
+        "chainId": fee_oracle.chain_id(),
+        "from":    OWNER,
+        "to":      OWNER,
+        "value":   0,
+        "gas":     21_000,
+        "nonce":   row.nonce,
+    }
+    for key in ("maxFeePerGas", "maxPriorityFeePerGas", "gasPrice"):
+        if key in fees:
+            tx[key] = fees[key]
+    return broadcast(tx)
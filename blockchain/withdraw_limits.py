@@ -0,0 +1,134 @@
+# blockchain/withdraw_limits.py
+"""
+Daily withdrawal limit bookkeeping on WithdrawalDailyUsage (one row per user per day).
+
+  - used_credits(user, day)            pending + completed credits: one unique-index read
+  - reserve(user, day, credits, limit) WithdrawView's limit check: locks the (user, day) row,
+                                       rejects if it would go over, otherwise adds to pending.
+                                       Two concurrent withdrawals serialize on the row lock.
+  - complete(user_id, day, credits)    save_transaction_info recorded the WITHDRAW row →
+                                       pending → completed
+  - release(user_id, day, credits)     the withdraw chain failed → give the reservation back
+  - rebuild(since, until)              recompute completed_credits from Transaction rows
+                                       (manage.py rebuild_withdraw_usage)
+
+`day` may be a date or an ISO string (that's how it travels through celery args).
+"""
+
+import logging
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import DecimalField, Sum, Value
+from django.db.models.functions import Abs, Coalesce, TruncDate
+from django.utils.dateparse import parse_date
+
+from blockchain.models import Transaction, WithdrawalDailyUsage
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal(0)
+
+
+def _day(day) -> date:
+    return day if isinstance(day, date) else parse_date(str(day))
+
+
+def used_credits(user, day) -> Decimal:
+    row = (
+        WithdrawalDailyUsage.objects
+        .filter(user=user, day=_day(day))
+        .values_list("pending_credits", "completed_credits")
+        .first()
+    )
+    return sum(row, ZERO) if row else ZERO
+
+
+def reserve(user, day, credits, limit_credits) -> tuple:
+    """
+    (ok, used_before): reserve `credits` against today's limit.
+    When ok is False nothing was written and used_before is what's already counted.
+    """
+    credits = Decimal(credits)
+    with db_transaction.atomic():
+        WithdrawalDailyUsage.objects.get_or_create(user=user, day=_day(day))
+        # get_or_create can't lock → re-read the row FOR UPDATE
+        row  = WithdrawalDailyUsage.objects.select_for_update().get(user=user, day=_day(day))
+        used = row.used_credits
+        if used + credits > limit_credits:
+            return False, used
+        row.pending_credits += credits
+        row.save(update_fields=["pending_credits", "updated_at"])
+    return True, used
+
+
+def complete(user_id: int, day, credits) -> None:
+    """Move a reservation to completed; never moves more than is pending, so a retried save can't double count."""
+    credits = Decimal(credits)
+    with db_transaction.atomic():
+        row, _ = WithdrawalDailyUsage.objects.select_for_update().get_or_create(user_id=user_id, day=_day(day))
+        moved = min(credits, row.pending_credits)
+        if not moved:
+            return
+        row.pending_credits   -= moved
+        row.completed_credits += moved
+        row.save(update_fields=["pending_credits", "completed_credits", "updated_at"])
+
+
+def release(user_id: int, day, credits) -> None:
+    credits = Decimal(credits)
+    with db_transaction.atomic():
+        row = WithdrawalDailyUsage.objects.select_for_update().filter(user_id=user_id, day=_day(day)).first()
+        if row is None or not row.pending_credits:
+            return
+        row.pending_credits -= min(credits, row.pending_credits)
+        row.save(update_fields=["pending_credits", "updated_at"])
+
+
+def rebuild(since, until, reset_pending: bool = False) -> int:
+    """
+    Recompute completed_credits for [since, until] from COMPLETED WITHDRAW Transaction rows
+    (one grouped aggregate). pending_credits is kept unless reset_pending. Returns rows written.
+    """
+    since, until = _day(since), _day(until)
+    totals = {
+        (r["user_id"], r["day"]): r["total"]
+        for r in (
+            Transaction.objects
+            .filter(
+                tx_type=Transaction.WITHDRAW,
+                status=Transaction.COMPLETED,
+                timestamp__date__gte=since,
+                timestamp__date__lte=until,
+            )
+            .annotate(day=TruncDate("timestamp"))
+            .values("user_id", "day")
+            .annotate(total=Coalesce(
+                Sum(Abs("credits_delta"), output_field=DecimalField()),
+                Value(0, output_field=DecimalField()),
+            ))
+        )
+    }
+
+    with db_transaction.atomic():
+        existing = {
+            (row.user_id, row.day): row
+            for row in WithdrawalDailyUsage.objects.select_for_update().filter(day__gte=since, day__lte=until)
+        }
+        to_update, to_create = [], []
+        for key, row in existing.items():
+            row.completed_credits = totals.get(key, ZERO)
+            if reset_pending:
+                row.pending_credits = ZERO
+            to_update.append(row)
+        for (user_id, day), total in totals.items():
+            if (user_id, day) not in existing:
+                to_create.append(WithdrawalDailyUsage(user_id=user_id, day=day, completed_credits=total))
+
+        WithdrawalDailyUsage.objects.bulk_update(to_update, ["completed_credits", "pending_credits"], batch_size=500)
+        WithdrawalDailyUsage.objects.bulk_create(to_create, batch_size=500)
+        written = len(to_update) + len(to_create)
+
+    logger.info("withdraw usage rebuilt %s..%s: %d rows", since, until, written)
+    return written
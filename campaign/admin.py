@@ -8,7 +8,12 @@ from campaign.models import (
     CampaignWinner,
     MediaFile,  # <-- Added MediaFile
     EscrowRecord,
-    CreditSpend
+    CreditSpend,
+    CampaignInventory,
+    CampaignFanInventory,
+    WinnerDraw,
+    CampaignDailyStats,
+    OpenCampaignIndex,
 )
 
 @admin.register(Campaign)
@@ -140,4 +145,88 @@ class CreditSpendAdmin(admin.ModelAdmin):
     )
     list_filter = ('spend_type', 'timestamp', 'user')
     search_fields = ('user__username', 'campaign__title', 'spend_type')
-    ordering = ('-timestamp',)
\ No newline at end of file
+    ordering = ('-timestamp',)
+
+
+@admin.register(CampaignInventory)
+class CampaignInventoryAdmin(admin.ModelAdmin):
+    list_display = (
+        'campaign',
+        'paid_sold',
+        'free_entries',
+        'participants',
+        'updated_at',
+    )
+    search_fields = ('campaign__title',)
+    raw_id_fields = ('campaign',)
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(CampaignFanInventory)
+class CampaignFanInventoryAdmin(admin.ModelAdmin):
+    list_display = (
+        'campaign',
+        'fan',
+        'units',
+        'spent',
+        'free_entry_used',
+        'updated_at',
+    )
+    search_fields = ('campaign__title', 'fan__username')
+    raw_id_fields = ('campaign', 'fan')
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(WinnerDraw)
+class WinnerDrawAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'campaign',
+        'seed',
+        'slots',
+        'candidates',
+        'total_weight',
+        'created_at',
+    )
+    search_fields = ('campaign__title', 'seed')
+    raw_id_fields = ('campaign',)
+    readonly_fields = ('created_at',)
+    ordering = ('-created_at',)
+
+
+@admin.register(CampaignDailyStats)
+class CampaignDailyStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        'campaign',
+        'day',
+        'payment_method',
+        'participations',
+        'paid_entries',
+        'free_entries',
+        'revenue',
+        'participants',
+    )
+    list_filter = ('payment_method', 'day')
+    search_fields = ('campaign__title',)
+    raw_id_fields = ('campaign',)
+    readonly_fields = ('updated_at',)
+    ordering = ('-day',)
+
+
+@admin.register(OpenCampaignIndex)
+class OpenCampaignIndexAdmin(admin.ModelAdmin):
+    list_display = (
+        'campaign',
+        'campaign_type',
+        'deadline',
+        'remaining_stock',
+        'like_count',
+        'participant_count',
+        'trending_score',
+        'updated_at',
+    )
+    list_filter = ('campaign_type',)
+    search_fields = ('campaign__title',)
+    raw_id_fields = ('campaign', 'owner')
+    readonly_fields = ('updated_at',)
+    ordering = ('-trending_score',)
@@ -0,0 +1,37 @@
+# campaign/identity_map.py
+"""
+Per-request identity map of concrete campaign rows (TicketCampaign / MediaSellingCampaign /
+MeetAndGreetCampaign) keyed by pk, used by Campaign.specific_campaign() and prefetch_specific().
+
+The same campaign resolved twice in one request (serializer validate → perform_participation →
+Participation.save → inventory) is loaded once and shared as one object.
+campaign.middleware.CampaignIdentityMapMiddleware opens a fresh map per request; outside a
+request (celery, shell) get() misses and only the per-instance memo applies, unless the caller
+opens a scope() itself.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("campaign_identity_map", default=None)
+
+
+def get(pk):
+    current = _current.get()
+    return current.get(pk) if current is not None else None
+
+
+def put(obj) -> None:
+    current = _current.get()
+    if current is not None:
+        current[obj.pk] = obj
+
+
+@contextmanager
+def scope():
+    # built-in: ContextVar.set() returns a token so nested scopes restore the outer map
+    token = _current.set({})
+    try:
+        yield
+    finally:
+        _current.reset(token)
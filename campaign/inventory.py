@@ -0,0 +1,180 @@
+# campaign/inventory.py
+"""
+O(1) stock accounting on CampaignInventory / CampaignFanInventory.
+
+  - reserve(participation)      Participation.save() on insert, inside its savepoint: conditional
+                                UPDATE ... WHERE paid_sold + n <= total (plus the per-fan limit /
+                                one free entry per fan), so parallel purchases can't oversell.
+                                Raises SoldOut / FanLimitReached / FreeEntryUsed.
+  - for_campaign(campaign)      the campaign's counter row
+  - for_fan(campaign, fan_id)   the fan's counter row
+  - fan_counts(campaign, fan_id) the same values without creating a row (validation, display)
+  - remaining(campaign)         stock left for paid purchases
+  - rebuild(campaign)           recompute both from Participation rows
+                                (manage.py rebuild_campaign_inventory)
+
+Rows are created on first use from one aggregate over the campaign's participations.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from campaign.models import CampaignFanInventory, CampaignInventory, Participation
+
+# tickets_purchased for ticket / meet & greet, media_purchased for media selling
+UNITS = Coalesce(F("tickets_purchased"), F("media_purchased"), Value(0))
+
+# fan rows that stand for a real participation (validation used to create zero rows
+# for fans who only checked their limit)
+PARTICIPATED = Q(units__gt=0) | Q(free_entry_used=True)
+
+
+class InventoryError(Exception):
+    """A purchase the counters refuse; str() is the message shown to the fan."""
+
+
+class SoldOut(InventoryError):
+    pass
+
+
+class FanLimitReached(InventoryError):
+    pass
+
+
+class FreeEntryUsed(InventoryError):
+    pass
+
+
+def total(campaign) -> int:
+    """Stock of a specific campaign (TicketCampaign / MeetAndGreetCampaign / MediaSellingCampaign)."""
+    return getattr(campaign, "total_tickets", None) or getattr(campaign, "total_media", None) or 0
+
+
+def _noun(campaign) -> str:
+    return "media files" if campaign.campaign_type == "media_selling" else "tickets"
+
+
+def _campaign_totals(campaign_id: int) -> dict:
+    return Participation.objects.filter(campaign_id=campaign_id).aggregate(
+        paid_sold=Coalesce(Sum(UNITS, filter=Q(is_free_entry=False)), 0),
+        free_entries=Coalesce(Sum(UNITS, filter=Q(is_free_entry=True)), 0),
+        participants=Count("fan", distinct=True),
+    )
+
+
+def _fan_totals(campaign_id: int, fan_id: int) -> dict:
+    agg = Participation.objects.filter(campaign_id=campaign_id, fan_id=fan_id).aggregate(
+        units=Coalesce(Sum(UNITS), 0),
+        spent=Coalesce(Sum("amount"), Value(0), output_field=CampaignFanInventory._meta.get_field("spent")),
+        free=Count("pk", filter=Q(is_free_entry=True)),
+    )
+    return {"units": agg["units"], "spent": agg["spent"], "free_entry_used": bool(agg["free"])}
+
+
+def for_campaign(campaign) -> CampaignInventory:
+    try:
+        # reverse one-to-one: no query when the caller select_related("inventory")
+        return campaign.inventory
+    except CampaignInventory.DoesNotExist:
+        inv, _ = CampaignInventory.objects.get_or_create(
+            campaign_id=campaign.pk, defaults=_campaign_totals(campaign.pk)
+        )
+        return inv
+
+
+def for_fan(campaign, fan_id: int) -> CampaignFanInventory:
+    row = CampaignFanInventory.objects.filter(campaign_id=campaign.pk, fan_id=fan_id).first()
+    if row is None:
+        row, _ = CampaignFanInventory.objects.get_or_create(
+            campaign_id=campaign.pk, fan_id=fan_id, defaults=_fan_totals(campaign.pk, fan_id)
+        )
+    return row
+
+
+def fan_counts(campaign, fan_id: int) -> CampaignFanInventory:
+    """The fan's counter row, or an unsaved one built from the aggregate: never writes."""
+    row = CampaignFanInventory.objects.filter(campaign_id=campaign.pk, fan_id=fan_id).first()
+    if row is None:
+        row = CampaignFanInventory(campaign_id=campaign.pk, fan_id=fan_id, **_fan_totals(campaign.pk, fan_id))
+    return row
+
+
+def remaining(campaign) -> int:
+    return max(0, total(campaign) - for_campaign(campaign).paid_sold)
+
+
+def reserve(participation) -> tuple:
+    """
+    (specific campaign, refreshed CampaignInventory) after counting `participation`.
+    Call inside the transaction that inserts it: a failed reservation raises and the
+    savepoint rolls the counters back with the row.
+    """
+    campaign = participation.campaign.specific_campaign()
+    units    = participation.tickets_purchased or participation.media_purchased or 0
+    free     = participation.is_free_entry
+    noun     = _noun(campaign)
+
+    for_campaign(campaign)
+    fan_row = for_fan(campaign, participation.fan_id)
+
+    # 1) per-fan row: one free entry / ticket_limit_per_fan. The fan counts as a new participant
+    #    only if the UPDATE that moves the row off zero is the one that matched: a parallel first
+    #    purchase blocks on the row lock, re-checks the WHERE and falls through to the plain UPDATE.
+    fan_qs = CampaignFanInventory.objects.filter(pk=fan_row.pk)
+    spent  = F("spent") + (participation.amount or 0)
+    if free:
+        fan_qs  = fan_qs.filter(free_entry_used=False)
+        changes = {"units": F("units") + units, "spent": spent, "free_entry_used": True}
+    else:
+        limit = campaign.ticket_limit_per_fan
+        if limit:
+            fan_qs = fan_qs.filter(units__lte=limit - units)
+        changes = {"units": F("units") + units, "spent": spent}
+    first_buy = bool(fan_qs.filter(units=0, free_entry_used=False).update(**changes))
+    if not first_buy and not fan_qs.update(**changes):
+        if free:
+            raise FreeEntryUsed("You already used your free entry for this campaign.")
+        left = max(0, limit - CampaignFanInventory.objects.get(pk=fan_row.pk).units)
+        raise FanLimitReached(f"You can only purchase {left} more {noun} for this campaign.")
+
+    # 2) campaign row: WHERE paid_sold + units <= total
+    inv_qs  = CampaignInventory.objects.filter(pk=campaign.pk)
+    changes = {"participants": F("participants") + 1} if first_buy else {}
+    if free:
+        inv_qs.update(free_entries=F("free_entries") + units, **changes)
+    elif not inv_qs.filter(paid_sold__lte=total(campaign) - units).update(paid_sold=F("paid_sold") + units, **changes):
+        left = max(0, total(campaign) - CampaignInventory.objects.get(pk=campaign.pk).paid_sold)
+        raise SoldOut(f"Only {left} {noun} are available.")
+
+    return campaign, CampaignInventory.objects.get(pk=campaign.pk)
+
+
+def rebuild(campaign) -> CampaignInventory:
+    """Recompute the campaign's counters and all its fan rows from Participation."""
+    fans = (
+        Participation.objects
+        .filter(campaign_id=campaign.pk)
+        .values("fan_id")
+        .annotate(
+            units=Coalesce(Sum(UNITS), 0),
+            spent=Coalesce(Sum("amount"), Value(0), output_field=CampaignFanInventory._meta.get_field("spent")),
+            free=Count("pk", filter=Q(is_free_entry=True)),
+        )
+    )
+    with transaction.atomic():
+        inv, _ = CampaignInventory.objects.update_or_create(
+            campaign_id=campaign.pk, defaults=_campaign_totals(campaign.pk)
+        )
+        CampaignFanInventory.objects.filter(campaign_id=campaign.pk).delete()
+        CampaignFanInventory.objects.bulk_create(
+            [
+                CampaignFanInventory(
+                    campaign_id=campaign.pk, fan_id=f["fan_id"], units=f["units"], spent=f["spent"],
+                    free_entry_used=bool(f["free"]),
+                )
+                for f in fans
+            ],
+            batch_size=1000,
+        )
+    return inv
@@ -0,0 +1,69 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from campaign import winners
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the weighted winner draw: synthetic entries (sampler only, against the old "
+        "per-row np.random.choice draw) or a real campaign (SQL aggregation + sampler, nothing written)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entries", type=int, default=1_000_000, help="Synthetic candidate fans")
+        parser.add_argument("--slots", type=int, default=10, help="Winners per draw")
+        parser.add_argument("--chunk", type=int, default=winners.CHUNK, help="Candidates per sampler chunk")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+        parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic data and the draws")
+        parser.add_argument("--campaign", type=int, help="Time a dry-run draw of this campaign instead")
+        parser.add_argument("--no-baseline", action="store_true", help="Skip the np.random.choice baseline")
+
+    def handle(self, *args, **opts):
+        if opts["slots"] <= 0 or opts["chunk"] <= 0 or opts["repeat"] <= 0:
+            raise CommandError("--slots, --chunk and --repeat must be positive")
+        if opts["campaign"]:
+            return self._campaign(opts)
+
+        n, k, chunk = opts["entries"], opts["slots"], opts["chunk"]
+        data = np.random.default_rng(opts["seed"])
+        ids, weights = np.arange(1, n + 1, dtype=np.int64), data.integers(1, 20, size=n).astype(np.float64)
+
+        def chunks():
+            for i in range(0, n, chunk):
+                yield ids[i:i + chunk], weights[i:i + chunk]
+
+        secs, result = self._best(opts["repeat"], lambda: winners.sample(chunks(), k, np.random.default_rng(opts["seed"])))
+        self.stdout.write(
+            f"es-exponential: {n} fans, k={k}, chunk={chunk}: {secs * 1000:.1f} ms "
+            f"({n / secs / 1e6:.1f} M candidates/s) winners={result[0][:5]}..."
+        )
+        if opts["no_baseline"] or k >= n:
+            return
+        probs = weights / weights.sum()
+        secs, _ = self._best(
+            opts["repeat"],
+            lambda: np.random.default_rng(opts["seed"]).choice(n, size=k, replace=False, p=probs),
+        )
+        self.stdout.write(f"np.random.choice baseline (in memory, no chunking): {secs * 1000:.1f} ms")
+
+    def _campaign(self, opts):
+        started = time.perf_counter()
+        record  = winners.draw(opts["campaign"], seed=opts["seed"], persist=False)
+        secs    = time.perf_counter() - started
+        self.stdout.write(
+            f"campaign {opts['campaign']}: {record.candidates} candidates, total weight {record.total_weight}, "
+            f"k={record.slots}: {secs * 1000:.1f} ms (dry run) winners={record.winners}"
+        )
+
+    @staticmethod
+    def _best(repeat, fn):
+        best, result = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result  = fn()
+            secs    = time.perf_counter() - started
+            best    = secs if best is None else min(best, secs)
+        return best, result
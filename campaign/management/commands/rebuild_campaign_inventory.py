@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from campaign import inventory
+from campaign.models import Campaign
+
+
+class Command(BaseCommand):
+    help = "Recompute CampaignInventory / CampaignFanInventory counters from Participation rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--campaign", type=int, action="append", help="Only these campaign ids (repeatable)")
+        parser.add_argument("--open-only", action="store_true", help="Skip closed campaigns")
+
+    def handle(self, *args, **opts):
+        qs = Campaign.objects.order_by("pk")
+        if opts["campaign"]:
+            qs = qs.filter(pk__in=opts["campaign"])
+        if opts["open_only"]:
+            qs = qs.filter(is_closed=False)
+
+        done = 0
+        for campaign in qs.iterator(chunk_size=500):
+            inv = inventory.rebuild(campaign)
+            done += 1
+            self.stdout.write(
+                f"campaign {campaign.pk}: sold={inv.paid_sold} free={inv.free_entries} participants={inv.participants}"
+            )
+        self.stdout.write(f"{done} campaigns rebuilt")
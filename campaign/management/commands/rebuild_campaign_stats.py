@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from campaign import stats
+from campaign.models import Campaign
+
+
+class Command(BaseCommand):
+    help = "Recompute the CampaignDailyStats rollup from Participation rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--campaign", type=int, action="append", help="Only these campaign ids (repeatable)")
+        parser.add_argument("--open-only", action="store_true", help="Skip closed campaigns")
+
+    def handle(self, *args, **opts):
+        qs = Campaign.objects.order_by("pk")
+        if opts["campaign"]:
+            qs = qs.filter(pk__in=opts["campaign"])
+        if opts["open_only"]:
+            qs = qs.filter(is_closed=False)
+
+        done = rows = 0
+        for campaign in qs.iterator(chunk_size=500):
+            written = stats.rebuild(campaign)
+            done += 1
+            rows += written
+            self.stdout.write(f"campaign {campaign.pk}: {written} daily rows")
+        self.stdout.write(f"{done} campaigns rebuilt, {rows} daily rows")
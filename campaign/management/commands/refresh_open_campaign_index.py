@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from campaign import open_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild OpenCampaignIndex: recompute every open campaign's row and drop closed / expired ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=open_index.CHUNK, help="Campaigns recomputed per batch")
+        parser.add_argument("--campaign", type=int, action="append", help="Only these campaign ids (repeatable)")
+
+    def handle(self, *args, **opts):
+        if opts["chunk"] <= 0:
+            raise CommandError("--chunk must be positive")
+        if opts["campaign"]:
+            kept = open_index.refresh(opts["campaign"])
+            self.stdout.write(f"{kept} of {len(opts['campaign'])} campaigns indexed as open")
+            return
+        result = open_index.refresh_all(opts["chunk"])
+        self.stdout.write(f"{result['rows']} open campaigns indexed, {result['dropped']} stale rows dropped")
@@ -0,0 +1,20 @@
+# campaign/middleware.py
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.decorators import sync_and_async_middleware
+
+from campaign import identity_map
+
+
+@sync_and_async_middleware
+def CampaignIdentityMapMiddleware(get_response):
+    """One campaign identity map per request (see campaign/identity_map.py); works under WSGI and ASGI."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            with identity_map.scope():
+                return await get_response(request)
+    else:
+        def middleware(request):
+            with identity_map.scope():
+                return get_response(request)
+    return middleware
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.4 on 2026-10-17 03:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaign', '0020_remove_campaign_task_id_escrowrecord_task_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignInventory',
+            fields=[
+                ('campaign', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inventory', serialize=False, to='campaign.campaign')),
+                ('paid_sold', models.PositiveIntegerField(default=0)),
+                ('free_entries', models.PositiveIntegerField(default=0)),
+                ('participants', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CampaignFanInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('units', models.PositiveIntegerField(default=0)),
+                ('free_entry_used', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fan_inventory', to='campaign.campaign')),
+                ('fan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='campaign_inventory', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='campaignfaninventory',
+            constraint=models.UniqueConstraint(fields=('campaign', 'fan'), name='uniq_campaign_fan_inventory'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.4 on 2026-10-17 03:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaign', '0021_campaigninventory_campaignfaninventory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WinnerDraw',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seed', models.PositiveBigIntegerField()),
+                ('algorithm', models.CharField(default='es-exponential', max_length=32)),
+                ('slots', models.PositiveIntegerField()),
+                ('candidates', models.PositiveIntegerField()),
+                ('total_weight', models.PositiveBigIntegerField()),
+                ('winners', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='winner_draws', to='campaign.campaign')),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.4 on 2026-10-17 03:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaign', '0022_winnerdraw'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('payment_method', models.CharField(max_length=20)),
+                ('participations', models.PositiveIntegerField(default=0)),
+                ('paid_entries', models.PositiveIntegerField(default=0)),
+                ('free_entries', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('participants', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='campaign.campaign')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='campaigndailystats',
+            constraint=models.UniqueConstraint(fields=('campaign', 'day', 'payment_method'), name='uniq_campaign_daily_stats'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.4 on 2026-10-17 03:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaign', '0023_campaigndailystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaignfaninventory',
+            name='spent',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddIndex(
+            model_name='campaignfaninventory',
+            index=models.Index(fields=['campaign', '-units', 'fan'], name='fan_inv_by_units'),
+        ),
+        migrations.AddIndex(
+            model_name='campaignfaninventory',
+            index=models.Index(fields=['campaign', '-spent', 'fan'], name='fan_inv_by_spent'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+BATCH = 1000
+
+
+def backfill_fan_inventory(apps, schema_editor):
+    # ParticipantsView lists CampaignFanInventory rows only, so fans who bought before the
+    # counters existed need theirs; same grouping as campaign.inventory.rebuild().
+    # Participation.is_free_entry isn't in the migration state: a free entry is the one
+    # ParticipationSerializer saves with payment_method "free" at zero cost.
+    Participation        = apps.get_model("campaign", "Participation")
+    CampaignFanInventory = apps.get_model("campaign", "CampaignFanInventory")
+
+    fans = (
+        Participation.objects
+        .values("campaign_id", "fan_id")
+        .annotate(
+            units=Coalesce(Sum(Coalesce(F("tickets_purchased"), F("media_purchased"), Value(0))), 0),
+            spent=Coalesce(Sum("amount"), Value(0), output_field=CampaignFanInventory._meta.get_field("spent")),
+            free=Count("pk", filter=Q(payment_method="free", amount=0)),
+        )
+        .order_by()
+    )
+    rows = []
+    for f in fans.iterator(chunk_size=BATCH):
+        rows.append(CampaignFanInventory(
+            campaign_id=f["campaign_id"], fan_id=f["fan_id"], units=f["units"], spent=f["spent"],
+            free_entry_used=bool(f["free"]),
+        ))
+        if len(rows) >= BATCH:
+            # built-in: ignore_conflicts → rows already built on first use are left as they are
+            CampaignFanInventory.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    CampaignFanInventory.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaign', '0024_campaignfaninventory_spent_and_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_fan_inventory, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.4 on 2026-10-17 03:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaign', '0025_backfill_fan_inventory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpenCampaignIndex',
+            fields=[
+                ('campaign', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='open_index', serialize=False, to='campaign.campaign')),
+                ('campaign_type', models.CharField(max_length=20)),
+                ('deadline', models.DateTimeField()),
+                ('created_at', models.DateTimeField()),
+                ('remaining_stock', models.IntegerField(default=0)),
+                ('like_count', models.PositiveIntegerField(default=0)),
+                ('participant_count', models.PositiveIntegerField(default=0)),
+                ('trending_score', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='opencampaignindex',
+            index=models.Index(fields=['-created_at'], name='open_idx_newest'),
+        ),
+        migrations.AddIndex(
+            model_name='opencampaignindex',
+            index=models.Index(fields=['-trending_score'], name='open_idx_trending'),
+        ),
+        migrations.AddIndex(
+            model_name='opencampaignindex',
+            index=models.Index(fields=['deadline'], name='open_idx_deadline'),
+        ),
+    ]
@@ -6,10 +6,33 @@ from decimal import Decimal
 from django.db import transaction
 from django.utils import timezone
 from .utils import generate_presigned_s3_url
+from campaign import identity_map
 from blockchain.tasks import release_all_holds_for_campaign_task
 import mimetypes
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+class CampaignQuerySet(models.QuerySet):
+    """Campaign querysets; .with_specific() loads the concrete subclasses when evaluated."""
+    _with_specific = False
+
+    def with_specific(self):
+        """Resolve specific_campaign() for every row at evaluation time: one query per campaign type."""
+        clone = self._chain()
+        clone._with_specific = True
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._with_specific = self._with_specific
+        return clone
+
+    def _fetch_all(self):
+        fetching = self._result_cache is None
+        super()._fetch_all()
+        if fetching and self._with_specific and self._result_cache and isinstance(self._result_cache[0], Campaign):
+            prefetch_specific(self._result_cache)
+
+
 class Campaign(models.Model):
     
     CAMPAIGN_TYPE_CHOICES = [
@@ -72,6 +95,8 @@ class Campaign(models.Model):
         related_name="liked_campaigns"
     )
 
+    objects = CampaignQuerySet.as_manager()
+
 
     def close_campaign(self):
         """Mark the campaign as closed and select winners if required."""
@@ -93,14 +118,24 @@ class Campaign(models.Model):
         return f"{self.title} - {'Closed' if self.is_closed else 'Active'}"
     
     def specific_campaign(self):
-        """Returns the campaign as its correct subclass."""
-        if self.campaign_type == 'ticket':
-            return TicketCampaign.objects.get(id=self.id)
-        elif self.campaign_type == 'media_selling':
-            return MediaSellingCampaign.objects.get(id=self.id)
-        elif self.campaign_type == 'meet_greet':
-            return MeetAndGreetCampaign.objects.get(id=self.id)
-        return self  # If it's a base campaign
+        """
+        Returns the campaign as its correct subclass. Memoized on the instance and in the
+        per-request identity map (campaign/identity_map.py); prefetch_specific() fills both
+        for a whole list.
+        """
+        if type(self) is not Campaign:
+            return self  # already the subclass
+        specific = self.__dict__.get("_specific")
+        if specific is None:
+            model = CAMPAIGN_MODELS.get(self.campaign_type)
+            if model is None:
+                return self  # If it's a base campaign
+            specific = identity_map.get(self.pk)
+            if specific is None:
+                specific = model.objects.get(id=self.id)
+                identity_map.put(specific)
+            self._specific = specific
+        return specific
 
 
 class TicketCampaign(Campaign):
@@ -117,6 +152,40 @@ class MeetAndGreetCampaign(Campaign):
     total_tickets = models.PositiveIntegerField()
 
 
+CAMPAIGN_MODELS = {
+    'ticket':        TicketCampaign,
+    'media_selling': MediaSellingCampaign,
+    'meet_greet':    MeetAndGreetCampaign,
+}
+
+
+def prefetch_specific(campaigns, *related) -> list:
+    """
+    Resolve specific_campaign() for many base campaigns: one query per campaign type
+    (select_related(*related) on each), memoized on every instance. Returns the list.
+    """
+    campaigns = list(campaigns)
+    wanted    = {}
+    for c in campaigns:
+        if type(c) is not Campaign or "_specific" in c.__dict__ or c.campaign_type not in CAMPAIGN_MODELS:
+            continue
+        hit = identity_map.get(c.pk)
+        if hit is not None:
+            c._specific = hit
+        else:
+            wanted.setdefault(c.campaign_type, set()).add(c.pk)
+
+    loaded = {}
+    for campaign_type, pks in wanted.items():
+        for obj in CAMPAIGN_MODELS[campaign_type].objects.filter(pk__in=pks).select_related(*related):
+            identity_map.put(obj)
+            loaded[obj.pk] = obj
+    for c in campaigns:
+        if c.pk in loaded:
+            c._specific = loaded[c.pk]
+    return campaigns
+
+
 class Participation(models.Model):
     PAYMENT_METHOD_CHOICES = [
         ('credit_card', 'Credit Card'),
@@ -142,28 +211,133 @@ class Participation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
-        # ⛔ do NOT consume stock for free entries
-        if isinstance(self.campaign, MediaSellingCampaign):
-            if self.media_purchased and not self.is_free_entry:      # 👈 guard
-                self.campaign.total_media -= self.media_purchased
-                self.campaign.save()
+        from campaign import inventory, open_index, stats
 
-        super().save(*args, **kwargs)
+        is_new = self._state.adding
+        with transaction.atomic():
+            # ⛔ stock is reserved on the counter rows (campaign/inventory.py), not by editing
+            #    total_media; free entries never consume stock. Raises InventoryError if it can't.
+            campaign_specific, counters = inventory.reserve(self) if is_new else (None, None)
+            super().save(*args, **kwargs)
+            if is_new:
+                stats.record(self)
+                open_index.on_sale(campaign_specific, counters)
 
         # Auto-close (tickets/meets): only paid purchases count toward goal
-        campaign_specific = self.campaign.specific_campaign()
+        if counters is None or self.is_free_entry:
+            return
         if campaign_specific.campaign_type in ['ticket', 'meet_greet'] and campaign_specific.auto_close_on_goal_met:
-            total_paid = sum(
-                p.tickets_purchased or 0
-                for p in campaign_specific.participations.filter(is_free_entry=False)  # 👈 only paid
-            )
-            if total_paid >= campaign_specific.total_tickets:
+            if counters.paid_sold >= campaign_specific.total_tickets:
                 campaign_specific.close_campaign()
                 seller_id = int(campaign_specific.user.user_id)
                 def _dispatch():
                     release_all_holds_for_campaign_task.delay(campaign_specific.id, seller_id)
                 transaction.on_commit(_dispatch)
 
+
+class CampaignInventory(models.Model):
+    """
+    Denormalized sales counters for one campaign, maintained by campaign/inventory.py.
+      - paid_sold:    tickets (ticket / meet & greet) or media items (media selling) sold
+      - free_entries: NPN free entries (never consume stock)
+      - participants: distinct fans with at least one participation
+    """
+    campaign     = models.OneToOneField(Campaign, on_delete=models.CASCADE, primary_key=True, related_name="inventory")
+    paid_sold    = models.PositiveIntegerField(default=0)
+    free_entries = models.PositiveIntegerField(default=0)
+    participants = models.PositiveIntegerField(default=0)
+    updated_at   = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Inventory({self.campaign_id}) sold={self.paid_sold} free={self.free_entries}"
+
+
+class CampaignFanInventory(models.Model):
+    """
+    Per-(campaign, fan) counters: units bought (paid + free, for ticket_limit_per_fan), credits
+    spent and the free-entry flag. Also the participants list (indexed by entries / spending).
+    """
+    campaign        = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name="fan_inventory")
+    fan             = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="campaign_inventory")
+    units           = models.PositiveIntegerField(default=0)
+    spent           = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    free_entry_used = models.BooleanField(default=False)
+    updated_at      = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["campaign", "fan"], name="uniq_campaign_fan_inventory")]
+        indexes = [
+            # keyset pages of ParticipantsView: ORDER BY units / spent DESC, fan_id
+            models.Index(fields=["campaign", "-units", "fan"], name="fan_inv_by_units"),
+            models.Index(fields=["campaign", "-spent", "fan"], name="fan_inv_by_spent"),
+        ]
+
+    def __str__(self):
+        return f"FanInventory({self.campaign_id}, {self.fan_id}) units={self.units}"
+
+
+class OpenCampaignIndex(models.Model):
+    """
+    One narrow row per open campaign: what the Explore / Suggested feeds scan
+    (maintained by campaign/open_index.py on writes and by refresh_open_campaign_index).
+      - remaining_stock: total - paid sold (0 → sold out)
+      - trending_score:  recent buyers + likes, decayed by age (see open_index.trending)
+    Closed / expired campaigns have no row.
+    """
+    campaign          = models.OneToOneField(Campaign, on_delete=models.CASCADE, primary_key=True, related_name="open_index")
+    owner             = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    campaign_type     = models.CharField(max_length=20)
+    deadline          = models.DateTimeField()
+    created_at        = models.DateTimeField()
+    remaining_stock   = models.IntegerField(default=0)
+    like_count        = models.PositiveIntegerField(default=0)
+    participant_count = models.PositiveIntegerField(default=0)
+    trending_score    = models.FloatField(default=0)
+    updated_at        = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # feed range scans (cursor pagination: ORDER BY created_at / trending_score DESC)
+            models.Index(fields=["-created_at"], name="open_idx_newest"),
+            models.Index(fields=["-trending_score"], name="open_idx_trending"),
+            models.Index(fields=["deadline"], name="open_idx_deadline"),
+        ]
+
+    def __str__(self):
+        return f"OpenCampaignIndex({self.campaign_id}) left={self.remaining_stock} score={self.trending_score:.3f}"
+
+
+class CampaignDailyStats(models.Model):
+    """
+    Daily sales rollup per campaign and payment method, maintained by campaign/stats.py
+    (Participation.save() on insert) and read by the engagement dashboard.
+      - participations: participation rows (paid + free)
+      - paid_entries:   tickets / media items bought
+      - free_entries:   NPN free entries
+      - revenue:        sum of Participation.amount
+      - participants:   distinct paying fans of the campaign that day, each counted on the
+                        method of their first purchase (sums over methods stay distinct)
+    Rebuilt from Participation rows by `manage.py rebuild_campaign_stats`.
+    """
+    campaign       = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name="daily_stats")
+    day            = models.DateField()
+    payment_method = models.CharField(max_length=20)
+    participations = models.PositiveIntegerField(default=0)
+    paid_entries   = models.PositiveIntegerField(default=0)
+    free_entries   = models.PositiveIntegerField(default=0)
+    revenue        = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    participants   = models.PositiveIntegerField(default=0)
+    updated_at     = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["campaign", "day", "payment_method"], name="uniq_campaign_daily_stats")
+        ]
+
+    def __str__(self):
+        return f"DailyStats({self.campaign_id}, {self.day}, {self.payment_method}) paid={self.paid_entries}"
+
+
 class CampaignWinner(models.Model):
     campaign = models.ForeignKey(
         Campaign, on_delete=models.CASCADE, related_name="winners"
@@ -177,6 +351,26 @@ class CampaignWinner(models.Model):
         return f"{self.fan.username} won {self.campaign.title}"
 
 
+class WinnerDraw(models.Model):
+    """
+    Audit record of one weighted winner draw (campaign/winners.py).
+    Re-running the sampler over the same candidates with `seed` reproduces `winners`.
+      - candidates / total_weight: eligible fans and the sum of their weights
+      - winners:                   drawn fan ids, best key first
+    """
+    campaign     = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name="winner_draws")
+    seed         = models.PositiveBigIntegerField()
+    algorithm    = models.CharField(max_length=32, default="es-exponential")
+    slots        = models.PositiveIntegerField()
+    candidates   = models.PositiveIntegerField()
+    total_weight = models.PositiveBigIntegerField()
+    winners      = models.JSONField(default=list, blank=True)
+    created_at   = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"WinnerDraw({self.campaign_id}) seed={self.seed} winners={len(self.winners)}"
+
+
 class MediaFile(models.Model):
     campaign = models.ForeignKey(
         MediaSellingCampaign, on_delete=models.CASCADE, related_name="media_files"
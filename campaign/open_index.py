@@ -0,0 +1,146 @@
+# campaign/open_index.py
+"""
+OpenCampaignIndex maintenance: one row per open (not closed, not expired) campaign.
+
+Write paths keep it current:
+  - on_sale(campaign, counters)  Participation.save() on insert: remaining stock / participants
+                                 straight from the inventory counters (one UPDATE)
+  - on_like(campaign_ids)        likes added / removed (m2m_changed in campaign/signals.py)
+  - refresh(campaign_ids)        campaign created / edited / closed (post_save, after commit)
+  - drop(campaign_ids)           closed in bulk by close_expired_chunk()
+
+refresh_all() (task refresh_open_campaign_index) recomputes every row in chunks: trending
+scores move with time, expired campaigns drop out, and anything a write path missed is fixed.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from campaign.models import Campaign, OpenCampaignIndex, Participation
+
+CHUNK           = int(getattr(settings, "OPEN_INDEX_REFRESH_CHUNK", 1000))
+TRENDING_WINDOW = timedelta(hours=int(getattr(settings, "OPEN_INDEX_TRENDING_HOURS", 24)))
+GRAVITY         = 1.5
+
+UNITS = Coalesce(F("tickets_purchased"), F("media_purchased"), Value(0))
+TOTAL = Coalesce(
+    F("ticketcampaign__total_tickets"),
+    F("meetandgreetcampaign__total_tickets"),
+    F("mediasellingcampaign__total_media"),
+    Value(0),
+)
+FIELDS = ("owner", "campaign_type", "deadline", "created_at", "remaining_stock",
+          "like_count", "participant_count", "trending_score")
+
+
+def trending(recent_buyers: int, likes: int, created_at, now) -> float:
+    """Recent buyers count double, likes once; decays with age like a news ranking."""
+    age_hours = max(0.0, (now - created_at).total_seconds() / 3600)
+    return (2 * recent_buyers + likes) / (age_hours + 2) ** GRAVITY
+
+
+def refresh(campaign_ids) -> int:
+    """Recompute the rows of `campaign_ids` (a handful of grouped queries); returns rows kept."""
+    ids = list(campaign_ids)
+    if not ids:
+        return 0
+    now = timezone.now()
+
+    base = list(
+        Campaign.objects
+        .filter(pk__in=ids, is_closed=False, deadline__gt=now)
+        .values("pk", "user_id", "campaign_type", "deadline", "created_at")
+        .annotate(total=TOTAL)
+    )
+    open_ids = [c["pk"] for c in base]
+    sales = {
+        s["campaign_id"]: s
+        for s in (
+            Participation.objects
+            .filter(campaign_id__in=open_ids)
+            .values("campaign_id")
+            .annotate(
+                paid=Coalesce(Sum(UNITS, filter=Q(is_free_entry=False)), 0),
+                participants=Count("fan", distinct=True),
+                recent=Count("fan", distinct=True, filter=Q(created_at__gte=now - TRENDING_WINDOW)),
+            )
+            .order_by()
+        )
+    } if open_ids else {}
+    likes = dict(
+        Campaign.likes.through.objects
+        .filter(campaign_id__in=open_ids)
+        .values("campaign_id")
+        .annotate(n=Count("pk"))
+        .values_list("campaign_id", "n")
+        .order_by()
+    ) if open_ids else {}
+
+    rows = []
+    for c in base:
+        s = sales.get(c["pk"], {})
+        rows.append(OpenCampaignIndex(
+            campaign_id=c["pk"],
+            owner_id=c["user_id"],
+            campaign_type=c["campaign_type"],
+            deadline=c["deadline"],
+            created_at=c["created_at"],
+            remaining_stock=max(0, (c["total"] or 0) - s.get("paid", 0)),
+            like_count=likes.get(c["pk"], 0),
+            participant_count=s.get("participants", 0),
+            trending_score=trending(s.get("recent", 0), likes.get(c["pk"], 0), c["created_at"], now),
+        ))
+
+    with transaction.atomic():
+        OpenCampaignIndex.objects.filter(campaign_id__in=set(ids) - set(open_ids)).delete()
+        # built-in: bulk upsert → INSERT ... ON CONFLICT (campaign_id) DO UPDATE
+        OpenCampaignIndex.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=["campaign"], update_fields=FIELDS,
+        )
+    return len(rows)
+
+
+def on_sale(campaign, counters) -> None:
+    """After inventory.reserve(): `campaign` is the specific instance, `counters` its CampaignInventory."""
+    from campaign.inventory import total
+
+    OpenCampaignIndex.objects.filter(campaign_id=campaign.pk).update(
+        remaining_stock=max(0, total(campaign) - counters.paid_sold),
+        participant_count=counters.participants,
+    )
+
+
+def on_like(campaign_ids) -> None:
+    for campaign_id in campaign_ids:
+        OpenCampaignIndex.objects.filter(campaign_id=campaign_id).update(
+            like_count=Campaign.likes.through.objects.filter(campaign_id=campaign_id).count()
+        )
+
+
+def drop(campaign_ids) -> int:
+    return OpenCampaignIndex.objects.filter(campaign_id__in=list(campaign_ids)).delete()[0]
+
+
+def refresh_all(chunk: int = CHUNK) -> dict:
+    """Drop expired / closed rows, then recompute every open campaign chunk by chunk."""
+    now     = timezone.now()
+    dropped = OpenCampaignIndex.objects.filter(Q(deadline__lte=now) | Q(campaign__is_closed=True)).delete()[0]
+
+    kept, last = 0, 0
+    while True:
+        ids = list(
+            Campaign.objects
+            .filter(pk__gt=last, is_closed=False, deadline__gt=now)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:chunk]
+        )
+        if not ids:
+            break
+        kept += refresh(ids)
+        last  = ids[-1]
+    return {"rows": kept, "dropped": dropped}
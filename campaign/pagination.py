@@ -1,10 +1,78 @@
 # campaign/pagination.py
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
 
-class SuggestedCampaignPagination(PageNumberPagination):
-    # PageNumberPagination: DRF built-in paginator that reads ?page=1, ?page=2 ...
-    page_size = 20
 
-    # allow client to override per request: ?page_size=10
+class OpenCampaignCursorPagination(CursorPagination):
+    # CursorPagination: DRF built-in keyset paginator (?cursor=...), no COUNT / OFFSET;
+    # pages are range scans over OpenCampaignIndex's ordering indexes
+    page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 50
+    ordering = ("-created_at", "-campaign_id")
+    trending_ordering = ("-trending_score", "-campaign_id")
+
+
+class KeysetPagination:
+    """
+    Keyset ("seek") pages over an ORDER BY <field> DESC, <tie> ASC queryset:
+    ?cursor=<opaque> continues after the last row of the previous page, so deep pages
+    cost the same as the first one (no OFFSET). The cursor is base64 JSON of (value, tie).
+    """
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    cursor_query_param = "cursor"
+
+    def __init__(self, field: str, tie: str = "pk"):
+        self.field, self.tie = field, tie
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode(self, raw):
+        try:
+            value, tie = json.loads(base64.urlsafe_b64decode(raw.encode()).decode())
+            value, tie = Decimal(value), int(tie)
+        except (ValueError, TypeError, InvalidOperation, binascii.Error):
+            value = None
+        if value is None or not value.is_finite():
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+        return value, tie
+
+    def encode(self, value, tie) -> str:
+        return base64.urlsafe_b64encode(json.dumps([str(value), tie]).encode()).decode()
+
+    def paginate_queryset(self, queryset, request) -> list:
+        """Rows of the requested page; self.next is the URL of the following one (or None)."""
+        self.request = request
+        size = self.get_page_size(request)
+        raw  = request.query_params.get(self.cursor_query_param)
+        if raw:
+            value, tie = self.decode(raw)
+            # built-in: Q(a) | Q(b) → WHERE field < value OR (field = value AND tie > last)
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__lt": value}) | Q(**{self.field: value, f"{self.tie}__gt": tie})
+            )
+        rows = list(queryset.order_by(f"-{self.field}", self.tie)[:size + 1])
+        self.next = None
+        if len(rows) > size:
+            rows = rows[:size]
+            last = rows[-1]
+            self.next = replace_query_param(
+                request.build_absolute_uri(),
+                self.cursor_query_param,
+                self.encode(getattr(last, self.field), getattr(last, self.tie)),
+            )
+        return rows
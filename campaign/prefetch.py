@@ -0,0 +1,130 @@
+# campaign/prefetch.py
+"""
+Batch context for campaign serializers: everything the per-campaign SerializerMethodFields
+used to query one object at a time, computed once for a whole page in a fixed number of
+grouped queries.
+
+  - build(campaigns, viewer)      CampaignBatch for a page (specific instances, owners +
+                                  profiles, inventory rows, media files and their access)
+  - lookup(context, campaign)     the batch in serializer context that covers `campaign`, or None
+
+Serializers read context["campaign_batch"] and fall back to their old per-object query
+for anything the batch doesn't cover. CampaignListSerializer builds the batch itself when
+a page is serialized with many=True, so views need no changes; a view can also build it
+and pass it in the context.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+
+from campaign.models import (
+    Campaign,
+    CampaignInventory,
+    CampaignWinner,
+    MediaAccess,
+    MediaFile,
+    Participation,
+    prefetch_specific,
+)
+from profileapp.models import Follower, FollowRequest
+
+CONTEXT_KEY = "campaign_batch"
+
+
+class CampaignBatch:
+    """Per-page values keyed by campaign id (owner id for the follow flags)."""
+
+    def __init__(self, ids, viewer_id=None):
+        self.ids                = set(ids)
+        self.viewer_id          = viewer_id
+        self.likes_count        = {}
+        self.liked              = set()
+        self.participated       = set()
+        self.participants_count = {}
+        self.winners_count      = {}
+        self.media_files        = {}
+        self.accessible_media   = set()
+        self.following          = set()    # owners the viewer follows
+        self.followed_by        = set()    # owners following the viewer
+        self.pending_requests   = set()    # owners with a pending request from the viewer
+
+    def __contains__(self, campaign_id):
+        return campaign_id in self.ids
+
+
+def _grouped_count(qs, key="campaign_id") -> dict:
+    return dict(qs.values(key).annotate(n=Count("pk")).values_list(key, "n").order_by())
+
+
+def build(campaigns, viewer=None) -> CampaignBatch:
+    """
+    Prefetch a page of campaigns (base or specific instances). Mutates the instances:
+    specific_campaign() is memoized, .user / .user.profile and the inventory row are cached.
+    """
+    campaigns = prefetch_specific(campaigns)
+    ids       = [c.pk for c in campaigns]
+    viewer_id = viewer.pk if viewer is not None and viewer.is_authenticated else None
+    batch     = CampaignBatch(ids, viewer_id)
+    if not ids:
+        return batch
+
+    # owners + profiles: one query, set on base and specific instances
+    owners = get_user_model().objects.select_related("profile").in_bulk({c.user_id for c in campaigns})
+    inventories = CampaignInventory.objects.in_bulk(ids)
+    cache_inventory = Campaign.inventory.related.set_cached_value
+    for c in campaigns:
+        for obj in (c, c.specific_campaign()):
+            if c.user_id in owners:
+                obj.user = owners[c.user_id]
+            if c.pk in inventories:
+                cache_inventory(obj, inventories[c.pk])
+
+    likes = Campaign.likes.through.objects.filter(campaign_id__in=ids)
+    batch.likes_count        = _grouped_count(likes)
+    batch.participants_count = _grouped_count(Participation.objects.filter(campaign_id__in=ids, fan__is_active=True))
+    batch.winners_count      = _grouped_count(CampaignWinner.objects.filter(campaign_id__in=ids, fan__is_active=True))
+
+    specific = {c.pk: c.specific_campaign() for c in campaigns}
+    media    = [c.pk for c in campaigns if c.campaign_type == "media_selling"]
+    if media:
+        for f in MediaFile.objects.filter(campaign_id__in=media).order_by("pk"):
+            f.campaign = specific[f.campaign_id]
+            batch.media_files.setdefault(f.campaign_id, []).append(f)
+
+    if viewer_id is None:
+        return batch
+
+    user_column = f"{Campaign.likes.field.m2m_reverse_field_name()}_id"
+    batch.liked = set(likes.filter(**{user_column: viewer_id}).values_list("campaign_id", flat=True))
+    batch.participated = set(
+        Participation.objects.filter(campaign_id__in=ids, fan_id=viewer_id).values_list("campaign_id", flat=True)
+    )
+    file_ids = [f.pk for files in batch.media_files.values() for f in files]
+    if file_ids:
+        batch.accessible_media = set(
+            MediaAccess.objects.filter(user_id=viewer_id, media_file_id__in=file_ids).values_list("media_file_id", flat=True)
+        )
+
+    owner_ids = {c.user_id for c in campaigns}
+    batch.following = set(
+        Follower.objects.filter(follower_id=viewer_id, user_id__in=owner_ids).values_list("user_id", flat=True)
+    )
+    batch.followed_by = set(
+        Follower.objects.filter(follower_id__in=owner_ids, user_id=viewer_id).values_list("follower_id", flat=True)
+    )
+    batch.pending_requests = set(
+        FollowRequest.objects
+        .filter(sender_id=viewer_id, receiver_id__in=owner_ids, status="pending")
+        .values_list("receiver_id", flat=True)
+    )
+    return batch
+
+
+def lookup(context, campaign):
+    batch = context.get(CONTEXT_KEY)
+    return batch if batch is not None and campaign.pk in batch else None
+
+
+def viewer(context):
+    request = context.get("request")
+    return getattr(request, "user", None)
@@ -1,6 +1,7 @@
 # compaign/serializers.py
 
 from rest_framework import serializers
+from django.db import models
 from .models import Campaign, TicketCampaign, MediaSellingCampaign, MediaAccess, MeetAndGreetCampaign, Participation, CampaignWinner, MediaFile
 from django.utils import timezone 
 from django.contrib.auth import get_user_model
@@ -10,10 +11,10 @@ import logging
 from api.models import Profile
 from profileapp.models import FollowRequest, Follower
 from .utils import generate_presigned_s3_url
+from campaign import inventory, prefetch
 from django.core.signing import TimestampSigner, BadSignature, SignatureExpired
 from django.urls import reverse
 from django.conf import settings
-from django.db.models import Sum
 
 signer = TimestampSigner(salt=getattr(settings, "MEDIA_TOKEN_SALT", "media-access"))
 
@@ -46,7 +47,60 @@ class ProfileCampaignSerializer(serializers.ModelSerializer):
         model = Profile
         fields = ('id', 'name', 'profile_picture')  # add or remove fields as needed
 
-class BaseCampaignSerializer(serializers.ModelSerializer):
+class CampaignListSerializer(serializers.ListSerializer):
+    """
+    many=True over campaigns: builds the page's CampaignBatch (campaign/prefetch.py) once,
+    so the per-campaign fields below read it instead of querying per object.
+    """
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        batch = self.context.get(prefetch.CONTEXT_KEY)
+        if batch is None or any(c.pk not in batch for c in items):
+            self.context[prefetch.CONTEXT_KEY] = prefetch.build(items, prefetch.viewer(self.context))
+        return super().to_representation(items)
+
+
+class CampaignBatchFieldsMixin:
+    """likes / participation fields shared by the campaign serializers; batch first, query as fallback."""
+
+    def get_likes_count(self, obj):
+        batch = prefetch.lookup(self.context, obj)
+        if batch is not None:
+            return batch.likes_count.get(obj.pk, 0)
+        return obj.likes.count()
+
+    def get_liked_by_user(self, obj):
+        request = self.context.get("request", None)
+        if request and request.user.is_authenticated:
+            batch = prefetch.lookup(self.context, obj)
+            if batch is not None:
+                return obj.pk in batch.liked
+            # Checks if the current user is in the campaign's likes
+            return obj.likes.filter(id=request.user.id).exists()
+        return False
+
+    def get_participated(self, obj):
+        """
+        Checks if the currently logged-in user has a Participation record for this campaign.
+        """
+        request = self.context.get("request")
+        if request and request.user.is_authenticated:
+            batch = prefetch.lookup(self.context, obj)
+            if batch is not None:
+                return obj.pk in batch.participated
+            # Assumes the reverse relation is named 'participations'
+            return obj.participations.filter(fan=request.user).exists()
+        return False
+
+    def get_participants_count(self, obj):
+        batch = prefetch.lookup(self.context, obj)
+        if batch is not None:
+            return batch.participants_count.get(obj.pk, 0)
+        # Simply count the number of Participation records for this campaign.
+        return obj.participations.filter(fan__is_active=True).count()
+
+
+class BaseCampaignSerializer(CampaignBatchFieldsMixin, serializers.ModelSerializer):
     user = UserCampaignSerializer(read_only=True)
     profile = ProfileCampaignSerializer(source='user.profile', read_only=True)
     likes_count = serializers.SerializerMethodField()
@@ -85,11 +139,12 @@ class BaseCampaignSerializer(serializers.ModelSerializer):
             'npn_campaign',              # 👈 add this
             'refund_on_deadline', 
         ]
+        list_serializer_class = CampaignListSerializer
         
     def get_own_campaign(self, obj):
         request = self.context.get("request")
         if request and request.user.is_authenticated:
-            return obj.user.id == request.user.id
+            return obj.user_id == request.user.id
         return False
         
     def to_representation(self, instance):
@@ -103,10 +158,8 @@ class BaseCampaignSerializer(serializers.ModelSerializer):
             representation['ticket_cost'] = specific_instance.ticket_cost
             representation['total_tickets'] = specific_instance.total_tickets
 
-            # Compute how many tickets have been sold so far.
-            # built-in sum(): iterates over numbers and accumulates the total.
-            paid = sum((p.tickets_purchased or 0)
-                       for p in instance.participations.filter(is_free_entry=False))  # 👈 only paid
+            # Tickets sold so far (paid only), from the campaign's counter row.
+            paid = inventory.for_campaign(instance).paid_sold
             representation['total_tickets_sold'] = paid
             # built-in max(a, b): returns the greater of a and b. Here we clamp at 0 so we never go negative.
             representation['entries_left'] = max(
@@ -118,15 +171,15 @@ class BaseCampaignSerializer(serializers.ModelSerializer):
             representation['media_cost'] = specific_instance.media_cost
             representation['total_media'] = specific_instance.total_media
 
-            # Include media files (as you had)
-            media_files_qs = specific_instance.media_files.all()
+            # Include media files (as you had); the page batch already loaded them
+            batch = prefetch.lookup(self.context, instance)
+            media_files_qs = batch.media_files.get(instance.pk, []) if batch else specific_instance.media_files.all()
             representation['media_files'] = MediaFileSerializer(
                 media_files_qs, many=True, context=self.context
             ).data
 
-            # Compute how many media items have been sold so far.
-            paid = sum((p.media_purchased or 0)
-                       for p in instance.participations.filter(is_free_entry=False))  # 👈 only paid
+            # Media items sold so far (paid only), from the campaign's counter row.
+            paid = inventory.for_campaign(instance).paid_sold
             representation['total_media_sold'] = paid
 
             representation['entries_left'] = max(
@@ -138,10 +191,7 @@ class BaseCampaignSerializer(serializers.ModelSerializer):
             representation['ticket_cost'] = specific_instance.ticket_cost
             representation['total_tickets'] = specific_instance.total_tickets
 
-            total_tickets_sold = sum(
-                (p.tickets_purchased or 0)
-                for p in instance.participations.filter(is_free_entry=False)
-            )
+            total_tickets_sold = inventory.for_campaign(instance).paid_sold
             representation['total_tickets_sold'] = total_tickets_sold
 
             representation['entries_left'] = max(
@@ -151,29 +201,6 @@ class BaseCampaignSerializer(serializers.ModelSerializer):
 
         return representation
     
-    def get_likes_count(self, obj):
-        return obj.likes.count()
-    
-    def get_liked_by_user(self, obj):
-        request = self.context.get("request", None)
-        if request and request.user.is_authenticated:
-            # Checks if the current user is in the campaign's likes
-            return obj.likes.filter(id=request.user.id).exists()
-        return False
-    
-    def get_participated(self, obj):
-        """
-        Checks if the currently logged-in user has a Participation record for this campaign.
-        """
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            # Assumes the reverse relation is named 'participations'
-            return obj.participations.filter(fan=request.user).exists()
-        return False
-    
-    def get_participants_count(self, obj):
-        # Simply count the number of Participation records for this campaign.
-        return obj.participations.filter(fan__is_active=True).count()
 
 # Update TicketCampaignSerializer to include nested user data
 class TicketCampaignSerializer(serializers.ModelSerializer):
@@ -194,17 +221,22 @@ class MediaFileSerializer(serializers.ModelSerializer):
         model = MediaFile
         fields = ['id', 'preview_url', 'file_url', 'has_access', "campaign_id", "campaign_title", "content_type"]
 
+    def _has_access(self, user, obj):
+        batch = self.context.get(prefetch.CONTEXT_KEY)
+        if batch is not None and obj.campaign_id in batch and batch.viewer_id == user.id:
+            return obj.pk in batch.accessible_media
+        return MediaAccess.objects.filter(user=user, media_file=obj).exists()
+
     def get_has_access(self, obj):
         user = self.context.get('request').user
         if not user or not user.is_authenticated:
             return False
-        return MediaAccess.objects.filter(user=user, media_file=obj).exists()
+        return self._has_access(user, obj)
 
     def get_file_url(self, obj):
         request = self.context["request"]
         user = request.user
-        if not (user.is_authenticated and
-                MediaAccess.objects.filter(user=user, media_file=obj).exists()):
+        if not (user.is_authenticated and self._has_access(user, obj)):
             return None
 
         token = signer.sign(f"{obj.id}:{user.id}")  # built-in: produces signed string
@@ -302,10 +334,8 @@ class ParticipationSerializer(serializers.ModelSerializer):
         # --- FREE ENTRY PATH ---------------------------------------------------
         is_free = campaign.npn_campaign and data.get('payment_method') == 'free'
         if is_free:
-            # 1) one per user
-            if Participation.objects.filter(
-                fan=fan, campaign=campaign, is_free_entry=True
-            ).exists():
+            # 1) one per user (re-checked atomically when the entry is saved)
+            if inventory.fan_counts(campaign, fan.id).free_entry_used:
                 raise serializers.ValidationError("You already used your free entry for this campaign.")
 
             # 2) require at least 1 entry (default to 1)
@@ -343,18 +373,13 @@ class ParticipationSerializer(serializers.ModelSerializer):
             if tickets_requested is None or tickets_requested <= 0:
                 raise serializers.ValidationError("You must purchase at least one ticket.")
 
-            # Check overall ticket availability
-            total_tickets_sold = campaign.participations.filter(is_free_entry=False).aggregate(
-                total=Sum('tickets_purchased')
-            )['total'] or 0
-            tickets_remaining = campaign.total_tickets - total_tickets_sold
+            # Check overall ticket availability (counter row; reserved atomically on save)
+            tickets_remaining = inventory.remaining(campaign)
             if tickets_requested > tickets_remaining:
                 raise serializers.ValidationError(f"Only {tickets_remaining} tickets are available.")
 
             # Ensure per-fan ticket limit is respected.
-            fan_tickets_purchased = campaign.participations.filter(fan=fan).aggregate(
-                total=Sum('tickets_purchased')
-            )['total'] or 0
+            fan_tickets_purchased = inventory.fan_counts(campaign, fan.id).units
             max_tickets_allowed = campaign.ticket_limit_per_fan
             if max_tickets_allowed and fan_tickets_purchased + tickets_requested > max_tickets_allowed:
                 remaining_tickets = max_tickets_allowed - fan_tickets_purchased
@@ -372,18 +397,13 @@ class ParticipationSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("You must purchase at least one media file.")
 
             # Check overall media availability.
-            total_media_sold = campaign.participations.filter(is_free_entry=False).aggregate(
-                total=Sum('media_purchased')
-            )['total'] or 0
-            media_remaining = campaign.total_media - total_media_sold
+            media_remaining = inventory.remaining(campaign)
             if media_requested > media_remaining:
                 raise serializers.ValidationError(f"Only {media_remaining} media files are available.")
 
             # If a per-fan limit is set (using ticket_limit_per_fan for media selling), enforce it.
             if campaign.ticket_limit_per_fan:
-                fan_media_purchased = campaign.participations.filter(fan=fan).aggregate(
-                    total=Sum('media_purchased')
-                )['total'] or 0
+                fan_media_purchased = inventory.fan_counts(campaign, fan.id).units
                 if fan_media_purchased + media_requested > campaign.ticket_limit_per_fan:
                     remaining_media = campaign.ticket_limit_per_fan - fan_media_purchased
                     raise serializers.ValidationError(
@@ -399,7 +419,11 @@ class ParticipationSerializer(serializers.ModelSerializer):
         """Ensure `amount` is explicitly set before saving."""
         if 'amount' not in validated_data or validated_data['amount'] is None:
             raise serializers.ValidationError({"amount": "Amount must be calculated before saving."})
-        return super().create(validated_data)
+        try:
+            return super().create(validated_data)
+        except inventory.InventoryError as e:
+            # lost the race for the last units between validate() and the counter UPDATE
+            raise serializers.ValidationError(str(e))
 
 class WinnerSerializer(serializers.ModelSerializer):
     class Meta:
@@ -411,7 +435,7 @@ class ExploreCampaignSerializer(serializers.ModelSerializer):
         model = Campaign
         fields = ['id', 'title', 'banner_image','banner_focal_x', 'banner_focal_y', 'campaign_type', 'deadline', 'details', 'npn_campaign']
 
-class InfluencerCampaignSerializer(serializers.ModelSerializer):
+class InfluencerCampaignSerializer(CampaignBatchFieldsMixin, serializers.ModelSerializer):
     is_active = serializers.SerializerMethodField()
     profile = ProfileCampaignSerializer(source='user.profile', read_only=True)
     likes_count = serializers.SerializerMethodField()
@@ -427,6 +451,7 @@ class InfluencerCampaignSerializer(serializers.ModelSerializer):
             'winners_selected', 'details', 'created_at', 'updated_at', 'is_closed', 'is_active',
             'profile', 'likes_count', 'liked_by_user', 'participated', 'participants_count', 'own_campaign', 'npn_campaign'
         ]
+        list_serializer_class = CampaignListSerializer
     
     def get_own_campaign(self, obj):
         # In InfluencerCampaignSerializer, every campaign is owned by the influencer.
@@ -435,24 +460,6 @@ class InfluencerCampaignSerializer(serializers.ModelSerializer):
     def get_is_active(self, obj):
         return not obj.is_closed and obj.deadline >= now()
 
-    def get_likes_count(self, obj):
-        return obj.likes.count()
-
-    def get_liked_by_user(self, obj):
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return obj.likes.filter(id=request.user.id).exists()
-        return False
-
-    def get_participated(self, obj):
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return obj.participations.filter(fan=request.user).exists()
-        return False
-
-    def get_participants_count(self, obj):
-        return obj.participations.filter(fan__is_active=True).count()
-
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         if instance.campaign_type in ('ticket', 'meet_greet'):
@@ -522,11 +529,17 @@ class UpdateMediaSellingCampaignSerializer(serializers.ModelSerializer):
 
 class PolymorphicCampaignDetailSerializer(serializers.Serializer):
     winners_count = serializers.SerializerMethodField()
-    
+
+    class Meta:
+        list_serializer_class = CampaignListSerializer
+
     # Checks if the requesting user is following the influencer (campaign owner).
     def get_is_following(self, obj):
         request = self.context.get("request")
         if request and request.user.is_authenticated:
+            batch = prefetch.lookup(self.context, obj)
+            if batch is not None:
+                return obj.user_id in batch.following
             return Follower.objects.filter(follower=request.user, user=obj.user).exists()
         return False
 
@@ -534,6 +547,9 @@ class PolymorphicCampaignDetailSerializer(serializers.Serializer):
     def get_is_followed(self, obj):
         request = self.context.get("request")
         if request and request.user.is_authenticated:
+            batch = prefetch.lookup(self.context, obj)
+            if batch is not None:
+                return obj.user_id in batch.followed_by
             return Follower.objects.filter(follower=obj.user, user=request.user).exists()
         return False
 
@@ -541,6 +557,9 @@ class PolymorphicCampaignDetailSerializer(serializers.Serializer):
     def get_has_pending_follow_request(self, obj):
         request = self.context.get("request")
         if request and request.user.is_authenticated:
+            batch = prefetch.lookup(self.context, obj)
+            if batch is not None:
+                return obj.user_id in batch.pending_requests
             return FollowRequest.objects.filter(sender=request.user, receiver=obj.user, status='pending').exists()
         return False
 
@@ -548,13 +567,13 @@ class PolymorphicCampaignDetailSerializer(serializers.Serializer):
     def get_total_tickets_sold(self, obj):
         if obj.campaign_type in ('ticket', 'meet_greet'):
             # keep consistency with other places: count paid entries only
-            return sum((p.tickets_purchased or 0) for p in obj.participations.filter(is_free_entry=False))
+            return inventory.for_campaign(obj).paid_sold
         return 0
 
     # Calculate total media sold for media selling campaigns.
     def get_total_media_sold(self, obj):
         if obj.campaign_type == 'media_selling':
-            return sum((p.media_purchased or 0) for p in obj.participations.filter(is_free_entry=False))
+            return inventory.for_campaign(obj).paid_sold
         return
     
     def get_winners_count(self, obj):
@@ -562,6 +581,9 @@ class PolymorphicCampaignDetailSerializer(serializers.Serializer):
         if not obj.is_closed:
             return 0
         # once closed, count how many winners have been picked
+        batch = prefetch.lookup(self.context, obj)
+        if batch is not None:
+            return batch.winners_count.get(obj.pk, 0)
         return obj.winners.filter(fan__is_active=True).count()
 
     # Overrides the default representation to include extra data.
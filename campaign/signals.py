@@ -1,6 +1,6 @@
 # campaign/signals.py
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import m2m_changed, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 from campaign.models import Participation, Campaign, CampaignWinner, MediaFile
@@ -146,7 +146,16 @@ def notify_campaign_closed(sender, instance: Campaign, created, **kwargs):
     if not instance.is_closed:
         return
 
-    campaign = instance
+    announce_campaign_closed(instance)
+
+
+def announce_campaign_closed(campaign: Campaign):
+    """
+    Push "has closed the campaign" to every unique active participant (+ the owner).
+    Deduped against existing notifications, so a second call is harmless; used by the
+    post_save transition above and by the bulk expiry closer (campaign.tasks), whose
+    queryset .update() sends no signals.
+    """
     actor = campaign.user
 
     # ✅ Notify unique fans only (not per participation row)
@@ -198,40 +207,48 @@ def notify_campaign_closed(sender, instance: Campaign, created, **kwargs):
 @receiver(post_save, sender=CampaignWinner, dispatch_uid="campaign_winner_notify_v1")
 def notify_winner_selection(sender, instance, created, **kwargs):
     if created:
-        campaign = instance.campaign
-        influencer = campaign.user
-        winner = instance.fan
+        announce_winner(instance)
 
-        # Push notifications
-        push_notification(
-            actor=winner,
-            recipient=influencer,
-            verb="a winner was selected for your campaign",
-            target=campaign
-        )
-        push_notification(
-            actor=influencer,
-            recipient=winner,
-            verb="you won the campaign",
-            target=campaign
-        )
 
-        # Make sure the actual messaging runs only after the row commits:
-        def _after_commit():
-            # Ensure a 1:1 exists (no seed text here to avoid double-send)
-            conv, _ = get_or_create_winner_conversation(
-                influencer=influencer,
-                winner=winner,
-                campaign=campaign,
-                seed_text=None,              # important: prevent helper from also sending
-            )
+def announce_winner(instance: CampaignWinner):
+    """
+    Notify both sides and DM the winner.
+    Also called by campaign.winners.draw(), whose bulk_create sends no post_save.
+    """
+    campaign = instance.campaign
+    influencer = campaign.user
+    winner = instance.fan
+
+    # Push notifications
+    push_notification(
+        actor=winner,
+        recipient=influencer,
+        verb="a winner was selected for your campaign",
+        target=campaign
+    )
+    push_notification(
+        actor=influencer,
+        recipient=winner,
+        verb="you won the campaign",
+        target=campaign
+    )
 
-            # Send exactly one DM for this newly-created winner
-            text = getattr(campaign, "winner_dm_template", None) \
-                or f"Congratulations! You won the campaign: {campaign.title}"
-            Message.objects.create(conversation=conv, sender=influencer, content=text)
+    # Make sure the actual messaging runs only after the row commits:
+    def _after_commit():
+        # Ensure a 1:1 exists (no seed text here to avoid double-send)
+        conv, _ = get_or_create_winner_conversation(
+            influencer=influencer,
+            winner=winner,
+            campaign=campaign,
+            seed_text=None,              # important: prevent helper from also sending
+        )
 
-        transaction.on_commit(_after_commit)
+        # Send exactly one DM for this newly-created winner
+        text = getattr(campaign, "winner_dm_template", None) \
+            or f"Congratulations! You won the campaign: {campaign.title}"
+        Message.objects.create(conversation=conv, sender=influencer, content=text)
+
+    transaction.on_commit(_after_commit)
 
 
 @receiver(post_save, sender=MediaFile)
@@ -264,4 +281,30 @@ def create_blurred_preview(sender, instance, created, **kwargs):
 
     except Exception as e:
         # now this should only fire on truly unexpected errors
-        logger.exception("Failed to create blurred preview: %s", e)
\ No newline at end of file
+        logger.exception("Failed to create blurred preview: %s", e)
+
+@receiver(post_save, dispatch_uid="campaign_open_index_refresh_v1")
+def refresh_open_index(sender, instance, **kwargs):
+    """
+    Keep OpenCampaignIndex in step with campaign edits (created, stock changed, closed).
+    No sender filter: saving a TicketCampaign / MediaSellingCampaign / MeetAndGreetCampaign
+    sends post_save with the subclass as sender, not Campaign.
+    """
+    if not isinstance(instance, Campaign):
+        return
+    from campaign import open_index
+
+    campaign_id = instance.pk
+    # built-in: on_commit → the subclass row (total_tickets / total_media) is written by then
+    transaction.on_commit(lambda: open_index.refresh([campaign_id]))
+
+
+@receiver(m2m_changed, sender=Campaign.likes.through, dispatch_uid="campaign_open_index_likes_v1")
+def refresh_open_index_likes(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    from campaign import open_index
+
+    # reverse=True → instance is the user and pk_set the campaigns
+    ids = (pk_set or []) if reverse else [instance.pk]
+    open_index.on_like(ids)
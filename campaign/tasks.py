@@ -10,57 +10,132 @@ from blockchain.tasks import (
     refund_all_holds_for_campaign_task,
 )
 from campaign.utils import select_random_winners
-from django.db.models import Sum
+from campaign import open_index
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce
+import logging
 import boto3
 from campaign.models import MediaFile
 import subprocess, tempfile, os, uuid
 
 OWNER = settings.OWNER_ADDRESS
 
+logger = logging.getLogger(__name__)
+
+CLOSE_CHUNK = int(getattr(settings, "CAMPAIGN_CLOSE_CHUNK", 500))
+
+
+def close_expired_chunk(now=None, chunk: int = CLOSE_CHUNK) -> list:
+    """
+    Claim and close up to `chunk` expired campaigns in one transaction:
+      1) SELECT ... FOR UPDATE SKIP LOCKED → rows another closer holds are skipped, not waited on
+      2) one grouped query: owner's on-chain id, goal (child table) and sold (all entries)
+      3) one bulk UPDATE of is_closed / closed_at
+    Follow-up work (release / refund, winners, notifications) is dispatched after commit
+    as separate idempotent tasks. Returns the closed rows.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Campaign.objects
+            .select_for_update(skip_locked=True)
+            .filter(deadline__lt=now, is_closed=False)
+            .order_by('deadline')
+            .values_list('pk', flat=True)[:chunk]
+        )
+        if not ids:
+            return []
+
+        rows = list(
+            Campaign.objects
+            .filter(pk__in=ids)
+            .values('pk', 'refund_on_deadline', 'winner_slots', 'winners_selected', 'user__user_id')
+            .annotate(
+                goal=Coalesce(
+                    F('ticketcampaign__total_tickets'),
+                    F('meetandgreetcampaign__total_tickets'),
+                    F('mediasellingcampaign__total_media'),
+                    Value(0),
+                ),
+                sold=Coalesce(
+                    Sum(Coalesce('participations__tickets_purchased', 'participations__media_purchased')),
+                    Value(0),
+                ),
+            )
+        )
+        Campaign.objects.filter(pk__in=ids).update(is_closed=True, closed_at=now)
+        open_index.drop(ids)                # queryset .update() sends no post_save
+        transaction.on_commit(lambda: _dispatch_closed(rows))
+    return rows
+
+
+def _dispatch_closed(rows):
+    for row in rows:
+        campaign_id = row['pk']
+        try:
+            seller_id = int(row['user__user_id'])
+        except (TypeError, ValueError):
+            logger.error("closed campaign %s: owner has no on-chain id; holds not settled", campaign_id)
+        else:
+            # 1) refund vs. release
+            if row['refund_on_deadline'] and row['sold'] < row['goal']:
+                refund_all_holds_for_campaign_task.delay(campaign_id, seller_id)
+            else:
+                release_all_holds_for_campaign_task.delay(campaign_id, seller_id)
+
+        # 2) winners (goal met)
+        if not row['winners_selected'] and (row['winner_slots'] or 0) > 0 and row['sold'] >= row['goal']:
+            select_campaign_winners.delay(campaign_id)
+
+        # 3) "has closed the campaign" (queryset .update() sends no post_save)
+        notify_campaign_closed.delay(campaign_id)
+
+
 @shared_task
-def close_expired_campaigns():
+def close_expired_campaigns(max_chunks: int = 20):
     """
     Runs every minute (or however often you schedule it).
-    For each campaign whose deadline passed:
-      - mark it closed
+    Closes expired campaigns chunk by chunk (see close_expired_chunk); safe to run on
+    several beat / worker instances at once.
       - if refund_on_deadline and goal not met → refund
       - otherwise → release
     """
-    now = timezone.now()
-    expired = Campaign.objects.filter(deadline__lt=now, is_closed=False)
-
-    for c in expired:
-        # 1) Close in your DB
-        c.is_closed = True
-        c.closed_at = now
-        c.save(update_fields=['is_closed', 'closed_at'])
-
-        # 2) Figure out sold vs. goal
-        specific = c.specific_campaign()
-        if specific.campaign_type in ('ticket', 'meet_greet'):
-            sold = specific.participations.aggregate(sum_t=Sum('tickets_purchased'))['sum_t'] or 0
-            goal = specific.total_tickets
-        elif specific.campaign_type == 'media_selling':
-            sold = specific.participations.aggregate(sum_m=Sum('media_purchased'))['sum_m'] or 0
-            goal = specific.total_media
-        else:
-            sold = 0
-            goal = 0
+    now    = timezone.now()
+    closed = 0
+    for _ in range(max_chunks):
+        rows = close_expired_chunk(now)
+        closed += len(rows)
+        if len(rows) < CLOSE_CHUNK:
+            break
+    if closed:
+        logger.info("closed %d expired campaigns", closed)
+    return closed
 
-        seller_id = int(c.user.user_id)
 
-        # 3) Decide refund vs. release
-        if c.refund_on_deadline and sold < goal:
-            refund_all_holds_for_campaign_task.delay(c.id, seller_id)
-        else:
-            release_all_holds_for_campaign_task.delay(c.id, seller_id)
-
-        # 4) If you still need winners (for ticket/meet_greet),
-        #    you can dispatch that here, too:
-        if not c.winners_selected and c.winner_slots > 0 and sold >= goal:
-            select_random_winners(c.id)
-            c.winners_selected = True
-            c.save(update_fields=['winners_selected'])
+@shared_task
+def refresh_open_campaign_index():
+    """Periodic: recompute OpenCampaignIndex (trending scores, expired rows; see campaign/open_index.py)."""
+    result = open_index.refresh_all()
+    logger.info("open campaign index: %(rows)d rows, %(dropped)d dropped", result)
+    return result
+
+
+@shared_task
+def select_campaign_winners(campaign_id: int):
+    """Idempotent: draws winners once; a campaign with winners_selected set is left alone."""
+    with transaction.atomic():
+        if not Campaign.objects.select_for_update().filter(pk=campaign_id, winners_selected=False).exists():
+            return []
+        winners = select_random_winners(campaign_id)
+    return [w.id for w in winners]
+
+
+@shared_task
+def notify_campaign_closed(campaign_id: int):
+    from campaign.signals import announce_campaign_closed
+
+    campaign = Campaign.objects.select_related('user').get(pk=campaign_id)
+    announce_campaign_closed(campaign)
 
 
 @shared_task
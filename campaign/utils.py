@@ -2,11 +2,9 @@
 
 from django.conf import settings
 from django.db import transaction
-import numpy as np
 from django.db.models import Sum, Count, Q
 from PIL import Image, ImageDraw, ImageFont, ImageOps
 from django.db.utils import IntegrityError
-import random
 import boto3
 from io import BytesIO
 from pathlib import Path
@@ -17,67 +15,10 @@ from messagesapp.models import Conversation, Message
 
 
 def select_random_winners(campaign_id):
-    from campaign.models import Campaign, Participation, CampaignWinner
-
-    campaign = Campaign.objects.get(id=campaign_id)
-    participants = list(
-        Participation.objects
-        .filter(
-            campaign=campaign,
-            fan__is_active=True,        # built-in: JOIN on user; only active (not soft-deleted) fans
-        )
-    )
-
-    # 1) optional: exclude prior winners
-    if campaign.exclude_previous_winners:
-        past = set(
-            CampaignWinner.objects
-            .filter(
-                campaign__user=campaign.user,
-                fan__is_active=True,    # only consider winners who are still active
-            )
-            .values_list('fan_id', flat=True)
-        )
-        participants = [p for p in participants if p.fan_id not in past]
-
-    if not participants:
-        return []
-
-    # 2) build fans & weights
-    fans    = []
-    weights = []
-    for p in participants:
-        fans.append(p.fan)
-        if campaign.campaign_type == 'media_selling':
-            w = p.media_purchased or 1
-        else:
-            w = p.tickets_purchased or 1
-        weights.append(w)
-
-    # 3) sample without replacement, weighted
-    k = campaign.winner_slots or 1
-    if len(fans) <= k:
-        chosen = fans
-    else:
-        probs = np.array(weights) / sum(weights)
-        idxs  = np.random.choice(len(fans), size=k, replace=False, p=probs)
-        chosen = [fans[i] for i in idxs]
-
-    # 4) atomically mark winners
-    winners = []
-    with transaction.atomic():
-        campaign.winners_selected = True
-        campaign.save(update_fields=['winners_selected'])
-
-        for fan in chosen:
-            cw, created = CampaignWinner.objects.get_or_create(
-                campaign=campaign, fan=fan
-            )
-            if created:
-                winners.append(fan)
-
-    return winners
+    """Weighted draw of winner_slots fans; returns the new winners (see campaign/winners.py)."""
+    from campaign.winners import draw
 
+    return draw(campaign_id)
 
 
 def _signature(u1_id: int, u2_id: int) -> str:
@@ -138,37 +79,58 @@ def get_or_create_winner_conversation(influencer, winner, campaign, seed_text=No
     return conv, created
 
 
-def assign_media_to_user(campaign, user, quantity: int):
+def assign_media_to_user(campaign, user, quantity: int, max_rounds: int = 3):
     """
     Give the user up to `quantity` random media files from the given campaign that they don't already own.
     Multiple users can own the same media_file, but a user can't get duplicates of the same file.
-    """
-    from .models import MediaAccess, MediaFile
-    # 1) Filter all media for this campaign that the user doesn’t already have
-    available_qs = (
-        MediaFile.objects
-        .filter(campaign=campaign)
-        .exclude(accesses__user=user)
-    )
 
-    # 2) Shuffle and pick up to `quantity` IDs
-    media_ids = list(available_qs.values_list("id", flat=True))
-    random.shuffle(media_ids)
+    Set-based, a handful of queries whatever `quantity` is:
+      1) lock the fan's CampaignFanInventory row → only this fan's own purchases serialize
+      2) one ORDER BY random() LIMIT n over the files the user doesn't own
+      3) one bulk_create(ignore_conflicts=True) of MediaAccess
+      4) one read-back of the rows this round inserted; anything lost to a conflict
+         (granted elsewhere meanwhile) is topped up with a fresh sample
+    Returns exactly the MediaFiles granted by this call.
+    """
+    from .models import CampaignFanInventory, MediaAccess, MediaFile
+    from .inventory import for_fan
 
     assigned = []
-    for media_id in media_ids[:quantity]:
-        with transaction.atomic():
-            media = MediaFile.objects.select_for_update().get(pk=media_id)
-            # get_or_create prevents duplicates per user due to unique_together
-            ma, created = MediaAccess.objects.get_or_create(
-                user=user,
-                media_file=media
-            )
-            if created:
-                assigned.append(media)
-    return assigned
+    if quantity <= 0:
+        return assigned
 
+    with transaction.atomic():
+        fan_row = for_fan(campaign, user.id)
+        CampaignFanInventory.objects.select_for_update().filter(pk=fan_row.pk).exists()
+
+        for _ in range(max_rounds):
+            need = quantity - len(assigned)
+            if need <= 0:
+                break
+            # built-in: order_by("?") → ORDER BY random(); the LIMIT keeps only `need` rows
+            picked = list(
+                MediaFile.objects
+                .filter(campaign=campaign)
+                .exclude(accesses__user=user)
+                .order_by("?")[:need]
+            )
+            if not picked:
+                break
 
+            started = timezone.now()
+            MediaAccess.objects.bulk_create(
+                [MediaAccess(user=user, media_file=m) for m in picked],
+                ignore_conflicts=True,          # unique_together(user, media_file): a twin is skipped, not an error
+            )
+            mine = set(
+                MediaAccess.objects
+                .filter(user=user, media_file__in=picked, created_at__gte=started)
+                .values_list("media_file_id", flat=True)
+            )
+            assigned += [m for m in picked if m.id in mine]
+            if len(mine) == len(picked):
+                break
+    return assigned
 
 
 def generate_presigned_s3_url(key: str, expires_in: int = 3600):
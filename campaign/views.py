@@ -24,27 +24,29 @@ from .serializers import (
     MediaFileSerializer,
     SuggestedCampaignSerializer,
 )
-from campaign.pagination import SuggestedCampaignPagination
+from campaign.pagination import KeysetPagination, OpenCampaignCursorPagination
 from .models import (
     Campaign,
     Participation,
     TicketCampaign,
     MeetAndGreetCampaign,
-    MediaSellingCampaign,
     CampaignWinner,
     MediaFile,
     CreditSpend,
     EscrowRecord,
     MediaAccess,
+    CampaignDailyStats,
+    CampaignFanInventory,
+    OpenCampaignIndex,
 )
+from campaign import inventory, stats
 from django.core.mail import send_mail
 from django.contrib.auth import get_user_model
 from decimal import Decimal
 from django.conf import settings
 import logging
-from blockchain.utils import w3, contract
+from blockchain.utils import w3, get_current_rate_wei
 from web3.exceptions import ContractLogicError, TimeExhausted
-import time
 from campaign.utils import (
     select_random_winners,
     assign_media_to_user,
@@ -56,10 +58,9 @@ from blockchain.tasks import (
     release_all_holds_for_campaign_task,
     refund_all_holds_for_campaign_task,
     save_onchain_action_info,
-    save_transaction_info,
 )
 from celery import chain
-from blockchain.models import OnChainAction, Transaction
+from blockchain.models import OnChainAction
 from rest_framework.generics import ListAPIView
 from django.shortcuts import get_object_or_404
 from campaign.cloudfront_signer import generate_cloudfront_signed_url
@@ -77,8 +78,8 @@ from botocore.signers import CloudFrontSigner
 from cryptography.hazmat.primitives.serialization import load_pem_private_key
 from django.utils import timezone as dj_timezone
 from web3.exceptions import TransactionNotFound
-from django.db.models.functions import TruncDate, Coalesce  # built-in: SQL DATE() & COALESCE(NULL, fallback)
-from django.db.models import Sum, Count, Case, When, F, Max, Q, Value, IntegerField  # built-in: aggregations & query helpers
+from django.db.models.functions import Coalesce  # built-in: COALESCE(NULL, fallback)
+from django.db.models import Sum, Max  # built-in: aggregations
 from decimal import Decimal
 from datetime import timedelta
 from campaign.signals import push_notification  # reuse your existing helper
@@ -95,24 +96,6 @@ TTL = getattr(settings, "MEDIA_TOKEN_TTL", 300)
 TX_MAX_WAIT = getattr(settings, "TX_RECEIPT_MAX_WAIT_SECONDS", 60)
 TX_POLL_LATENCY = getattr(settings, "TX_RECEIPT_POLL_LATENCY", 2)
 
-def wait_for_tx_receipt(
-    tx_hash: str, poll_interval: float = 2.0, timeout: float = 120.0
-):
-    """
-    Polls get_transaction_receipt(tx_hash) until the receipt is non-null or we hit timeout.
-    Returns the receipt dict once mined, or raises TimeoutError.
-    """
-    start = time.time()
-    while True:
-        receipt = w3.eth.get_transaction_receipt(tx_hash)
-        if receipt is not None:
-            # tx is mined; receipt.status == 1 means success, 0 means reverted
-            return receipt
-
-        if time.time() - start > timeout:
-            raise TimeoutError(f"Timed out waiting for tx {tx_hash}")
-
-        time.sleep(poll_interval)
 
 class FanAnalyticsView(APIView):
     """
@@ -226,29 +209,41 @@ class UnifiedEngagementView(APIView):
         else:
             campaign = None
             qs_part = Participation.objects.filter(campaign__user=user)
-            
-        # 👇 derived queryset with only non-deleted (active) users
-        qs_part_active = qs_part.filter(
-            fan__is_active=True   # built-in: WHERE auth_user.is_active = TRUE
-        )
-
-        # ── Totals (paid entries vs free) ─────────────────────────────────────
-        # built-in: Coalesce(Sum(...), 0) → if NULL then 0
-        paid_tickets = qs_part.aggregate(v=Coalesce(Sum("tickets_purchased", filter=Q(is_free_entry=False)), 0))["v"] or 0
-        paid_media   = qs_part.aggregate(v=Coalesce(Sum("media_purchased",  filter=Q(is_free_entry=False)), 0))["v"] or 0
-        total_entries_paid = int(paid_tickets) + int(paid_media)
 
-        free_tickets = qs_part.aggregate(v=Coalesce(Sum("tickets_purchased", filter=Q(is_free_entry=True)), 0))["v"] or 0
-        free_media   = qs_part.aggregate(v=Coalesce(Sum("media_purchased",  filter=Q(is_free_entry=True)), 0))["v"] or 0
-        free_entries_count = int(free_tickets) + int(free_media)
+        # 📊 sales come from the daily rollup (campaign/stats.py): a few rows per day & payment method
+        qs_stats = (
+            CampaignDailyStats.objects.filter(campaign=campaign) if scope == "campaign"
+            else CampaignDailyStats.objects.filter(campaign__user=user)
+        )
 
-        # built-in: Sum('amount') → total revenue; free entries have amount=0 anyway
-        total_earning = qs_part.aggregate(v=Coalesce(Sum("amount"), Decimal("0")))["v"] or Decimal("0")
+        # ── Totals + payment-method breakdown (one grouped query) ─────────────
+        payment_methods, total_entries_paid, free_entries_count, total_earning, total_participations = [], 0, 0, Decimal("0"), 0
+        for row in (
+            qs_stats.values("payment_method")
+            .annotate(
+                count=Sum("participations"),
+                amount=Sum("revenue"),
+                paid=Sum("paid_entries"),
+                free=Sum("free_entries"),
+            )
+            .order_by("-count")
+        ):
+            total_entries_paid   += int(row["paid"] or 0)
+            free_entries_count   += int(row["free"] or 0)
+            total_earning        += row["amount"] or Decimal("0")
+            total_participations += int(row["count"] or 0)
+            payment_methods.append({
+                "payment_method": row["payment_method"],
+                "count": int(row["count"] or 0),
+                "amount": float(row["amount"] or 0),
+            })
 
-        # 👇 participants count = only active users
-        total_participants = (
-            qs_part_active.values("fan").distinct().count()
-        )  # built-in: DISTINCT COUNT(fan_id)
+        # 👇 participants count = only active users (per-fan counter rows, campaign/inventory.py)
+        qs_fans = CampaignFanInventory.objects.filter(inventory.PARTICIPATED, fan__is_active=True)
+        if scope == "campaign":
+            total_participants = qs_fans.filter(campaign=campaign).count()
+        else:
+            total_participants = qs_fans.filter(campaign__user=user).values("fan").distinct().count()
 
         # Likes + winners + goals
         if scope == "campaign":
@@ -262,17 +257,16 @@ class UnifiedEngagementView(APIView):
             else:
                 goal_total = getattr(specific, "total_tickets", 0) or 0
         else:
-            # built-in: aggregate likes across all campaigns of user
-            total_likes = base_campaigns.aggregate(v=Coalesce(Count("likes"), 0))["v"] or 0
+            total_likes = Campaign.likes.through.objects.filter(campaign__user=user).count()
             winners_count = CampaignWinner.objects.filter(campaign__user=user).count()
-            # goals across all owned campaigns
-            ticket_goal = TicketCampaign.objects.filter(user=user).aggregate(v=Coalesce(Sum("total_tickets"), 0))["v"] or 0
-            media_goal  = MediaSellingCampaign.objects.filter(user=user).aggregate(v=Coalesce(Sum("total_media"), 0))["v"] or 0
-            goal_total  = int(ticket_goal) + int(media_goal)
+            # goals across all owned ticket / media campaigns, one query over the child tables
+            goal_total = base_campaigns.aggregate(
+                v=Coalesce(Sum(Coalesce("ticketcampaign__total_tickets", "mediasellingcampaign__total_media")), 0)
+            )["v"] or 0
 
         entries_left = max(0, int(goal_total) - total_entries_paid)  # built-in: max(a,b)
 
-        # On-hold (sum Escrow held)
+        # On-hold (sum Escrow held) — current state, so read live rather than rolled up
         escrow_qs = EscrowRecord.objects.filter(status="held")
         escrow_qs = escrow_qs.filter(campaign=campaign) if scope == "campaign" else escrow_qs.filter(campaign__user=user)
         escrow_agg = escrow_qs.aggregate(
@@ -283,50 +277,27 @@ class UnifiedEngagementView(APIView):
         tt_on_hold = int(escrow_agg["tt_on_hold"] or 0)
 
         # ── Time series (daily) ───────────────────────────────────────────────
+        # fixed buckets [start..today] so charts don’t have gaps (vectorized fill, campaign/stats.py)
+        # participants are distinct per campaign and day; across campaigns they are summed
+        start_day = dj_timezone.localdate(start_ts)
         per_day = (
-            qs_part.filter(created_at__date__gte=start_ts.date())
-            .annotate(day=TruncDate("created_at"))                 # built-in: DATE(created_at)
+            qs_stats.filter(day__gte=start_day)
             .values("day")                                         # built-in: GROUP BY day
             .annotate(
-                entries_tickets=Coalesce(Sum("tickets_purchased", filter=Q(is_free_entry=False)), 0),
-                entries_media=Coalesce(Sum("media_purchased",  filter=Q(is_free_entry=False)), 0),
-                revenue=Coalesce(Sum("amount",                  filter=Q(is_free_entry=False)), Decimal("0")),
-                participants=Count("fan", filter=Q(is_free_entry=False), distinct=True),
+                entries=Sum("paid_entries"),
+                revenue=Sum("revenue"),
+                participants=Sum("participants"),
             )
-            .order_by("day")
         )
-
-        # build fixed buckets [start..today] so charts don’t have gaps
-        day_index = {row["day"]: row for row in per_day}
-        buckets, entries_series, revenue_series, participants_series = [], [], [], []
-        for i in range(days):
-            d = (start_ts + timedelta(days=i)).date()
-            buckets.append(d.isoformat())
-            row = day_index.get(d)
-            if row:
-                entries_series.append(int(row["entries_tickets"] or 0) + int(row["entries_media"] or 0))
-                revenue_series.append(float(row["revenue"] or 0))
-                participants_series.append(int(row["participants"] or 0))
-            else:
-                entries_series.append(0)
-                revenue_series.append(0.0)
-                participants_series.append(0)
-
-        # ── Breakdowns (optional for UI) ──────────────────────────────────────
-        payment_methods = list(
-            qs_part.values("payment_method")
-            .annotate(
-                count=Count("id"),                                  # built-in: COUNT(*)
-                amount=Coalesce(Sum("amount"), Decimal("0")),
-            )
-            .order_by("-count")
-        )
-        for pm in payment_methods:
-            pm["amount"] = float(pm["amount"] or 0)
-
-        # Top participants by entries
-        top_raw = (
-            qs_part_active.filter(is_free_entry=False)
+        daily = stats.series(per_day, start_day, days, ("entries", "revenue", "participants"))
+        buckets             = daily["buckets"]
+        entries_series      = daily["entries"].astype(int).tolist()
+        revenue_series      = daily["revenue"].tolist()
+        participants_series = daily["participants"].astype(int).tolist()
+
+        # Top participants by entries (users + profiles in one query)
+        top_raw = list(
+            qs_part.filter(is_free_entry=False, fan__is_active=True)
             .values("fan")
             .annotate(
                 t=Coalesce(Sum("tickets_purchased"), 0),
@@ -335,11 +306,11 @@ class UnifiedEngagementView(APIView):
             )
             .order_by("-t", "-m")[:5]
         )
+        fans = User.objects.select_related("profile").in_bulk([row["fan"] for row in top_raw])
         top_participants = []
         for row in top_raw:
-            try:
-                u = User.objects.get(pk=row["fan"])
-            except User.DoesNotExist:
+            u = fans.get(row["fan"])
+            if u is None:
                 continue
             user_data = UserCampaignSerializer(u, context={"request": request}).data
             user_data["profile"] = ProfileCampaignSerializer(u.profile, context={"request": request}).data
@@ -368,7 +339,7 @@ class UnifiedEngagementView(APIView):
             "tt_on_hold": tt_on_hold,
             "entries_left": entries_left,
             "winners_count": winners_count,
-            "total_participations": qs_part.count(),    # built-in: COUNT(*)
+            "total_participations": total_participations,
             "free_entries_count": free_entries_count,
             "paid_entries_count": total_entries_paid,
 
@@ -607,7 +578,7 @@ def _compute_costs_and_tt(campaign, qty: int):
     cost_in_credits = int(qty * unit_cost)
 
     try:
-        conversion_rate = contract.functions.conversionRate().call()
+        conversion_rate = get_current_rate_wei()     # shared cache, no RPC (blockchain/rate_cache.py)
     except Exception:
         logger.exception("Failed to fetch conversionRate")
         raise
@@ -699,23 +670,15 @@ def perform_participation(
             ]
         )
 
-    # 5) Kick off the on-chain + accounting tasks (as you already do)
-    chain(
-        hold_for_campaign_on_chain.s(
-            escrow.id,
-            campaign.id,
-            int(fan.user_id),
-            spent_tt_whole,
-            cost_in_credits,
-        ),
-        save_transaction_info.s(
-            user_id=fan.id,
-            campaign_id=campaign.id,
-            tx_type=Transaction.SPEND,
-            tt_amount=spent_tt_whole,
-            credits_delta=cost_in_credits,
-        ),
-    ).apply_async()
+    # 5) Kick off the on-chain hold; its reconciler continuation (finalize_hold_for_campaign)
+    #    writes the SPEND row once the hold is mined successfully
+    hold_for_campaign_on_chain.delay(
+        escrow.id,
+        campaign.id,
+        int(fan.user_id),
+        spent_tt_whole,
+        cost_in_credits,
+    )
 
     # 6) Grant media access if needed
     assigned_media = []
@@ -903,60 +866,69 @@ class AutoParticipateConfirmView(APIView):
         )
 
 class ParticipantsView(APIView):
+    """
+    GET /campaign/participants/<campaign_id>/?order=entries|spending[&page_size=50][&cursor=...]
+    GET /campaign/participants/<campaign_id>/?count_only=1   → {"count": N} for the campaign header
+
+    One row per active fan from the per-fan counters (CampaignFanInventory), user + profile
+    joined in the same query, keyset-paginated (see KeysetPagination; follow "next").
+    """
     permission_classes = []  # or use [AllowAny] if you want open access
 
+    ORDERING = {"entries": "units", "spending": "spent"}
+
     def get(self, request, campaign_id):
-        try:
-            campaign = Campaign.objects.get(id=campaign_id)
-        except Campaign.DoesNotExist:
+        if not Campaign.objects.filter(id=campaign_id).exists():
             return Response(
                 {"error": "Campaign not found."}, status=status.HTTP_404_NOT_FOUND
             )
-            
-        base_qs = Participation.objects.filter(
-            campaign=campaign,
+
+        base_qs = CampaignFanInventory.objects.filter(
+            inventory.PARTICIPATED,
+            campaign_id=campaign_id,
             fan__is_active=True,      # 👈 only active participants are listed
         )
 
-        # If the campaign type is media_selling, aggregate media_purchased; otherwise, aggregate tickets_purchased.
-        if campaign.campaign_type == "media_selling":
-            aggregated = (
-                base_qs
-                .values("fan")
-                .annotate(
-                    total_tickets_purchased=Sum("media_purchased"),
-                    total_spending=Sum("amount"),
-                )
-            )
-        else:
-            aggregated = (
-                base_qs
-                .values("fan")
-                .annotate(
-                    total_tickets_purchased=Sum("tickets_purchased"),
-                    total_spending=Sum("amount"),
-                )
-            )
+        if request.query_params.get("count_only") in ("1", "true", "True"):
+            return Response({"count": base_qs.count()}, status=status.HTTP_200_OK)
+
+        order = request.query_params.get("order", "entries")
+        if order not in self.ORDERING:
+            return Response({"error": "order must be 'entries' or 'spending'."}, status=400)
+
+        paginator = KeysetPagination(self.ORDERING[order], tie="fan_id")
+        rows = paginator.paginate_queryset(
+            base_qs
+            .select_related("fan", "fan__profile")        # built-in: one JOIN instead of a lookup per fan
+            .only(
+                "fan_id", "units", "spent",
+                "fan__id", "fan__username", "fan__email",
+                "fan__profile__id", "fan__profile__name", "fan__profile__profile_picture",
+            ),
+            request,
+        )
 
         participants = []
-        for record in aggregated:
-            fan_id = record["fan"]
-            user = User.objects.get(id=fan_id)
+        for row in rows:
+            user = row.fan
             user_data = UserCampaignSerializer(user, context={"request": request}).data
-            profile_data = ProfileCampaignSerializer(
-                user.profile, context={"request": request}
-            ).data
-            user_data["profile"] = profile_data
+            profile = getattr(user, "profile", None)
+            user_data["profile"] = (
+                ProfileCampaignSerializer(profile, context={"request": request}).data if profile else None
+            )
 
             participants.append(
                 {
                     "user": user_data,
-                    "total_tickets_purchased": record["total_tickets_purchased"] or 0,
-                    "total_spending": str(record["total_spending"] or "0.00"),
+                    "total_tickets_purchased": row.units,
+                    "total_spending": str(row.spent),
                 }
             )
 
-        return Response({"participants": participants}, status=status.HTTP_200_OK)
+        return Response(
+            {"participants": participants, "order": order, "next": paginator.next},
+            status=status.HTTP_200_OK,
+        )
 
 
 class WinnersView(APIView):
@@ -990,23 +962,36 @@ class WinnersView(APIView):
         }, status=status.HTTP_200_OK)
 
 class ExploreCampaignsView(APIView):
+    """
+    GET /campaign/explore/[?sort=newest|trending][&page_size=10][&cursor=...]
+    Open campaigns from OpenCampaignIndex (one indexed range scan), then the page's
+    specific campaigns for the serializer; follow "next" for more.
+    """
     permission_classes = [AllowAny]
 
     def get(self, request):
         now = dj_timezone.now()
-        # Filter campaigns where the deadline is still in the future and the campaign is not closed.
-        # Order them by creation date in descending order (newest first),
-        # and then slice the QuerySet to get only the first 10 campaigns.
-        active_campaigns = Campaign.objects.filter(
-            deadline__gt=now, is_closed=False
-        ).order_by("-created_at")[:10]
+        paginator = OpenCampaignCursorPagination()
+        paginator.page_size = 10
+        if request.query_params.get("sort") == "trending":
+            paginator.ordering = paginator.trending_ordering
+
+        # Deadline still in the future; closed campaigns have no index row.
+        page = paginator.paginate_queryset(
+            OpenCampaignIndex.objects.filter(deadline__gt=now), request, view=self
+        )
+        by_id = Campaign.objects.filter(pk__in=[row.campaign_id for row in page]).with_specific().in_bulk()
+        active_campaigns = [by_id[row.campaign_id] for row in page if row.campaign_id in by_id]
 
         # Serialize the active campaigns using the polymorphic serializer.
         serializer = PolymorphicCampaignDetailSerializer(
             active_campaigns, many=True, context={"request": request}
         )
         # Return the serialized data in the response.
-        return Response({"campaigns": serializer.data}, status=status.HTTP_200_OK)
+        return Response(
+            {"campaigns": serializer.data, "next": paginator.get_next_link(), "previous": paginator.get_previous_link()},
+            status=status.HTTP_200_OK,
+        )
 
 
 class InfluencerCampaignsView(APIView):
@@ -1022,7 +1007,7 @@ class InfluencerCampaignsView(APIView):
             )
 
         # Fetch all campaigns created by the influencer (active + closed)
-        campaigns = Campaign.objects.filter(user=user)
+        campaigns = Campaign.objects.filter(user=user).with_specific()
         serializer = InfluencerCampaignSerializer(
             campaigns, many=True, context={"request": request}
         )
@@ -1043,7 +1028,7 @@ class InfluencerCampaignListView(APIView):
             )
 
         # Fetch all campaigns created by the influencer
-        campaigns = Campaign.objects.filter(user=influencer)
+        campaigns = Campaign.objects.filter(user=influencer).with_specific()
         serializer = PolymorphicCampaignDetailSerializer(
             campaigns, many=True, context={"request": request}
         )
@@ -1309,11 +1294,21 @@ class FanSuggestedCampaignsView(ListAPIView):
     - not closed
     - not expired
     - not sold out (tickets/media)
-    - paginated
+    - cursor-paginated (?cursor=..., ?sort=trending)
+
+    Reads OpenCampaignIndex: one range scan, campaigns the fan joined excluded through the
+    participation fan_id index.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = SuggestedCampaignSerializer
-    pagination_class = SuggestedCampaignPagination
+    pagination_class = OpenCampaignCursorPagination
+
+    @property
+    def paginator(self):
+        paginator = super().paginator
+        if self.request.query_params.get("sort") == "trending":
+            paginator.ordering = paginator.trending_ordering
+        return paginator
 
     def get_queryset(self):
         user = self.request.user
@@ -1325,51 +1320,19 @@ class FanSuggestedCampaignsView(ListAPIView):
 
         now = dj_timezone.now()  # timezone.now(): Django helper that returns aware datetime (uses TIME_ZONE settings)
 
-        qs = (
-            Campaign.objects
-            # Q objects allow composing complex conditions; here we keep it simple
-            .filter(is_closed=False, deadline__gt=now)
-            .exclude(user=user)  # don’t suggest user’s own campaigns
-            .exclude(participations__fan=user)  # optional: don’t suggest already-participated campaigns
-        )
-
-        # Sum(...) is a DB aggregate. Coalesce(..., 0) converts NULL -> 0.
-        # filter=... inside Sum is supported in modern Django; it sums only matching rows.
-        qs = qs.annotate(
-            paid_tickets_sold=Coalesce(
-                Sum(
-                    "participations__tickets_purchased",
-                    filter=Q(participations__is_free_entry=False),
-                ),
-                0,
-            ),
-        )
-
-        # Case/When builds a conditional SQL expression:
-        # - For ticket: remaining = total_tickets - paid_tickets_sold
-        # - For meet_greet: remaining = total_tickets - paid_tickets_sold
-        # - For media_selling: remaining = mediasellingcampaign.total_media (you already keep it as remaining)
-        qs = qs.annotate(
-            remaining_stock=Case(
-                When(
-                    campaign_type="ticket",
-                    then=F("ticketcampaign__total_tickets") - F("paid_tickets_sold"),
-                ),
-                When(
-                    campaign_type="meet_greet",
-                    then=F("meetandgreetcampaign__total_tickets") - F("paid_tickets_sold"),
-                ),
-                When(
-                    campaign_type="media_selling",
-                    then=F("mediasellingcampaign__total_media"),
-                ),
-                default=Value(0),  # Value() wraps a literal for the DB
-                output_field=IntegerField(),  # tells Django the result is an integer
-            )
+        return (
+            OpenCampaignIndex.objects
+            .filter(deadline__gt=now, remaining_stock__gt=0)     # not expired, not sold out
+            .exclude(owner=user)  # don’t suggest user’s own campaigns
+            .exclude(campaign_id__in=Participation.objects.filter(fan=user).values("campaign_id"))  # already participated
+            .select_related("campaign")
         )
 
-        # Filter out sold out campaigns (remaining <= 0)
-        qs = qs.filter(remaining_stock__gt=0)
-
-        # Suggested ordering (you can change to trending/likes later)
-        return qs.order_by("-created_at")
\ No newline at end of file
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        campaigns = []
+        for row in page:
+            campaign = row.campaign
+            campaign.remaining_stock = row.remaining_stock   # read by SuggestedCampaignSerializer
+            campaigns.append(campaign)
+        return self.get_paginated_response(self.get_serializer(campaigns, many=True).data)
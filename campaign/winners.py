@@ -0,0 +1,127 @@
+# campaign/winners.py
+"""
+Weighted winner draw, sampled without replacement (Efraimidis–Spirakis).
+
+  - candidates(campaign)          (fan_id, weight) per eligible fan, aggregated in SQL:
+                                  weight = units bought over all the fan's participations
+                                  (a free entry / empty row counts 1), ordered by fan_id
+  - sample(chunks, k, rng)        exponential keys E / weight over numpy chunks; the k smallest
+                                  win. Only the running top-k is kept, so memory is bounded by
+                                  WINNER_DRAW_CHUNK whatever the number of entries.
+  - draw(campaign_id, seed=None)  candidates → sample → WinnerDraw audit row + one bulk_create
+                                  of CampaignWinner (select_random_winners() delegates here)
+
+Each fan is one candidate, so a fan with several purchases can't be drawn twice. The seed
+is stored on WinnerDraw: sample() over the same candidates with the same seed returns the
+same winners (numpy's stream doesn't depend on the chunk size).
+"""
+
+import secrets
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce, NullIf
+
+from campaign.models import Campaign, CampaignWinner, Participation, WinnerDraw
+
+CHUNK     = int(getattr(settings, "WINNER_DRAW_CHUNK", 100_000))
+ALGORITHM = "es-exponential"
+
+
+def candidates(campaign):
+    """Lazy (fan_id, weight) rows, one per active, eligible fan."""
+    units = "media_purchased" if campaign.campaign_type == "media_selling" else "tickets_purchased"
+    qs = Participation.objects.filter(
+        campaign_id=campaign.pk,
+        fan__is_active=True,            # built-in: JOIN on user; only active (not soft-deleted) fans
+    )
+    if campaign.exclude_previous_winners:
+        qs = qs.exclude(
+            fan_id__in=CampaignWinner.objects
+            .filter(campaign__user_id=campaign.user_id, fan__is_active=True)
+            .values("fan_id")
+        )
+    return (
+        qs.values("fan_id")
+        .annotate(weight=Sum(Coalesce(NullIf(F(units), Value(0)), Value(1))))
+        .order_by("fan_id")
+        .values_list("fan_id", "weight")
+        .iterator(chunk_size=CHUNK)
+    )
+
+
+def chunked(rows, size: int = CHUNK):
+    """(fan_ids, weights) numpy arrays of at most `size` rows from an iterable of pairs."""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        ids, weights = zip(*batch)
+        yield np.fromiter(ids, dtype=np.int64, count=len(ids)), np.fromiter(weights, dtype=np.float64, count=len(weights))
+
+
+def sample(chunks, k: int, rng) -> tuple:
+    """
+    (winner ids best first, candidates, total weight) for k draws without replacement.
+    Key per candidate = Exp(1) / weight; the k smallest keys are a weighted sample.
+    """
+    best_ids  = np.empty(0, dtype=np.int64)
+    best_keys = np.empty(0, dtype=np.float64)
+    count, total = 0, 0.0
+    for ids, weights in chunks:
+        count += len(ids)
+        total += float(weights.sum())
+        keys = rng.standard_exponential(len(ids)) / weights
+        ids, keys = np.concatenate((best_ids, ids)), np.concatenate((best_keys, keys))
+        if len(keys) > k:
+            top = np.argpartition(keys, k - 1)[:k]
+            ids, keys = ids[top], keys[top]
+        best_ids, best_keys = ids, keys
+    order = np.argsort(best_keys, kind="stable")
+    return best_ids[order].tolist(), count, int(total)
+
+
+def draw(campaign_id: int, seed: int = None, persist: bool = True) -> list:
+    """
+    Draw winner_slots winners (at least 1) and return the newly won fans (User objects).
+    With persist=False nothing is written and the WinnerDraw is returned unsaved (benchmarks).
+    """
+    from campaign.signals import announce_winner
+
+    campaign = Campaign.objects.select_related("user").get(pk=campaign_id)
+    seed     = secrets.randbits(63) if seed is None else seed
+    k        = campaign.winner_slots or 1
+
+    chosen, count, total = sample(chunked(candidates(campaign)), k, np.random.default_rng(seed))
+    record = WinnerDraw(
+        campaign=campaign, seed=seed, algorithm=ALGORITHM, slots=k,
+        candidates=count, total_weight=total, winners=chosen,
+    )
+    if not persist:
+        return record
+
+    with transaction.atomic():
+        # queryset update: the campaign's post_save handlers have nothing to do here
+        Campaign.objects.filter(pk=campaign.pk).update(winners_selected=True)
+        campaign.winners_selected = True
+        record.save()
+        if not chosen:
+            return []
+
+        existing = set(
+            CampaignWinner.objects.filter(campaign=campaign, fan_id__in=chosen).values_list("fan_id", flat=True)
+        )
+        fans = get_user_model().objects.in_bulk([f for f in chosen if f not in existing])
+        rows = CampaignWinner.objects.bulk_create(
+            [CampaignWinner(campaign=campaign, fan=fans[f]) for f in chosen if f in fans]
+        )
+        # bulk_create sends no post_save → same notifications / DM as the signal
+        for row in rows:
+            announce_winner(row)
+
+    return [row.fan for row in rows]
@@ -5,6 +5,8 @@ import django
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "meetyourfanBackend.settings")
+# async chain-read views pay off only on a long-lived event loop (settings.ASYNC_CHAIN_READS)
+os.environ.setdefault("ASYNC_CHAIN_READS", "true")
 
 # Initialize Django's ASGI application early to prevent "Apps aren't loaded yet."
 django_asgi_app = get_asgi_application()
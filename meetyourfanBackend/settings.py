@@ -105,6 +105,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'campaign.middleware.CampaignIdentityMapMiddleware',
 ]
 
 REST_FRAMEWORK = {
@@ -155,6 +156,58 @@ CHANNEL_LAYERS = {
     },
 }
 
+# shared cache (balance cache, batch-gas EWMA, …): Redis when available, per-process otherwise
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}
+        if REDIS_URL else
+        {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    ),
+}
+
+# conversionRate cache (blockchain/rate_cache.py): entries expire and are reloaded from the
+# ConversionRate row, so processes that don't share a cache still pick up watch_rate updates
+RATE_CACHE_TTL_SECONDS = int(os.environ.get("RATE_CACHE_TTL_SECONDS", "60"))
+
+# MyBalancesView: store a BalanceSnapshot only when the balance changed or this long passed
+BALANCE_SNAPSHOT_MIN_INTERVAL_SECONDS = int(os.environ.get("BALANCE_SNAPSHOT_MIN_INTERVAL_SECONDS", "300"))
+
+# Shared OWNER nonce allocator (blockchain/nonce_manager.py): "postgres" | "redis" | "local"
+NONCE_BACKEND = os.environ.get("NONCE_BACKEND", "postgres")
+NONCE_LEASE_SECONDS = int(os.environ.get("NONCE_LEASE_SECONDS", "120"))
+
+# release/refund batches: broadcast all batches back-to-back (True) or one per mined batch (False)
+HOLD_BATCH_PIPELINED = os.environ.get("HOLD_BATCH_PIPELINED", "True") == "True"
+
+# contract event indexer (blockchain/indexer.py): only blocks this deep are indexed
+INDEXER_CONFIRMATIONS = int(os.environ.get("INDEXER_CONFIRMATIONS", "12"))
+
+# batched contract reads (blockchain/utils.batch_call): empty → plain JSON-RPC batches;
+# set to the chain's Multicall3 deployment (usually 0xcA11bde05977b3631167028862bE2a173976CA11)
+MULTICALL3_ADDRESS = os.environ.get("MULTICALL3_ADDRESS", "")
+# views that may go through Multicall3 (comma-separated, e.g. "getUserBalances,getHold"):
+# aggregate3 calls them with msg.sender = Multicall3, so list only views that don't check the
+# caller. Empty → every batched read is an eth_call from OWNER.
+MULTICALL3_FUNCTIONS = [f for f in os.environ.get("MULTICALL3_FUNCTIONS", "").split(",") if f]
+
+# escrow reconciliation (blockchain/escrow_reconcile.py): held EscrowRecords read per chunk,
+# how old a hold must be before it is checked (younger ones may still be in flight),
+# and whether the nightly sweep may flip rows the ledger shows as released / refunded
+ESCROW_RECONCILE_CHUNK = int(os.environ.get("ESCROW_RECONCILE_CHUNK", "1000"))
+ESCROW_RECONCILE_GRACE_SECONDS = int(os.environ.get("ESCROW_RECONCILE_GRACE_SECONDS", "1800"))
+ESCROW_RECONCILE_REPAIR = os.environ.get("ESCROW_RECONCILE_REPAIR", "False") == "True"
+
+# expiry closer (campaign/tasks.close_expired_campaigns): campaigns claimed and closed per transaction
+CAMPAIGN_CLOSE_CHUNK = int(os.environ.get("CAMPAIGN_CLOSE_CHUNK", "500"))
+
+# winner draw (campaign/winners.py): candidate fans streamed into the sampler per chunk
+WINNER_DRAW_CHUNK = int(os.environ.get("WINNER_DRAW_CHUNK", "100000"))
+
+# open-campaign feed index (campaign/open_index.py): campaigns recomputed per chunk by the
+# periodic refresher, and the window of "recent" buyers behind the trending score
+OPEN_INDEX_REFRESH_CHUNK = int(os.environ.get("OPEN_INDEX_REFRESH_CHUNK", "1000"))
+OPEN_INDEX_TRENDING_HOURS = int(os.environ.get("OPEN_INDEX_TRENDING_HOURS", "24"))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql_psycopg2',
@@ -195,6 +248,22 @@ CELERY_BEAT_SCHEDULE = {
         "task": "blockchain.tasks.sweep_confirmed_guest_orders",
         "schedule": 120.0,  # seconds
     },
+    "resync-owner-nonce-every-minute": {
+        "task": "blockchain.tasks.resync_owner_nonce",
+        "schedule": 60.0,
+    },
+    "index-contract-events-every-15s": {
+        "task": "blockchain.tasks.index_contract_events",
+        "schedule": 15.0,
+    },
+    "reconcile-escrow-holds-nightly": {
+        "task": "blockchain.tasks.reconcile_escrow_holds",
+        "schedule": 24 * 3600.0,
+    },
+    "refresh-open-campaign-index-every-5min": {
+        "task": "campaign.tasks.refresh_open_campaign_index",
+        "schedule": 300.0,
+    },
 }
 
 AUTHENTICATION_BACKENDS = [
@@ -366,6 +435,16 @@ PRIVATE_KEY = "0x" + hexkey
 
 # BLOCKCHAIN
 WEB3_PROVIDER_URL = os.environ['WEB3_PROVIDER_URL']
+# "http" | "eth_tester" | dotted path to a provider factory (blockchain/providers.py)
+# load testing without a node: "blockchain.simulator.provider" + `manage.py benchmark_chain`
+WEB3_PROVIDER = os.environ.get('WEB3_PROVIDER', 'http')
+SIMULATOR_BLOCK_TIME = float(os.environ.get('SIMULATOR_BLOCK_TIME', 0))   # 0 → mine every tx at once
+SIMULATOR_LATENCY_MS = float(os.environ.get('SIMULATOR_LATENCY_MS', 0))   # per RPC round-trip
+SIMULATOR_JITTER_MS = float(os.environ.get('SIMULATOR_JITTER_MS', 0))
+WEB3_POOL_MAXSIZE = int(os.environ.get('WEB3_POOL_MAXSIZE', 32))   # keep-alive connections per process
+# serve balances / wallet / conversion-rate / wallet deposit confirm through AsyncWeb3 views;
+# asgi.py turns it on, WSGI (gunicorn) keeps the sync views unless set explicitly
+ASYNC_CHAIN_READS = os.environ.get('ASYNC_CHAIN_READS', 'false').lower() in ('1', 'true', 'yes')
 CONTRACT_ADDRESS = os.environ['CONTRACT_ADDRESS']
 CONTRACT_ABI_PATH = BASE_DIR / "blockchain" / "contract_abi.json"
 WERT_SC_SIGNER_KEY = os.environ.get('WERT_SC_SIGNER_KEY', '')